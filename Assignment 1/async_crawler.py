@@ -0,0 +1,308 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+import utils
+from checkpoint import Checkpointer, CrawlState
+from crawl_cache import CacheEntry
+from visited_set import VisitedSet, make_visited_set
+
+
+class AsyncCrawler:
+    """
+    A crawler that downloads pages concurrently on a bounded pool of worker
+    threads, driven by an asyncio event loop.
+
+    The pages are still *visited* (logged and expanded) in exactly the same
+    order as `submission.crawler_bfs` and `submission.crawler_dfs`, so the
+    output matches `bfs.txt` and `dfs.txt`; only the downloads overlap.
+    - BFS fetches a whole frontier level at once.
+    - DFS speculatively prefetches the top `concurrency` entries of the stack,
+      which are the URLs most likely to be visited next.  Prefetches that get
+      buried under newer links are cancelled if they were not sent yet, and
+      kept for when the crawl backtracks otherwise, so no URL is requested
+      twice.
+    Pages that are already cached are read from the cache in one batch.
+
+    With `parse_processes` set, downloading and parsing become a pipeline:
+    `concurrency` network workers hand the raw pages to `parse_processes`
+    worker processes through a queue of at most `max_pending_pages` pages,
+    so that parsing runs on other cores while downloads wait on the network,
+    and downloads pause while the parsers are behind.
+
+    With a `checkpointer`, the crawl state is saved periodically so that an
+    interrupted crawl can be continued with `resume`.
+
+    `make_visited` creates the set of URLs already seen by a new crawl; pass
+    e.g. `lambda: make_visited_set('hashed')` to crawl millions of pages
+    without keeping their URLs in memory (see `visited_set`).
+    """
+
+    def __init__(
+            self,
+            concurrency: int = 32,
+            max_pages: int = 500,
+            parse_processes: Optional[int] = None,
+            max_pending_pages: Optional[int] = None,
+            checkpointer: Optional[Checkpointer] = None,
+            make_visited: Callable[[], VisitedSet] = make_visited_set,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive, got {concurrency}")
+        if parse_processes is not None and parse_processes < 1:
+            raise ValueError("parse_processes must be positive, "
+                             f"got {parse_processes}")
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.parse_processes = parse_processes
+        if max_pending_pages is None and parse_processes is not None:
+            max_pending_pages = 4 * parse_processes
+        self.max_pending_pages = max_pending_pages
+        self.checkpointer = checkpointer
+        self.make_visited = make_visited
+        self.visited_urls: List[str] = list()
+
+    def bfs(self, seed_url: str) -> List[str]:
+        """Crawl breadth-first from `seed_url` and return the visited URLs."""
+        return self.resume(CrawlState.start(
+            'bfs', seed_url, self.max_pages, self.make_visited()))
+
+    def dfs(self, seed_url: str) -> List[str]:
+        """Crawl depth-first from `seed_url` and return the visited URLs."""
+        return self.resume(CrawlState.start(
+            'dfs', seed_url, self.max_pages, self.make_visited()))
+
+    def resume(self, state: CrawlState) -> List[str]:
+        """Continue the crawl described by `state` (e.g. loaded from a
+        checkpoint), updating it as pages are visited, and return the URLs
+        visited by this call.  If a `checkpointer` is set, the state is saved
+        every few pages and when the crawl stops, even if interrupted."""
+        if state.mode == 'bfs':
+            crawl = self._bfs(state)
+        elif state.mode == 'dfs':
+            crawl = self._dfs(state)
+        else:
+            raise ValueError(f"Unknown crawl mode: {state.mode}")
+        try:
+            return self._run(crawl)
+        finally:
+            if self.checkpointer is not None:
+                self.checkpointer.save(state)
+
+    def _run(self, crawl) -> List[str]:
+        self.visited_urls = list()
+        # Download in the thread pool -> request submitted to it
+        self._requests: Dict[asyncio.Future, Future] = dict()
+        # Downloads taken up by a pipeline worker
+        self._started: Set[asyncio.Future] = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self._executor = executor
+            try:
+                if self.parse_processes is None:
+                    asyncio.run(crawl)
+                else:
+                    with ProcessPoolExecutor(
+                            max_workers=self.parse_processes,
+                            initializer=utils.init_parse_worker,
+                            initargs=(utils._DEFAULT_SCHEME,),
+                    ) as parse_executor:
+                        self._parse_executor = parse_executor
+                        asyncio.run(self._run_pipeline(crawl))
+            finally:
+                self.__dict__.pop('_executor', None)
+                self.__dict__.pop('_parse_executor', None)
+                self.__dict__.pop('_requests', None)
+                self.__dict__.pop('_started', None)
+        return self.visited_urls
+
+    async def _run_pipeline(self, crawl) -> None:
+        # (url, stale cache entry, result) tuples waiting to be downloaded
+        self._downloads: asyncio.Queue = asyncio.Queue()
+        # (page, result) tuples waiting to be parsed
+        self._pages: asyncio.Queue = asyncio.Queue(self.max_pending_pages)
+        workers = (
+            [asyncio.create_task(self._download_worker())
+             for _ in range(self.concurrency)] +
+            [asyncio.create_task(self._parse_worker())
+             for _ in range(self.parse_processes)]
+        )
+        try:
+            await crawl
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _download_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            url, entry, result = await self._downloads.get()
+            if result.cancelled():
+                continue
+            self._started.add(result)
+            result.add_done_callback(self._started.discard)
+            try:
+                page = await loop.run_in_executor(
+                    self._executor, utils.download_page, url, entry)
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+                continue
+
+            if page is None:
+                if not result.done():
+                    result.set_result(
+                        entry.links if entry is not None else list())
+            else:
+                # Waits while the parsers are behind
+                await self._pages.put((page, result))
+
+    async def _parse_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            page, result = await self._pages.get()
+            if result.cancelled():
+                continue
+            try:
+                start = time.perf_counter()
+                links = await loop.run_in_executor(
+                    self._parse_executor, utils.parse_page, page)
+                if utils._metrics is not None:
+                    # Includes sending the page to the worker process
+                    utils._metrics.record_parse(
+                        page.url, time.perf_counter() - start)
+                utils.store_links(page, links)
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+                continue
+
+            if not result.done():
+                result.set_result(links)
+
+    def _download(self, url: str, entry: Optional[CacheEntry]) \
+            -> asyncio.Future:
+        if self.parse_processes is None:
+            request = self._executor.submit(utils.download_links, url, entry)
+            fetch = asyncio.wrap_future(request)
+            self._requests[fetch] = request
+            fetch.add_done_callback(self._requests.pop)
+            return fetch
+
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        self._downloads.put_nowait((url, entry, result))
+        return result
+
+    def _cancel_unsent(self, fetch: asyncio.Future) -> bool:
+        """Cancel `fetch` unless its page was already requested, and return
+        whether it was cancelled."""
+        if fetch.done():
+            return False
+        request = self._requests.get(fetch)
+        if request is not None:
+            # Fails once a thread runs the download
+            if not request.cancel():
+                return False
+        elif fetch in self._started:
+            return False
+        return fetch.cancel()
+
+    def _fetch_all(self, urls: List[str]) -> List[asyncio.Future]:
+        # Look the whole batch up in the cache at once, and only download
+        # the misses
+        loop = asyncio.get_running_loop()
+        cached = utils.read_cache_many(urls)
+        pending = list()
+        for url in urls:
+            entry = cached.get(url)
+            if entry is not None and utils.is_fresh(entry):
+                if utils._metrics is not None:
+                    utils._metrics.record_cache_hit(url)
+                fetch = loop.create_future()
+                fetch.set_result(entry.links)
+            else:
+                fetch = self._download(url, entry)
+            pending.append(fetch)
+        return pending
+
+    def _visit(self, url: str, state: CrawlState) -> None:
+        # Called once `url` is popped from the frontier
+        if utils._VERBOSE:
+            print(f"Visiting URL: {url}", file=sys.stderr)
+        self.visited_urls.append(url)
+        state.pages += 1
+        if utils._metrics is not None:
+            utils._metrics.record_visit(
+                url, len(state.frontier) + len(state.next_frontier))
+
+    def _page_done(self, state: CrawlState) -> None:
+        if self.checkpointer is not None:
+            self.checkpointer.page_visited(state)
+
+    async def _bfs(self, state: CrawlState) -> None:
+        while not state.done:
+            if len(state.frontier) == 0:
+                state.frontier = state.next_frontier
+                state.next_frontier = []
+            # `crawler_bfs` pops each level from the end of the frontier,
+            # and only the first pages up to the page cap will be visited
+            level = [utils._normalize_url(url)
+                     for url in reversed(state.frontier)]
+            level = level[:state.max_pages - state.pages]
+            pending = self._fetch_all(level)
+
+            try:
+                for url, fetch in zip(level, pending):
+                    links = await fetch
+                    state.frontier.pop()
+                    self._visit(url, state)
+                    if state.pages >= state.max_pages:
+                        return
+
+                    for link in links:
+                        if link not in state.visited:
+                            state.visited.add(link)
+                            state.next_frontier.append(link)
+                    self._page_done(state)
+            finally:
+                for fetch in pending:
+                    fetch.cancel()
+
+    async def _dfs(self, state: CrawlState) -> None:
+        # URL on the frontier -> download started ahead of its visit
+        prefetched: Dict[str, asyncio.Future] = dict()
+
+        try:
+            while not state.done:
+                # The URLs at the top of the stack, nearest first, and no
+                # more than the pages left to visit
+                size = min(self.concurrency, state.max_pages - state.pages)
+                window = state.frontier[:-size - 1:-1]
+
+                # Prefetches buried under newer links would hold up the ones
+                # needed next: cancel those not requested yet
+                in_window = set(window)
+                for url in [url for url in prefetched if url not in in_window]:
+                    if self._cancel_unsent(prefetched[url]):
+                        del prefetched[url]
+
+                top = [url for url in window if url not in prefetched]
+                normalized = [utils._normalize_url(url) for url in top]
+                prefetched.update(zip(top, self._fetch_all(normalized)))
+
+                url = state.frontier[-1]
+                links = await prefetched.pop(url)
+                state.frontier.pop()
+                self._visit(utils._normalize_url(url), state)
+
+                for link in links:
+                    if link not in state.visited:
+                        state.visited.add(link)
+                        state.frontier.append(link)
+                self._page_done(state)
+        finally:
+            for fetch in prefetched.values():
+                fetch.cancel()
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+from typing import List
+
+
+def bench_fetch(args: argparse.Namespace) -> None:
+    """Compare the sequential crawlers against `AsyncCrawler` on the local
+    stand-in server."""
+    import submission
+    import utils
+    from async_crawler import AsyncCrawler
+    from fixture_server import record_visits, serve_in_thread
+
+    utils.configure_crawl(default_scheme='http', use_cache=False,
+                          verbose=False)
+
+    with serve_in_thread(num_pages=args.pages, links_per_page=args.links,
+                         latency=args.latency) as seed_url:
+        for mode in ('bfs', 'dfs'):
+            utils.configure_session(
+                max_connections_per_host=args.max_connections_per_host)
+            start = time.perf_counter()
+            expected = record_visits(getattr(submission, f'crawler_{mode}'),
+                                     seed_url)
+            sequential_time = time.perf_counter() - start
+
+            sequential_stats = utils.session_stats()
+
+            utils.configure_session(
+                max_connections_per_host=args.max_connections_per_host)
+            crawler = AsyncCrawler(concurrency=args.concurrency,
+                                   parse_processes=args.parse_processes)
+            start = time.perf_counter()
+            actual = getattr(crawler, mode)(seed_url)
+            async_time = time.perf_counter() - start
+
+            assert actual == expected, f"{mode}: visit order differs"
+            print(f"{mode}: {len(actual)} pages, "
+                  f"sequential {len(expected) / sequential_time:.1f} pages/s, "
+                  f"concurrency={args.concurrency} "
+                  f"parse_processes={args.parse_processes} "
+                  f"{len(actual) / async_time:.1f} pages/s "
+                  f"({sequential_time / async_time:.1f}x)")
+            print(f"  sequential pool: {sequential_stats}")
+            print(f"  concurrent pool: {utils.session_stats()}")
+
+
+def bench_cache(args: argparse.Namespace) -> None:
+    """Compare warm lookups in the directory and SQLite cache backends."""
+    import tempfile
+    from pathlib import Path
+
+    import utils
+    from crawl_cache import CacheEntry, DirectoryCache, SQLiteCache
+
+    urls = [f'https://example.com/page/{i}' for i in range(args.entries)]
+    keys = [utils._get_cache_key(url) for url in urls]
+    entry = CacheEntry([f'https://example.com/page/{i}' for i in range(20)])
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            'directory': DirectoryCache(Path(directory)),
+            'sqlite': SQLiteCache(Path(directory) / 'links.sqlite3'),
+        }
+        for name, backend in backends.items():
+            start = time.perf_counter()
+            backend.put_many((key, entry) for key in keys)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for key in keys:
+                backend.get(key)
+            get_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(0, len(keys), args.frontier):
+                backend.get_many(keys[i:i + args.frontier])
+            get_many_time = time.perf_counter() - start
+
+            print(f"{name}: write {write_time:.2f}s, "
+                  f"get {len(keys) / get_time:.0f} lookups/s, "
+                  f"get_many {len(keys) / get_many_time:.0f} lookups/s")
+            backend.close()
+
+
+def synthetic_catalog(num_links: int) -> str:
+    """Return a catalog-like HTML page with `num_links` course links."""
+    from fixture_server import page_links
+
+    rows = "\n".join(
+        f'<tr><td><a href="{href}">Course {i}</a></td>'
+        f'<td>{"Lorem ipsum dolor sit amet. " * 4}</td></tr>'
+        for i, href in enumerate(page_links(0, num_links * 10, num_links))
+    )
+    return (f"<!DOCTYPE html>\n<html><head><title>Catalog</title></head>"
+            f"<body><table>\n{rows}\n</table></body></html>\n")
+
+
+def bench_extract(args: argparse.Namespace) -> None:
+    """Compare the DOM+XPath and streaming link extraction paths."""
+    import utils
+
+    pages = dict()
+    for path in args.html_files:
+        with open(path, 'rb') as html_file:
+            pages[path] = html_file.read()
+    if len(pages) == 0:
+        for num_links in (100, 1000, 10000):
+            pages[f'<synthetic, {num_links} links>'] = \
+                synthetic_catalog(num_links).encode()
+
+    for name, content in pages.items():
+        chunks = [content[i:i + utils._STREAM_CHUNK_SIZE]
+                  for i in range(0, len(content), utils._STREAM_CHUNK_SIZE)]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = utils.extract_links(content.decode(args.encoding),
+                                           args.url)
+        dom_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            actual = list(utils.iter_links(chunks, args.url, args.encoding))
+        streaming_time = (time.perf_counter() - start) / args.repeat
+
+        assert actual == expected, f"{name}: extracted links differ"
+        print(f"{name}: {len(content)} bytes, {len(actual)} links, "
+              f"DOM+XPath {dom_time * 1000:.2f}ms, "
+              f"streaming {streaming_time * 1000:.2f}ms "
+              f"({dom_time / streaming_time:.1f}x)")
+
+
+def href_corpus(log_paths: List[str]) -> List[str]:
+    """Return hrefs in the styles found on real pages, derived from the URLs
+    visited in crawler logs such as `bfs.txt`."""
+    from urllib.parse import urlparse
+
+    hrefs = list()
+    for path in log_paths:
+        with open(path) as log_file:
+            for line in log_file:
+                if not line.startswith("Visiting URL: "):
+                    continue
+                url = line[len("Visiting URL: "):].strip()
+                parsed = urlparse(url)
+                last_segment = parsed.path.rsplit('/', 1)[-1]
+                hrefs.extend([
+                    url,
+                    f'{url}/',
+                    f'http://{parsed.netloc}{parsed.path}#main',
+                    f'{parsed.path}?utm_source=menu',
+                    f'{parsed.path}/',
+                    last_segment,
+                    f'{last_segment}/',
+                    '#top',
+                    '',
+                    'mailto:aicluster@rit.edu',
+                    'https://www.rit.edu/',
+                ])
+    return hrefs
+
+
+def bench_normalize(args: argparse.Namespace) -> None:
+    """Compare `_normalize_url` with the memoized `_LinkNormalizer`."""
+    import random
+
+    import utils
+
+    hrefs = href_corpus(args.logs)
+    contexts = sorted({href for href in hrefs if href.startswith('https://')
+                       and not href.endswith('/')})
+    rng = random.Random(0)
+    pages = [(context, rng.sample(hrefs, min(args.links, len(hrefs))))
+             for context in contexts]
+
+    start = time.perf_counter()
+    expected = list()
+    for context, page_hrefs in pages:
+        page = list()
+        for href in page_hrefs:
+            link = utils._normalize_url(href, context)
+            page.append((link, utils._is_same_origin(link, context)))
+        expected.append(page)
+    reference_time = time.perf_counter() - start
+
+    utils._parse_href.cache_clear()
+    start = time.perf_counter()
+    actual = list()
+    for context, page_hrefs in pages:
+        normalizer = utils._LinkNormalizer(context)
+        page = list()
+        for href in page_hrefs:
+            link = normalizer.normalize(href)
+            page.append((link, normalizer.is_same_origin(link)))
+        actual.append(page)
+    memoized_time = time.perf_counter() - start
+
+    assert actual == expected, "normalized links differ"
+    num_links = sum(len(page_hrefs) for _, page_hrefs in pages)
+    print(f"{len(pages)} pages, {num_links} links "
+          f"({len(set(hrefs))} distinct hrefs): "
+          f"_normalize_url {num_links / reference_time:.0f} links/s, "
+          f"_LinkNormalizer {num_links / memoized_time:.0f} links/s "
+          f"({reference_time / memoized_time:.1f}x)")
+    print(f"  {utils._parse_href.cache_info()}")
+
+
+def bench_politeness(args: argparse.Namespace) -> None:
+    """Crawl a local server that fails some requests, with and without
+    retries, and measure the request rate the scheduler holds a host to."""
+    import utils
+    from async_crawler import AsyncCrawler
+    from fixture_server import serve_in_thread
+
+    utils.configure_crawl(default_scheme='http', use_cache=False,
+                          verbose=False)
+
+    with serve_in_thread(num_pages=args.pages, latency=args.latency,
+                         failure_rate=args.failure_rate,
+                         crawl_delay=args.crawl_delay) as seed_url:
+        for max_retries in (0, args.max_retries):
+            utils.configure_session()
+            utils.configure_politeness(
+                min_delay=args.min_delay, max_retries=max_retries,
+                backoff=args.backoff, use_robots=True, seed=0)
+            crawler = AsyncCrawler(concurrency=args.concurrency)
+            start = time.perf_counter()
+            visited = crawler.bfs(seed_url)
+            elapsed = time.perf_counter() - start
+            stats = utils.politeness_stats()
+            print(f"max_retries={max_retries}: {len(visited)} pages in "
+                  f"{elapsed:.1f}s ({stats.requests / elapsed:.1f} requests/s "
+                  f"to the host), {stats.failures} pages lost")
+            print(f"  {stats}")
+
+
+def bench_metrics(args: argparse.Namespace) -> None:
+    """Crawl a local server with and without metrics, to measure their
+    overhead, and break down where the instrumented crawl spent its time."""
+    import io
+
+    import utils
+    from async_crawler import AsyncCrawler
+    from fixture_server import serve_in_thread
+
+    utils.configure_crawl(default_scheme='http', use_cache=False,
+                          verbose=False)
+
+    with serve_in_thread(num_pages=args.pages,
+                         latency=args.latency) as seed_url:
+        for enabled in (False, True):
+            utils.configure_session()
+            utils.configure_politeness()
+            events = io.StringIO()
+            if enabled:
+                metrics = utils.configure_metrics(events=events)
+            else:
+                utils.disable_metrics()
+            crawler = AsyncCrawler(concurrency=args.concurrency,
+                                   parse_processes=args.parse_processes)
+            start = time.perf_counter()
+            visited = crawler.bfs(seed_url)
+            elapsed = time.perf_counter() - start
+            print(f"Metrics {'on' if enabled else 'off'}: {len(visited)} "
+                  f"pages in {elapsed:.2f}s "
+                  f"({len(visited) / elapsed:.0f} pages/s)")
+        metrics.close()
+        utils.disable_metrics()
+
+    summary = metrics.summary()
+    print(f"  {len(events.getvalue().splitlines())} events, "
+          f"{summary['bytes']} bytes downloaded; summed over pages: "
+          f"{summary['fetch_seconds']:.2f}s until the response headers, "
+          f"{summary['download_seconds']:.2f}s reading bodies, "
+          f"{summary['parse_seconds']:.2f}s parsing")
+
+
+def bench_recrawl(args: argparse.Namespace) -> None:
+    """Crawl a local server into an empty cache, change some of its pages,
+    and refresh the crawl incrementally, with and without ETags."""
+    import tempfile
+    from pathlib import Path
+    from urllib.parse import urlparse
+
+    import utils
+    from async_crawler import AsyncCrawler
+    from fixture_server import serve_in_thread
+
+    utils.configure_crawl(default_scheme='http', verbose=False)
+
+    for etags in (True, False):
+        with tempfile.TemporaryDirectory() as directory:
+            utils._get_cache_dir = lambda: Path(directory)
+            port = 0
+            for revision, ttl in ((0, None), (1, 0.0)):
+                utils.configure_cache(ttl=ttl)
+                utils.configure_session()
+                utils.configure_politeness()
+                metrics = utils.configure_metrics()
+                before = utils.recrawl_stats()
+                with serve_in_thread(port=port, num_pages=args.pages,
+                                     latency=args.latency, etags=etags,
+                                     revision=revision,
+                                     change_rate=args.change_rate) \
+                        as seed_url:
+                    port = urlparse(seed_url).port
+                    crawler = AsyncCrawler(concurrency=args.concurrency)
+                    start = time.perf_counter()
+                    visited = crawler.bfs(seed_url)
+                    elapsed = time.perf_counter() - start
+                after = utils.recrawl_stats()
+                stats = type(after)(*(
+                    getattr(after, name) - getattr(before, name)
+                    for name in ('not_modified', 'unchanged', 'changed',
+                                 'new')))
+                summary = metrics.summary()
+                print(f"etags={etags}, "
+                      f"{'full crawl' if revision == 0 else 'recrawl'}: "
+                      f"{len(visited)} pages in {elapsed:.2f}s, "
+                      f"{summary['bytes']} bytes downloaded, "
+                      f"{summary['parse_seconds'] * 1000:.0f}ms parsing")
+                print(f"  {stats}")
+            utils.disable_metrics()
+            utils.configure_cache()
+
+
+def synthetic_url(i: int) -> str:
+    """Return a distinct URL of a typical length for benchmarks."""
+    return f'https://www.example.edu/department-{i % 97}/courses/course-{i}'
+
+
+def bench_visited(args: argparse.Namespace) -> None:
+    """Compare the memory taken by `set[str]` and the compact visited sets
+    holding the same URLs, and their speed and false positive rates."""
+    import tracemalloc
+
+    from visited_set import make_visited_set
+
+    absent = [synthetic_url(args.urls + i) for i in range(args.lookups)]
+    for kind in ('exact', 'hashed', 'bloom'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        visited = make_visited_set(kind, args.urls, args.fp_rate)
+        # The URLs themselves are counted: the crawler only keeps them
+        # alive through a `set[str]`
+        for i in range(args.urls):
+            visited.add(synthetic_url(i))
+        add_time = time.perf_counter() - start
+        memory, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        missing = sum(synthetic_url(i) not in visited
+                      for i in range(0, args.urls, args.urls // args.lookups))
+        false_positives = sum(url in visited for url in absent)
+        lookup_time = time.perf_counter() - start
+        assert missing == 0, f"{kind}: {missing} visited URLs not found"
+        print(f"{kind}: {memory / 2**20:.1f} MiB "
+              f"({memory / args.urls:.1f} bytes/URL, "
+              f"peak {peak / 2**20:.1f} MiB), "
+              f"{args.urls / add_time:.0f} adds/s, "
+              f"{2 * args.lookups / lookup_time:.0f} lookups/s, "
+              f"{false_positives / len(absent):.3%} false positives")
+        del visited
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crawler against a local stand-in server.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(
+        required=True,
+        dest='benchmark',
+        title="benchmarks",
+    )
+    fetch_parser = subparsers.add_parser(
+        'fetch',
+        help="Compare sequential and concurrent crawling throughput",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    fetch_parser.add_argument(
+        '--pages', type=int, default=2000, help="Number of pages on the site")
+    fetch_parser.add_argument(
+        '--links', type=int, default=10, help="Number of links on each page")
+    fetch_parser.add_argument(
+        '--latency', type=float, default=0.02,
+        help="Simulated network latency per request, in seconds")
+    fetch_parser.add_argument(
+        '--concurrency', type=int, default=32,
+        help="Number of concurrent downloads")
+    fetch_parser.add_argument(
+        '--parse-processes', type=int,
+        help="Number of parsing processes (default: parse on the network "
+             "workers)")
+    fetch_parser.add_argument(
+        '--max-connections-per-host', type=int, default=10,
+        help="Connection pool size for the stand-in server")
+    fetch_parser.set_defaults(func=bench_fetch)
+
+    cache_parser = subparsers.add_parser(
+        'cache',
+        help="Compare warm lookups in the cache backends",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cache_parser.add_argument(
+        '--entries', type=int, default=20000, help="Number of cached pages")
+    cache_parser.add_argument(
+        '--frontier', type=int, default=1000,
+        help="Number of URLs looked up per get_many batch")
+    cache_parser.set_defaults(func=bench_cache)
+
+    extract_parser = subparsers.add_parser(
+        'extract',
+        help="Compare DOM+XPath and streaming link extraction",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    extract_parser.add_argument(
+        'html_files', metavar='HTML_FILE', nargs='*',
+        help="Saved HTML pages (default: synthetic catalog pages)")
+    extract_parser.add_argument(
+        '--url', default='https://www.rit.edu/computing/courses',
+        help="URL the pages are resolved against")
+    extract_parser.add_argument(
+        '--encoding', default='utf-8', help="Encoding of the pages")
+    extract_parser.add_argument(
+        '--repeat', type=int, default=20, help="Runs per page")
+    extract_parser.set_defaults(func=bench_extract)
+
+    normalize_parser = subparsers.add_parser(
+        'normalize',
+        help="Compare plain and memoized URL normalization",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    normalize_parser.add_argument(
+        'logs', metavar='LOG', nargs='*', default=['bfs.txt', 'dfs.txt'],
+        help="Crawler logs whose visited URLs make up the href corpus")
+    normalize_parser.add_argument(
+        '--links', type=int, default=200, help="Links on each page")
+    normalize_parser.set_defaults(func=bench_normalize)
+
+    politeness_parser = subparsers.add_parser(
+        'politeness',
+        help="Measure retries and rate limiting against a failing server",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    politeness_parser.add_argument(
+        '--pages', type=int, default=2000, help="Number of pages on the site")
+    politeness_parser.add_argument(
+        '--latency', type=float, default=0.005,
+        help="Simulated network latency per request, in seconds")
+    politeness_parser.add_argument(
+        '--failure-rate', type=float, default=0.1,
+        help="Fraction of the requests answered with 503")
+    politeness_parser.add_argument(
+        '--crawl-delay', type=float,
+        help="Crawl-delay of the site's robots.txt, in whole seconds "
+             "(default: none)")
+    politeness_parser.add_argument(
+        '--min-delay', type=float, default=0.0,
+        help="Minimum seconds between two requests to the host")
+    politeness_parser.add_argument(
+        '--max-retries', type=int, default=3, help="Retries per page")
+    politeness_parser.add_argument(
+        '--backoff', type=float, default=0.01,
+        help="Initial retry backoff, in seconds")
+    politeness_parser.add_argument(
+        '--concurrency', type=int, default=8,
+        help="Number of concurrent downloads")
+    politeness_parser.set_defaults(func=bench_politeness)
+
+    metrics_parser = subparsers.add_parser(
+        'metrics',
+        help="Measure the overhead and breakdown of the crawl metrics",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    metrics_parser.add_argument(
+        '--pages', type=int, default=2000, help="Number of pages on the site")
+    metrics_parser.add_argument(
+        '--latency', type=float, default=0.005,
+        help="Simulated network latency per request, in seconds")
+    metrics_parser.add_argument(
+        '--concurrency', type=int, default=8,
+        help="Number of concurrent downloads")
+    metrics_parser.add_argument(
+        '--parse-processes', type=int,
+        help="Parse pages in worker processes (default: in the download "
+             "threads)")
+    metrics_parser.set_defaults(func=bench_metrics)
+
+    recrawl_parser = subparsers.add_parser(
+        'recrawl',
+        help="Measure an incremental recrawl of a partly changed site",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    recrawl_parser.add_argument(
+        '--pages', type=int, default=2000, help="Number of pages on the site")
+    recrawl_parser.add_argument(
+        '--latency', type=float, default=0.005,
+        help="Simulated network latency per request, in seconds")
+    recrawl_parser.add_argument(
+        '--change-rate', type=float, default=0.1,
+        help="Fraction of the pages changed between the crawls")
+    recrawl_parser.add_argument(
+        '--concurrency', type=int, default=8,
+        help="Number of concurrent downloads")
+    recrawl_parser.set_defaults(func=bench_recrawl)
+
+    visited_parser = subparsers.add_parser(
+        'visited',
+        help="Compare the memory taken by the visited set implementations",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    visited_parser.add_argument(
+        '--urls', type=int, default=1_000_000, help="Number of visited URLs")
+    visited_parser.add_argument(
+        '--lookups', type=int, default=100_000,
+        help="Number of lookups of visited and of unvisited URLs")
+    visited_parser.add_argument(
+        '--fp-rate', type=float, default=0.001,
+        help="Target false positive rate of the Bloom filter")
+    visited_parser.set_defaults(func=bench_visited)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
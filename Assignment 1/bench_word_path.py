@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+from typing import List, Tuple
+
+
+def sample_pairs(words: List[str], num_pairs: int, length: int, seed: int) \
+        -> List[Tuple[str, str]]:
+    """Return random (start, target) pairs of dictionary words of `length`
+    letters."""
+    import random
+
+    rng = random.Random(seed)
+    candidates = sorted(word for word in words if len(word) == length)
+    return [(rng.choice(candidates), rng.choice(candidates))
+            for _ in range(num_pairs)]
+
+
+def bench_neighbors(args: argparse.Namespace) -> None:
+    """Compare `submission.word_path` with `WordGraph.shortest_path`.
+
+    `word_path` reads the dictionary on every call, so the dictionary load
+    time (printed at the end) is part of its time."""
+    import submission
+    from word_graph import LETTERS, WordGraph
+
+    start = time.perf_counter()
+    graph = WordGraph.from_file(args.dictionary)
+    load_time = time.perf_counter() - start
+    pairs = [tuple(args.pairs[i:i + 2])
+             for i in range(0, len(args.pairs) - 1, 2)]
+    pairs += sample_pairs(list(graph.words), args.random, args.length, 0)
+
+    for start_word, target_word in pairs:
+        start = time.perf_counter()
+        expected = submission.word_path(args.dictionary, start_word,
+                                        target_word)
+        reference_time = time.perf_counter() - start
+
+        # First query of a word length builds its buckets
+        start = time.perf_counter()
+        actual = graph.shortest_path(start_word, target_word)
+        graph_time = time.perf_counter() - start
+
+        assert actual == expected, \
+            f"{start_word} -> {target_word}: {actual} != {expected}"
+        print(f"{start_word} -> {target_word}: {len(actual)} words, "
+              f"word_path {reference_time * 1000:.1f}ms, "
+              f"WordGraph {graph_time * 1000:.1f}ms "
+              f"({reference_time / graph_time:.1f}x)")
+
+    # Cost of one expansion of the start word in each approach
+    start_word = pairs[0][0]
+    candidates = len(start_word) * len(LETTERS)
+    print(f"Expanding {start_word!r}: word_path builds and probes "
+          f"{candidates} candidate strings, WordGraph does "
+          f"{len(start_word)} bucket lookups "
+          f"({len(list(graph.neighbors(start_word)))} neighbors)")
+    print(f"Dictionary loaded in {load_time * 1000:.0f}ms "
+          f"({len(graph)} words)")
+
+
+# Start and target words of ladders of various lengths in `words.txt`
+LADDER_PAIRS = [
+    ('cold', 'warm'),
+    ('small', 'short'),
+    ('acne', 'sort'),
+    ('lint', 'idea'),
+    ('gulls', 'highs'),
+    ('quart', 'kevin'),
+    ('chair', 'doggy'),
+    ('stoops', 'dryads'),
+    ('erodes', 'racing'),
+    ('summing', 'hobbled'),
+    ('googled', 'bunging'),
+]
+
+
+def bench_bidirectional(args: argparse.Namespace) -> None:
+    """Compare the words expanded by the unidirectional and bidirectional
+    breadth-first searches of `WordGraph`."""
+    from word_graph import WordGraph
+
+    graph = WordGraph.from_file(args.dictionary)
+    pairs = [tuple(args.pairs[i:i + 2])
+             for i in range(0, len(args.pairs) - 1, 2)] or LADDER_PAIRS
+    # Build the buckets of every word length up front
+    for start_word, _ in pairs:
+        list(graph.neighbors(start_word))
+
+    for start_word, target_word in pairs:
+        start = time.perf_counter()
+        expected = graph.shortest_path(start_word, target_word)
+        bfs_time = time.perf_counter() - start
+        bfs_expanded = graph.num_expanded
+
+        start = time.perf_counter()
+        actual = graph.bidirectional_path(start_word, target_word)
+        bidirectional_time = time.perf_counter() - start
+        bidirectional_expanded = graph.num_expanded
+
+        assert actual == expected, \
+            f"{start_word} -> {target_word}: {actual} != {expected}"
+        print(f"{start_word} -> {target_word}: {len(actual)} words, "
+              f"BFS {bfs_expanded} expanded in {bfs_time * 1000:.1f}ms, "
+              f"bidirectional {bidirectional_expanded} expanded in "
+              f"{bidirectional_time * 1000:.1f}ms "
+              f"({bfs_expanded / max(bidirectional_expanded, 1):.1f}x fewer, "
+              f"{bfs_time / bidirectional_time:.1f}x faster)")
+
+
+def bench_astar(args: argparse.Namespace) -> None:
+    """Compare the words expanded by breadth-first and A* search of
+    `WordGraph`, on fixed and random pairs with a ladder."""
+    from word_graph import WordGraph
+
+    graph = WordGraph.from_file(args.dictionary)
+    pairs = [tuple(args.pairs[i:i + 2])
+             for i in range(0, len(args.pairs) - 1, 2)] or LADDER_PAIRS
+    pairs += sample_pairs(list(graph.words), args.random, args.length, 0)
+    for start_word, _ in pairs:
+        list(graph.neighbors(start_word))
+
+    totals = [0, 0, 0.0, 0.0]
+    for start_word, target_word in pairs:
+        start = time.perf_counter()
+        expected = graph.shortest_path(start_word, target_word)
+        bfs_time = time.perf_counter() - start
+        bfs_expanded = graph.num_expanded
+        if len(expected) == 0:
+            continue
+
+        start = time.perf_counter()
+        actual = graph.astar_path(start_word, target_word)
+        astar_time = time.perf_counter() - start
+        astar_expanded = graph.num_expanded
+
+        assert len(actual) == len(expected), \
+            f"{start_word} -> {target_word}: {actual} != {expected}"
+        for word, next_word in zip(actual, actual[1:]):
+            assert next_word in graph.neighbors(word), \
+                f"{start_word} -> {target_word}: {actual} is not a ladder"
+        totals[0] += bfs_expanded
+        totals[1] += astar_expanded
+        totals[2] += bfs_time
+        totals[3] += astar_time
+        print(f"{start_word} -> {target_word}: {len(actual)} words, "
+              f"BFS {bfs_expanded} expanded in {bfs_time * 1000:.1f}ms, "
+              f"A* {astar_expanded} expanded in {astar_time * 1000:.1f}ms")
+    print(f"Total: BFS {totals[0]} expanded in {totals[2] * 1000:.0f}ms, "
+          f"A* {totals[1]} expanded in {totals[3] * 1000:.0f}ms "
+          f"({totals[0] / max(totals[1], 1):.1f}x fewer, "
+          f"{totals[2] / max(totals[3], 1e-9):.1f}x faster)")
+
+
+def path_copying_bfs(graph, start_word: str, target_word: str) -> List[str]:
+    """The search `submission.word_path` used to run, on the neighbors of
+    `graph`: a list used as a queue, holding a copy of the path to every
+    word (it now keeps parent pointers in a deque, as `WordGraph` does)."""
+    frontier = [(start_word, [start_word])]
+    visited = {start_word}
+    while frontier:
+        current_word, path = frontier.pop(0)
+        for next_word in graph.neighbors(current_word):
+            if next_word not in visited:
+                if next_word == target_word:
+                    return path + [next_word]
+                visited.add(next_word)
+                frontier.append((next_word, path + [next_word]))
+    return []
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Compare the peak memory and time of the path-copying search with the
+    deque and parent-pointer search of `WordGraph.shortest_path`."""
+    import tracemalloc
+
+    from word_graph import WordGraph
+
+    graph = WordGraph.from_file(args.dictionary)
+    pairs = [tuple(args.pairs[i:i + 2])
+             for i in range(0, len(args.pairs) - 1, 2)] or LADDER_PAIRS
+    # Build the buckets of every word length up front, so that they are not
+    # counted in the peaks
+    for start_word, _ in pairs:
+        list(graph.neighbors(start_word))
+
+    for start_word, target_word in pairs:
+        results = list()
+        for search in (path_copying_bfs, WordGraph.shortest_path):
+            tracemalloc.start()
+            result = search(graph, start_word, target_word)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            search(graph, start_word, target_word)
+            results.append((result, peak, time.perf_counter() - start))
+
+        (expected, copying_peak, copying_time), \
+            (actual, parents_peak, parents_time) = results
+        assert actual == expected, \
+            f"{start_word} -> {target_word}: {actual} != {expected}"
+        print(f"{start_word} -> {target_word}: {len(actual)} words, "
+              f"path copying peak {copying_peak / 1024:.0f} KiB in "
+              f"{copying_time * 1000:.1f}ms, parent pointers peak "
+              f"{parents_peak / 1024:.0f} KiB in {parents_time * 1000:.1f}ms "
+              f"({copying_peak / parents_peak:.1f}x less memory)")
+
+
+def bench_index(args: argparse.Namespace) -> None:
+    """Compare answering one query from the dictionary file and from a
+    prebuilt, memory-mapped index, in-process and as a `word_path.py` run."""
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    from word_graph import WordGraph
+    from word_index import MappedWordGraph, build_index
+
+    pairs = [tuple(args.pairs[i:i + 2])
+             for i in range(0, len(args.pairs) - 1, 2)]
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = os.path.join(directory, 'words.idx')
+        start = time.perf_counter()
+        build_index(args.dictionary, index_path)
+        print(f"Index built in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(index_path)} bytes)")
+
+        for start_word, target_word in pairs:
+            start = time.perf_counter()
+            expected = WordGraph.from_file(args.dictionary).shortest_path(
+                start_word, target_word)
+            text_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with MappedWordGraph(index_path) as graph:
+                actual = graph.shortest_path(start_word, target_word)
+            index_time = time.perf_counter() - start
+
+            assert actual == expected, \
+                f"{start_word} -> {target_word}: {actual} != {expected}"
+            print(f"{start_word} -> {target_word}: load and search "
+                  f"{text_time * 1000:.1f}ms from the dictionary, "
+                  f"{index_time * 1000:.1f}ms from the index "
+                  f"({text_time / index_time:.0f}x)")
+
+            for dictionary in (args.dictionary, index_path):
+                start = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, 'word_path.py', dictionary, start_word,
+                     target_word], check=True, stdout=subprocess.DEVNULL)
+                print(f"  word_path.py {os.path.basename(dictionary)}: "
+                      f"{(time.perf_counter() - start) * 1000:.0f}ms "
+                      f"(including interpreter startup)")
+
+
+def bench_batch(args: argparse.Namespace) -> None:
+    """Compare answering a stream of queries with a process per query, and
+    with the batch mode with and without BFS trees and worker processes."""
+    import random
+    import subprocess
+    import sys
+
+    import word_batch
+    from word_graph import WordGraph
+
+    graph = WordGraph.from_file(args.dictionary)
+    # A few hot start words get most of the queries
+    rng = random.Random(0)
+    words = sorted(word for word in graph.words if len(word) == args.length)
+    hot_words = rng.sample(words, args.hot_words)
+    queries = [
+        f"{rng.choice(hot_words) if rng.random() < 0.8 else rng.choice(words)}"
+        f" {rng.choice(words)}"
+        for _ in range(args.queries)]
+    expected = [' '.join(graph.shortest_path(*query.split())) or
+                word_batch.NO_SOLUTION for query in queries]
+
+    num_processes = min(20, len(queries))
+    start = time.perf_counter()
+    for query in queries[:num_processes]:
+        subprocess.run([sys.executable, 'word_path.py', args.dictionary,
+                        *query.split()], check=True, stdout=subprocess.DEVNULL)
+    process_rate = num_processes / (time.perf_counter() - start)
+    print(f"One word_path.py process per query: {process_rate:.1f} queries/s")
+
+    for cache_size in (0, 128):
+        start = time.perf_counter()
+        solver = word_batch.LadderSolver(
+            WordGraph.from_file(args.dictionary), cache_size=cache_size)
+        answers = list(word_batch.answer_lines(solver, queries))
+        elapsed = time.perf_counter() - start
+        assert answers == expected, "batch answers differ"
+        print(f"Batch, cache_size={cache_size}: "
+              f"{len(queries) / elapsed:.0f} queries/s ({solver.stats()})")
+
+    if args.processes:
+        start = time.perf_counter()
+        answers = list(word_batch.answer_lines_parallel(
+            args.dictionary, queries, args.processes))
+        elapsed = time.perf_counter() - start
+        assert answers == expected, "parallel batch answers differ"
+        print(f"Batch, {args.processes} processes: "
+              f"{len(queries) / elapsed:.0f} queries/s")
+
+
+def bench_ladders(args: argparse.Namespace) -> None:
+    """Enumerate every shortest ladder of pairs with many of them, and the
+    k shortest ladders, checking the enumeration against `LadderDag.count`.
+
+    Besides pairs from the dictionary, a synthetic dictionary of every word
+    of `--synthetic-length` letters over `ab` has n! shortest ladders from
+    `aa...a` to `bb...b`."""
+    import itertools
+
+    from word_graph import WordGraph
+
+    graphs = [(WordGraph.from_file(args.dictionary),
+               [('stow', 'nape'), ('club', 'yaks'), ('gulls', 'highs'),
+                ('erodes', 'racing')])]
+    n = args.synthetic_length
+    graphs.append((
+        WordGraph(''.join(letters)
+                  for letters in itertools.product('ab', repeat=n)),
+        [('a' * n, 'b' * n)]))
+
+    for graph, pairs in graphs:
+        for start_word, target_word in pairs:
+            start = time.perf_counter()
+            dag = graph.ladder_dag(start_word, target_word)
+            dag_time = time.perf_counter() - start
+            count = dag.count()
+
+            start = time.perf_counter()
+            ladders = iter(dag)
+            first = next(ladders)
+            first_time = time.perf_counter() - start
+            enumerated = 1 + sum(1 for _ in ladders)
+            enumerate_time = time.perf_counter() - start
+            assert enumerated == count, \
+                f"{start_word} -> {target_word}: {enumerated} != {count}"
+            assert len(first) == dag.length + 1
+
+            start = time.perf_counter()
+            k_shortest = list(itertools.islice(
+                graph.k_shortest_ladders(start_word, target_word), args.k))
+            k_time = time.perf_counter() - start
+            assert k_shortest[0] == graph.shortest_path(start_word,
+                                                        target_word)
+
+            print(f"{start_word} -> {target_word}: {count} shortest ladders "
+                  f"of {dag.length + 1} words, DAG of "
+                  f"{sum(map(len, dag.layers))} words in "
+                  f"{dag_time * 1000:.1f}ms, first ladder in "
+                  f"{first_time * 1000:.2f}ms, all in "
+                  f"{enumerate_time * 1000:.1f}ms "
+                  f"({count / enumerate_time:.0f} ladders/s); "
+                  f"{len(k_shortest)} shortest simple ladders "
+                  f"(up to {len(k_shortest[-1])} words) in "
+                  f"{k_time * 1000:.1f}ms")
+
+
+def bench_components(args: argparse.Namespace) -> None:
+    """Compare answering random queries with and without the connected
+    components labeled, most of which have no ladder for long words."""
+    from word_graph import WordGraph
+
+    graph = WordGraph.from_file(args.dictionary)
+    labeled = WordGraph.from_file(args.dictionary, label_components=True)
+    for length in args.lengths:
+        pairs = sample_pairs(list(graph.words), args.random, length, 0)
+
+        start = time.perf_counter()
+        labeled.component(pairs[0][0])
+        label_time = time.perf_counter() - start
+
+        expected, plain_time, plain_expanded = [], 0.0, 0
+        for start_word, target_word in pairs:
+            start = time.perf_counter()
+            expected.append(graph.shortest_path(start_word, target_word))
+            plain_time += time.perf_counter() - start
+            plain_expanded += graph.num_expanded
+
+        actual, labeled_time, labeled_expanded = [], 0.0, 0
+        for start_word, target_word in pairs:
+            start = time.perf_counter()
+            actual.append(labeled.shortest_path(start_word, target_word))
+            labeled_time += time.perf_counter() - start
+            labeled_expanded += labeled.num_expanded
+
+        assert actual == expected, f"{length}-letter ladders differ"
+        unreachable = sum(1 for ladder in expected if not ladder)
+        print(f"{length} letters: {unreachable}/{len(pairs)} pairs without "
+              f"a ladder; {plain_time * 1000:.0f}ms and {plain_expanded} "
+              f"expansions unlabeled, {labeled_time * 1000:.0f}ms and "
+              f"{labeled_expanded} expansions labeled "
+              f"(after {label_time * 1000:.0f}ms of labeling)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the word ladder search.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(
+        required=True,
+        dest='benchmark',
+        title="benchmarks",
+    )
+    neighbors_parser = subparsers.add_parser(
+        'neighbors',
+        help="Compare candidate generation and the wildcard-bucket index",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    neighbors_parser.add_argument(
+        'pairs', metavar='WORD', nargs='*', default=['cold', 'warm'],
+        help="Start and target words, in pairs")
+    neighbors_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    neighbors_parser.add_argument(
+        '--random', type=int, default=5,
+        help="Number of random pairs to add")
+    neighbors_parser.add_argument(
+        '--length', type=int, default=4, help="Length of the random words")
+    neighbors_parser.set_defaults(func=bench_neighbors)
+
+    bidirectional_parser = subparsers.add_parser(
+        'bidirectional',
+        help="Compare unidirectional and bidirectional BFS",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    bidirectional_parser.add_argument(
+        'pairs', metavar='WORD', nargs='*',
+        help="Start and target words, in pairs (default: a fixed set of "
+             "ladders of various lengths)")
+    bidirectional_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    bidirectional_parser.set_defaults(func=bench_bidirectional)
+
+    astar_parser = subparsers.add_parser(
+        'astar',
+        help="Compare the words expanded by BFS and A* search",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    astar_parser.add_argument(
+        'pairs', metavar='WORD', nargs='*',
+        help="Start and target words, in pairs (default: ladders of "
+             "various lengths)")
+    astar_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    astar_parser.add_argument(
+        '--random', type=int, default=20,
+        help="Number of random pairs of dictionary words to add")
+    astar_parser.add_argument(
+        '--length', type=int, default=5,
+        help="Length of the words of the random pairs")
+    astar_parser.set_defaults(func=bench_astar)
+
+    memory_parser = subparsers.add_parser(
+        'memory',
+        help="Compare the peak memory of path copying and parent pointers",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    memory_parser.add_argument(
+        'pairs', metavar='WORD', nargs='*',
+        help="Start and target words, in pairs (default: a fixed set of "
+             "ladders of various lengths)")
+    memory_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    memory_parser.set_defaults(func=bench_memory)
+
+    batch_parser = subparsers.add_parser(
+        'batch',
+        help="Compare per-query processes and the batch mode",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    batch_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    batch_parser.add_argument(
+        '--queries', type=int, default=2000, help="Number of queries")
+    batch_parser.add_argument(
+        '--hot-words', type=int, default=20,
+        help="Number of start words that get 80%% of the queries")
+    batch_parser.add_argument(
+        '--length', type=int, default=4, help="Length of the words")
+    batch_parser.add_argument(
+        '--processes', type=int, default=2,
+        help="Number of worker processes (0: skip)")
+    batch_parser.set_defaults(func=bench_batch)
+
+    ladders_parser = subparsers.add_parser(
+        'ladders',
+        help="Enumerate all shortest and the k shortest ladders",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    ladders_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    ladders_parser.add_argument(
+        '--synthetic-length', type=int, default=9,
+        help="Length of the words of the synthetic dictionary")
+    ladders_parser.add_argument(
+        '--k', type=int, default=10, help="Number of k shortest ladders")
+    ladders_parser.set_defaults(func=bench_ladders)
+
+    index_parser = subparsers.add_parser(
+        'index',
+        help="Compare queries from the dictionary and from a prebuilt index",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    index_parser.add_argument(
+        'pairs', metavar='WORD', nargs='*',
+        default=['cold', 'warm', 'acne', 'sort'],
+        help="Start and target words, in pairs")
+    index_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    index_parser.set_defaults(func=bench_index)
+
+    components_parser = subparsers.add_parser(
+        'components',
+        help="Compare queries with and without labeled components",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    components_parser.add_argument(
+        '--dictionary', default='words.txt', help="The dictionary file")
+    components_parser.add_argument(
+        '--lengths', type=int, nargs='+', default=[4, 6, 8],
+        help="Lengths of the words of the random pairs")
+    components_parser.add_argument(
+        '--random', type=int, default=100,
+        help="Number of random pairs of each length")
+    components_parser.set_defaults(func=bench_components)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import gzip
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from visited_set import (CompactUrlSet, VisitedSet, make_visited_set,
+                         visited_set_from_bytes)
+
+# Bumped whenever the layout of checkpoint files changes
+_CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class CrawlState:
+    """
+    Everything a crawl needs to continue from where it stopped.
+
+    - `mode`: `'bfs'` or `'dfs'`.
+    - `frontier`: URLs still to be visited; like in `crawler_bfs` and
+      `crawler_dfs`, the next URL to visit is at the *end* of the list.
+    - `next_frontier`: (BFS only) URLs of the next level found so far.
+    - `visited`: Every URL ever added to a frontier, as a `set` or a
+      compact set (see `visited_set`).
+    - `pages`: Number of pages visited so far.
+    """
+    mode: str
+    seed_url: str
+    max_pages: int
+    frontier: List[str]
+    next_frontier: List[str] = field(default_factory=list)
+    visited: VisitedSet = field(default_factory=set)
+    pages: int = 0
+
+    @classmethod
+    def start(
+            cls,
+            mode: str,
+            seed_url: str,
+            max_pages: int,
+            visited: Optional[VisitedSet] = None,
+    ) -> 'CrawlState':
+        """Return the state of a crawl that has not visited any page yet,
+        keeping track of the visited URLs in `visited` (an empty set by
+        default)."""
+        if visited is None:
+            visited = make_visited_set()
+        visited.add(seed_url)
+        return cls(mode, seed_url, max_pages, [seed_url], visited=visited)
+
+    @property
+    def done(self) -> bool:
+        return (self.pages >= self.max_pages or
+                (len(self.frontier) == 0 and len(self.next_frontier) == 0))
+
+
+def save_checkpoint(state: CrawlState, path: Path) -> None:
+    """
+    Write `state` to `path` atomically: a crash while saving leaves the
+    previous checkpoint intact.
+
+    A checkpoint is a gzip-compressed file: a JSON header line followed by
+    the frontier and the next frontier, one URL per line, then the visited
+    set: one URL per line for a `set`, or the raw bytes of a compact set.
+    """
+    path = Path(path)
+    header = {
+        'version': _CHECKPOINT_VERSION,
+        'mode': state.mode,
+        'seed_url': state.seed_url,
+        'max_pages': state.max_pages,
+        'pages': state.pages,
+        'frontier': len(state.frontier),
+        'next_frontier': len(state.next_frontier),
+    }
+    if isinstance(state.visited, CompactUrlSet):
+        visited_data = state.visited.to_bytes()
+        header['visited_set'] = state.visited.kind
+        header['visited_params'] = state.visited.params()
+        header['visited_bytes'] = len(visited_data)
+    else:
+        header['visited_set'] = 'exact'
+        header['visited'] = len(state.visited)
+
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as raw_file, \
+                gzip.open(raw_file, 'wb') as file:
+            file.write(json.dumps(header).encode() + b'\n')
+            _write_urls(file, state.frontier)
+            _write_urls(file, state.next_frontier)
+            if isinstance(state.visited, CompactUrlSet):
+                file.write(visited_data)
+            else:
+                _write_urls(file, state.visited)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_checkpoint(path: Path) -> CrawlState:
+    """Read a checkpoint written by `save_checkpoint`."""
+    with gzip.open(path, 'rb') as file:
+        header = json.loads(file.readline())
+        if header.get('version') != _CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {path}: "
+                             f"{header.get('version')}")
+        frontier = _read_urls(file, header['frontier'])
+        next_frontier = _read_urls(file, header['next_frontier'])
+        kind = header['visited_set']
+        if kind == 'exact':
+            visited = set(_read_urls(file, header['visited']))
+        else:
+            data = file.read(header['visited_bytes'])
+            if len(data) != header['visited_bytes']:
+                raise ValueError("Truncated checkpoint")
+            visited = visited_set_from_bytes(
+                kind, data, header['visited_params'])
+    return CrawlState(header['mode'], header['seed_url'], header['max_pages'],
+                      frontier, next_frontier, visited, header['pages'])
+
+
+class Checkpointer:
+    """Saves the state of a crawl to `path` every `every` pages."""
+
+    def __init__(self, path: Path, every: int = 100):
+        if every < 1:
+            raise ValueError(f"every must be positive, got {every}")
+        self.path = Path(path)
+        self.every = every
+
+    def page_visited(self, state: CrawlState) -> None:
+        """Save `state` if its page counter is a multiple of `every`."""
+        if state.pages % self.every == 0:
+            self.save(state)
+
+    def save(self, state: CrawlState) -> None:
+        save_checkpoint(state, self.path)
+
+
+def _write_urls(file: BinaryIO, urls) -> None:
+    for url in urls:
+        file.write(url.encode())
+        file.write(b'\n')
+
+
+def _read_urls(file: BinaryIO, count: int) -> List[str]:
+    urls = list()
+    for _ in range(count):
+        line = file.readline()
+        if not line.endswith(b'\n'):
+            raise ValueError("Truncated checkpoint")
+        urls.append(line[:-1].decode())
+    return urls
@@ -0,0 +1,439 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Cache keys are SHA-256 hex digests of the URL (see `utils._get_cache_key`)
+_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """
+    The links found on a page, when they were fetched, the validators
+    (`ETag` and `Last-Modified` response headers) to revalidate them with,
+    and the `content_hash` of the page they were parsed from, to tell
+    whether a page downloaded again has changed.
+    """
+    links: List[str]
+    fetched_at: float = field(default_factory=time.time)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    def is_stale(self, ttl: Optional[float], now: Optional[float] = None) \
+            -> bool:
+        """Return whether the entry is older than `ttl` seconds; entries
+        never go stale if `ttl` is None."""
+        if ttl is None:
+            return False
+        if now is None:
+            now = time.time()
+        return now - self.fetched_at > ttl
+
+    def refreshed(self, now: Optional[float] = None) -> 'CacheEntry':
+        """Return a copy of the entry marked as fetched at `now`."""
+        return replace(self, fetched_at=time.time() if now is None else now)
+
+    def revalidated(
+            self,
+            etag: Optional[str],
+            last_modified: Optional[str],
+            now: Optional[float] = None,
+    ) -> 'CacheEntry':
+        """Return a copy of the entry marked as fetched at `now` with new
+        validators, for a page downloaded again with the same content."""
+        return replace(self, fetched_at=time.time() if now is None else now,
+                       etag=etag, last_modified=last_modified)
+
+    @property
+    def size(self) -> int:
+        """Approximate number of bytes taken by the links."""
+        return sum(len(link) for link in self.links)
+
+
+def content_hash(body: bytes) -> str:
+    """Return the hash of a page's content stored in `CacheEntry`."""
+    return content_hasher(body).hexdigest()
+
+
+def content_hasher(body: bytes = b'') -> 'hashlib.blake2b':
+    """Return a hash object computing `content_hash` incrementally."""
+    return hashlib.blake2b(body, digest_size=16)
+
+
+def _join_links(links: List[str]) -> str:
+    return '\n'.join(links)
+
+
+def _split_links(content: str) -> List[str]:
+    return content.split('\n') if len(content) > 0 else list()
+
+
+class CacheBackend:
+    """
+    Storage for the crawler's link cache: maps a cache key to the
+    `CacheEntry` of the page it was computed from.
+    """
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry cached under `key`, or None."""
+        raise NotImplementedError("Override me")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        """Return a dict of the entry cached under each of `keys`,
+        leaving out the keys that are not cached."""
+        found = dict()
+        for key in keys:
+            entry = self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        """Cache `entry` under `key`, replacing any previous entry."""
+        raise NotImplementedError("Override me")
+
+    def put_many(self, items: Iterable[Tuple[str, CacheEntry]]) -> None:
+        """Cache each `(key, entry)` pair of `items`."""
+        for key, entry in items:
+            self.put(key, entry)
+
+    def keys(self) -> Iterator[str]:
+        """Iterate over the cached keys."""
+        raise NotImplementedError("Override me")
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryCache(CacheBackend):
+    """
+    The original cache layout: one file per key in `directory`, holding the
+    newline-separated links.  The file's modification time is the time the
+    links were fetched, and validators (if any) go to a `<key>.meta` file.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self.directory / key
+        try:
+            with open(path, 'r') as cache_file:
+                content = cache_file.read()
+            fetched_at = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        validators = dict()
+        try:
+            with open(self.directory / f'{key}.meta', 'r') as meta_file:
+                validators = json.load(meta_file)
+        except (OSError, ValueError):
+            pass
+        return CacheEntry(_split_links(content), fetched_at,
+                          validators.get('etag'),
+                          validators.get('last_modified'),
+                          validators.get('content_hash'))
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        meta_path = self.directory / f'{key}.meta'
+        if (entry.etag is not None or entry.last_modified is not None or
+                entry.content_hash is not None):
+            self._write_atomically(meta_path, json.dumps({
+                'etag': entry.etag,
+                'last_modified': entry.last_modified,
+                'content_hash': entry.content_hash,
+            }))
+        else:
+            try:
+                os.unlink(meta_path)
+            except OSError:
+                pass
+
+        path = self.directory / key
+        if self._write_atomically(path, _join_links(entry.links)):
+            try:
+                os.utime(path, (entry.fetched_at, entry.fetched_at))
+            except OSError:
+                pass
+
+    def _write_atomically(self, path: Path, content: str) -> bool:
+        # Write to a temporary file first so that readers never see a
+        # partially written entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as cache_file:
+                cache_file.write(content)
+            os.replace(temp_path, path)
+            return True
+        except OSError:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+
+    def keys(self) -> Iterator[str]:
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and _KEY_PATTERN.fullmatch(entry.name):
+                yield entry.name
+
+    def remove(self, key: str) -> None:
+        for path in (self.directory / key, self.directory / f'{key}.meta'):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class SQLiteCache(CacheBackend):
+    """
+    A single-file cache stored in an SQLite database at `path`.
+
+    Lookups are index probes in one open file rather than an open/stat/close
+    per URL, and `get_many` answers a whole frontier with a few queries.
+    Every write is its own transaction, so entries are updated atomically.
+    The connection is shared between threads behind a lock.
+
+    Like a `DirectoryCache` whose files cannot be read or written, a
+    database that cannot be opened or is locked, corrupt or removed makes
+    lookups miss and writes be skipped, rather than failing the crawl.
+    """
+
+    # Number of keys per `SELECT ... IN (...)` query; well under SQLite's
+    # limit on the number of query parameters
+    BATCH_SIZE = 500
+
+    # Columns added after the first version of the schema
+    _COLUMNS = {
+        'fetched_at': 'REAL NOT NULL DEFAULT 0',
+        'etag': 'TEXT',
+        'last_modified': 'TEXT',
+        'content_hash': 'TEXT',
+    }
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        connection = None
+        try:
+            connection = sqlite3.connect(
+                str(self.path), check_same_thread=False,
+                isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS links ('
+                'key TEXT PRIMARY KEY, content TEXT NOT NULL) WITHOUT ROWID')
+            columns = {row[1] for row in
+                       connection.execute('PRAGMA table_info(links)')}
+            for name, definition in self._COLUMNS.items():
+                if name not in columns:
+                    connection.execute(
+                        f'ALTER TABLE links ADD COLUMN {name} {definition}')
+            self._connection = connection
+        except sqlite3.Error:
+            # Unusable database: every lookup misses
+            if connection is not None:
+                connection.close()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        if self._connection is None:
+            return None
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    'SELECT content, fetched_at, etag, last_modified, '
+                    'content_hash FROM links WHERE key = ?',
+                    (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return self._to_entry(row) if row is not None else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        keys = list(keys)
+        found = dict()
+        if self._connection is None:
+            return found
+        with self._lock:
+            for i in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[i:i + self.BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                try:
+                    rows = self._connection.execute(
+                        f'SELECT key, content, fetched_at, etag, '
+                        f'last_modified, content_hash FROM links '
+                        f'WHERE key IN ({placeholders})', batch).fetchall()
+                except sqlite3.Error:
+                    # The keys of this batch miss
+                    continue
+                for row in rows:
+                    found[row[0]] = self._to_entry(row[1:])
+        return found
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        self.put_many([(key, entry)])
+
+    def put_many(self, items: Iterable[Tuple[str, CacheEntry]]) -> None:
+        rows = [(key, _join_links(entry.links), entry.fetched_at,
+                 entry.etag, entry.last_modified, entry.content_hash)
+                for key, entry in items]
+        if self._connection is None:
+            return
+        try:
+            with self._lock, self._connection:
+                # The connection is in autocommit mode, so open the
+                # transaction that `with self._connection` commits (or rolls
+                # back)
+                self._connection.execute('BEGIN')
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO links '
+                    '(key, content, fetched_at, etag, last_modified, '
+                    'content_hash) VALUES (?, ?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error:
+            # Skip the write, as a `DirectoryCache` that cannot write does
+            pass
+
+    def keys(self) -> Iterator[str]:
+        if self._connection is None:
+            return iter(())
+        with self._lock:
+            keys = [row[0] for row in
+                    self._connection.execute('SELECT key FROM links')]
+        return iter(keys)
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _to_entry(row: tuple) -> CacheEntry:
+        content, fetched_at, etag, last_modified, content_hash = row
+        return CacheEntry(_split_links(content), fetched_at, etag,
+                          last_modified, content_hash)
+
+
+@dataclass(frozen=True)
+class RecrawlStats:
+    """What the downloads of a crawl found, compared with the cache: see
+    `utils.recrawl_stats`."""
+    not_modified: int
+    unchanged: int
+    changed: int
+    new: int
+
+    def __str__(self) -> str:
+        return (f"{self.not_modified} not modified (304), {self.unchanged} "
+                f"downloaded but unchanged, {self.changed} changed, "
+                f"{self.new} new pages; {self.changed + self.new} parsed")
+
+
+@dataclass(frozen=True)
+class LRUStats:
+    """Counters of an `LRUCache`."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups > 0 else 0.0
+        return (f"{self.hits} hits, {self.misses} misses "
+                f"({hit_rate:.1%} hit rate), {self.evictions} evictions, "
+                f"{self.entries} entries ({self.bytes} bytes)")
+
+
+class LRUCache:
+    """
+    A bounded in-memory cache of `CacheEntry`s, evicting the least recently
+    used entries once it holds more than `max_entries` entries or more than
+    `max_bytes` bytes of links.  Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._bytes -= old_entry.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while (len(self._entries) > self.max_entries or
+                   self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> LRUStats:
+        with self._lock:
+            return LRUStats(self.hits, self.misses, self.evictions,
+                            len(self._entries), self._bytes)
+
+
+def migrate_directory_cache(
+        source: DirectoryCache,
+        destination: CacheBackend,
+        remove: bool = True,
+        batch_size: int = 1000,
+) -> int:
+    """Copy every entry of the directory cache `source` to `destination`,
+    removing the copied files unless `remove` is False.  Return the number
+    of entries migrated; entries that `destination` failed to store are
+    kept in `source`."""
+    migrated = 0
+    keys = list(source.keys())
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i:i + batch_size]
+        items: List[Tuple[str, CacheEntry]] = list()
+        for key in batch:
+            entry = source.get(key)
+            if entry is not None:
+                items.append((key, entry))
+        destination.put_many(items)
+        stored = destination.get_many(key for key, _ in items)
+        migrated += len(stored)
+        if remove:
+            for key in stored:
+                source.remove(key)
+    return migrated
@@ -0,0 +1,255 @@
+import bisect
+import json
+import threading
+import time
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bounds of the buckets of the latency histograms, in seconds (the
+# default buckets of the Prometheus client libraries)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+# Outcomes of a cache lookup: fresh entry used as is, stale entry
+# revalidated with a conditional request, or no entry
+CACHE_RESULTS = ('hit', 'stale', 'miss')
+
+
+class Histogram:
+    """Counts observations in cumulative buckets, as Prometheus
+    histograms do."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Observations in each bucket, not cumulated; the last one is +Inf
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """Return the (upper bound, number of observations up to it) pairs,
+        ending with +Inf."""
+        counts = list()
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self._counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+class TimedChunks:
+    """Iterates over `chunks`, counting their bytes and the seconds spent
+    waiting for them, e.g. to tell downloading from parsing when a page is
+    parsed as it streams in."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        start = time.perf_counter()
+        try:
+            chunk = next(self._chunks)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.bytes += len(chunk)
+        return chunk
+
+
+class CrawlMetrics:
+    """
+    Instrumentation of a crawl: where each page came from (cache or
+    network), how long it took to fetch, download and parse, how many bytes
+    it was, and the size of the frontier and the crawl rate as pages are
+    visited.
+
+    With `events`, every fetch, parse and visit is also written to it as a
+    JSON line with the seconds `elapsed` since the metrics were created, to
+    trace a crawl over time; `prometheus_text` returns a snapshot of the
+    totals in the Prometheus text format.  Safe to use from several
+    threads.
+    """
+
+    def __init__(self, events: Optional[IO[str]] = None):
+        self.events = events
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.pages = 0
+        self.frontier_size: Optional[int] = None
+        self.bytes_downloaded = 0
+        self.cache_lookups: Dict[str, int] = dict.fromkeys(CACHE_RESULTS, 0)
+        # Response status (or 'error' if the request failed) -> count
+        self.fetches: Dict[str, int] = dict()
+        # Until the response headers, including rate limits and retries
+        self.fetch_seconds = Histogram()
+        # Reading the body
+        self.download_seconds = Histogram()
+        self.parse_seconds = Histogram()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def record_cache_hit(self, url: str) -> None:
+        """Record that `url` was answered from the cache without a
+        request."""
+        with self._lock:
+            self.cache_lookups['hit'] += 1
+            self._emit('fetch', url=url, cache='hit')
+
+    def record_fetch(
+            self,
+            url: str,
+            status: Optional[int],
+            cache: str,
+            fetch_seconds: float,
+            download_seconds: float = 0.0,
+            parse_seconds: Optional[float] = None,
+            num_bytes: int = 0,
+    ) -> None:
+        """Record a request for `url`, made because its cache lookup was a
+        `'stale'` entry or a `'miss'`; `status` is None if it failed.
+        `parse_seconds` is None if the page was not parsed along with the
+        download (see `record_parse`)."""
+        with self._lock:
+            self.cache_lookups[cache] += 1
+            key = 'error' if status is None else str(status)
+            self.fetches[key] = self.fetches.get(key, 0) + 1
+            self.bytes_downloaded += num_bytes
+            self.fetch_seconds.observe(fetch_seconds)
+            if num_bytes > 0:
+                self.download_seconds.observe(download_seconds)
+            if parse_seconds is not None:
+                self.parse_seconds.observe(parse_seconds)
+            self._emit('fetch', url=url, cache=cache, status=status,
+                       fetch_seconds=round(fetch_seconds, 6),
+                       download_seconds=round(download_seconds, 6),
+                       parse_seconds=(None if parse_seconds is None
+                                      else round(parse_seconds, 6)),
+                       bytes=num_bytes)
+
+    def record_parse(self, url: str, parse_seconds: float) -> None:
+        """Record the parse of a page downloaded separately."""
+        with self._lock:
+            self.parse_seconds.observe(parse_seconds)
+            self._emit('parse', url=url,
+                       parse_seconds=round(parse_seconds, 6))
+
+    def record_visit(self, url: str, frontier_size: Optional[int] = None) \
+            -> None:
+        """Record the visit of `url`, with the number of URLs then left on
+        the frontier if the crawl loop knows it."""
+        with self._lock:
+            self.pages += 1
+            if frontier_size is not None:
+                self.frontier_size = frontier_size
+            self._emit('visit', url=url, pages=self.pages,
+                       frontier_size=frontier_size,
+                       pages_per_second=round(self._pages_per_second(), 3))
+
+    def summary(self) -> dict:
+        """Return the totals, as written in the last JSON line by
+        `close`."""
+        with self._lock:
+            return self._summary()
+
+    def close(self) -> None:
+        """Write the totals as a `summary` event, if events are written."""
+        with self._lock:
+            if self.events is not None:
+                self._emit('summary', **self._summary())
+                self.events.flush()
+
+    def prometheus_text(self) -> str:
+        """Return a snapshot of the totals in the Prometheus text
+        exposition format."""
+        lines: List[str] = list()
+
+        def metric(name: str, kind: str, help_text: str,
+                   samples: Iterable[Tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        def histogram(name: str, help_text: str, values: Histogram) -> None:
+            samples = [(f'_bucket{{le="{_format_value(bound)}"}}', count)
+                       for bound, count in values.cumulative_counts()]
+            samples += [('_sum', values.sum), ('_count', values.count)]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for suffix, value in samples:
+                lines.append(f"{name}{suffix} {_format_value(value)}")
+
+        with self._lock:
+            metric('crawler_pages_visited_total', 'counter',
+                   "Pages visited.", [('', self.pages)])
+            metric('crawler_pages_per_second', 'gauge',
+                   "Pages visited per second since the crawl started.",
+                   [('', self._pages_per_second())])
+            if self.frontier_size is not None:
+                metric('crawler_frontier_size', 'gauge',
+                       "URLs left on the frontier at the last visit.",
+                       [('', self.frontier_size)])
+            metric('crawler_cache_lookups_total', 'counter',
+                   "Link cache lookups, by result.",
+                   [(f'{{result="{result}"}}', count)
+                    for result, count in self.cache_lookups.items()])
+            metric('crawler_fetches_total', 'counter',
+                   "Requests sent for pages, by response status.",
+                   [(f'{{status="{status}"}}', count)
+                    for status, count in sorted(self.fetches.items())])
+            metric('crawler_downloaded_bytes_total', 'counter',
+                   "Bytes of pages downloaded.",
+                   [('', self.bytes_downloaded)])
+            histogram('crawler_fetch_seconds',
+                      "Seconds until the response headers of a page, "
+                      "including rate limits and retries.",
+                      self.fetch_seconds)
+            histogram('crawler_download_seconds',
+                      "Seconds spent reading the body of a page.",
+                      self.download_seconds)
+            histogram('crawler_parse_seconds',
+                      "Seconds spent parsing a page.", self.parse_seconds)
+        return '\n'.join(lines) + '\n'
+
+    def _pages_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.pages / elapsed if elapsed > 0 else 0.0
+
+    def _summary(self) -> dict:
+        return {
+            'pages': self.pages,
+            'elapsed': round(self.elapsed, 6),
+            'pages_per_second': round(self._pages_per_second(), 3),
+            'cache_lookups': dict(self.cache_lookups),
+            'fetches': dict(self.fetches),
+            'bytes': self.bytes_downloaded,
+            'fetch_seconds': round(self.fetch_seconds.sum, 6),
+            'download_seconds': round(self.download_seconds.sum, 6),
+            'parse_seconds': round(self.parse_seconds.sum, 6),
+        }
+
+    def _emit(self, event: str, **fields) -> None:
+        # Called with the lock held, so that lines are never interleaved
+        if self.events is None:
+            return
+        record = {'event': event, 'elapsed': round(self.elapsed, 6)}
+        record.update(fields)
+        self.events.write(json.dumps(record) + '\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
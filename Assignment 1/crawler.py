@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
 
 
 def main() -> None:
@@ -24,6 +25,23 @@ def main() -> None:
         description="Run the crawler using depth-first search, "
                     "starting from the SEED_URL.",
     )
+    resume_parser = subparsers.add_parser(
+        'resume',
+        help="Continue an interrupted crawl from its checkpoint",
+        description="Continue a crawl started with --checkpoint from the "
+                    "state saved in CHECKPOINT, and keep checkpointing to it.",
+    )
+    migrate_cache_parser = subparsers.add_parser(
+        'migrate-cache',
+        help="Move a one-file-per-URL cache into the SQLite cache",
+        description="Move the entries of the crawler's one-file-per-URL "
+                    "cache directory into the single-file SQLite cache.",
+    )
+    migrate_cache_parser.add_argument(
+        '--keep',
+        action='store_true',
+        help="Keep the original cache files after copying them",
+    )
     clean_cache_parser = subparsers.add_parser(
         'clean-cache',
         help="Clean the crawler's cache (does not run the crawler)",
@@ -40,16 +58,265 @@ def main() -> None:
         metavar="SEED_URL",
         help="The seed URL",
     )
+    resume_parser.add_argument(
+        'checkpoint',
+        metavar="CHECKPOINT",
+        help="The checkpoint file",
+    )
+    for crawl_parser in (bfs_parser, dfs_parser):
+        crawl_parser.add_argument(
+            '--checkpoint',
+            metavar="PATH",
+            help="Periodically save the crawl state to PATH, so that "
+                 "the crawl can be resumed if interrupted",
+        )
+        crawl_parser.add_argument(
+            '--visited-set',
+            choices=('exact', 'hashed', 'bloom'),
+            default='exact',
+            help="Remember visited URLs as strings, as 64-bit hashes, or in "
+                 "a Bloom filter, which may skip a few unvisited URLs "
+                 "(default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--bloom-capacity',
+            type=int,
+            default=1_000_000,
+            metavar="N",
+            help="Size the Bloom filter for N URLs (default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--bloom-fp-rate',
+            type=float,
+            default=0.001,
+            metavar="RATE",
+            help="False positive rate of the Bloom filter "
+                 "(default: %(default)s)",
+        )
+    for crawl_parser in (bfs_parser, dfs_parser, resume_parser):
+        crawl_parser.add_argument(
+            '--checkpoint-every',
+            type=int,
+            default=100,
+            metavar="N",
+            help="Save the checkpoint every N pages (default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--concurrency',
+            type=int,
+            metavar="N",
+            help="Download up to N pages at once (visit order is unchanged)",
+        )
+        crawl_parser.add_argument(
+            '--parse-processes',
+            type=int,
+            metavar="N",
+            help="With --concurrency, parse pages in N worker processes "
+                 "while downloads continue",
+        )
+        crawl_parser.add_argument(
+            '--scheme',
+            choices=('https', 'http'),
+            default='https',
+            help="Scheme of the crawled URLs, e.g. http for the local "
+                 "stand-in server of fixture_server.py "
+                 "(default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--max-connections-per-host',
+            type=int,
+            default=10,
+            metavar="N",
+            help="Keep at most N connections open to a single host "
+                 "(default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30.0,
+            metavar="SECONDS",
+            help="Give up on a page after SECONDS without a response "
+                 "(default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--min-delay',
+            type=float,
+            default=0.0,
+            metavar="SECONDS",
+            help="Wait at least SECONDS between two requests to the same host "
+                 "(default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=3,
+            metavar="N",
+            help="Retry a page up to N times after a timeout, a connection "
+                 "error or a 429/5xx response (default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--use-robots',
+            action='store_true',
+            help="Fetch each host's robots.txt and honor its Crawl-delay",
+        )
+        crawl_parser.add_argument(
+            '--obey-robots',
+            action='store_true',
+            help="Fetch each host's robots.txt, honor its Crawl-delay and "
+                 "skip the pages it disallows",
+        )
+        crawl_parser.add_argument(
+            '--cache-backend',
+            choices=('sqlite', 'directory'),
+            default='sqlite',
+            help="Store the link cache in a single SQLite file or in one file "
+                 "per URL (default: %(default)s)",
+        )
+        crawl_parser.add_argument(
+            '--cache-ttl',
+            type=float,
+            metavar="SECONDS",
+            help="Revalidate cached pages older than SECONDS with the server "
+                 "(default: cached pages never expire)",
+        )
+        crawl_parser.add_argument(
+            '--recrawl',
+            action='store_true',
+            help="Refresh a previous crawl: revalidate every cached page, "
+                 "only parse the pages whose content changed, and print "
+                 "what changed",
+        )
+        crawl_parser.add_argument(
+            '--cache-stats',
+            action='store_true',
+            help="Print in-memory cache statistics after crawling",
+        )
+        crawl_parser.add_argument(
+            '--pool-stats',
+            action='store_true',
+            help="Print connection reuse statistics after crawling",
+        )
+        crawl_parser.add_argument(
+            '--politeness-stats',
+            action='store_true',
+            help="Print retry and rate limiting statistics after crawling",
+        )
+        crawl_parser.add_argument(
+            '--metrics',
+            metavar="PATH",
+            help="Record fetch latency, parse time, bytes, cache hits, "
+                 "frontier size and crawl rate to PATH ('-': standard "
+                 "output)",
+        )
+        crawl_parser.add_argument(
+            '--metrics-format',
+            choices=('jsonl', 'prometheus'),
+            default='jsonl',
+            help="Write an event per fetch and visit as JSON lines, or a "
+                 "Prometheus text snapshot of the totals when the crawl "
+                 "stops (default: %(default)s)",
+        )
 
     args = parser.parse_args()
 
+    import utils
+
+    crawling = args.action in ('bfs', 'dfs', 'resume')
+    if (crawling and args.parse_processes is not None and
+            args.concurrency is None):
+        parser.error("--parse-processes requires --concurrency")
+    if crawling:
+        utils.configure_crawl(default_scheme=args.scheme)
+        utils.configure_session(
+            max_connections_per_host=args.max_connections_per_host,
+            timeout=args.timeout,
+        )
+        utils.configure_politeness(
+            min_delay=args.min_delay,
+            max_retries=args.max_retries,
+            use_robots=args.use_robots,
+            obey_robots=args.obey_robots,
+        )
+        utils.configure_cache(args.cache_backend,
+                              ttl=0.0 if args.recrawl else args.cache_ttl)
+
+    metrics_file = None
+    if crawling and args.metrics is not None:
+        metrics_file = (sys.stdout if args.metrics == '-'
+                        else open(args.metrics, 'w', encoding='utf-8'))
+        utils.configure_metrics(
+            events=metrics_file if args.metrics_format == 'jsonl' else None)
+
+    try:
+        _crawl(args)
+    finally:
+        if metrics_file is not None:
+            metrics = utils.crawl_metrics()
+            if args.metrics_format == 'prometheus':
+                metrics_file.write(metrics.prometheus_text())
+            metrics.close()
+            if metrics_file is not sys.stdout:
+                metrics_file.close()
+
+    if crawling and args.pool_stats:
+        print(f"Connection pool: {utils.session_stats()}", file=sys.stderr)
+    if crawling and args.politeness_stats:
+        print(f"Politeness: {utils.politeness_stats()}", file=sys.stderr)
+    if crawling and args.cache_stats:
+        print(f"Memory cache: {utils.cache_stats()}", file=sys.stderr)
+    if crawling and args.recrawl:
+        print(f"Recrawl: {utils.recrawl_stats()}", file=sys.stderr)
+
+
+def _crawl(args: argparse.Namespace) -> None:
     import submission
     import utils
 
-    if args.action == 'bfs':
+    crawling = args.action in ('bfs', 'dfs', 'resume')
+    # Only the crawler of `async_crawler` knows the size of its frontier
+    if crawling and (args.action == 'resume' or
+                     args.concurrency is not None or
+                     args.checkpoint is not None or
+                     args.visited_set != 'exact' or
+                     args.metrics is not None):
+        import functools
+
+        from async_crawler import AsyncCrawler
+        from checkpoint import Checkpointer, load_checkpoint
+        from visited_set import make_visited_set
+
+        checkpointer = None
+        if args.checkpoint is not None:
+            checkpointer = Checkpointer(args.checkpoint, args.checkpoint_every)
+        make_visited = make_visited_set
+        if args.action != 'resume':
+            make_visited = functools.partial(
+                make_visited_set, args.visited_set,
+                args.bloom_capacity, args.bloom_fp_rate)
+        crawler = AsyncCrawler(concurrency=args.concurrency or 1,
+                               parse_processes=args.parse_processes,
+                               checkpointer=checkpointer,
+                               make_visited=make_visited)
+        try:
+            if args.action == 'resume':
+                crawler.resume(load_checkpoint(args.checkpoint))
+            elif args.action == 'bfs':
+                crawler.bfs(args.seed_url)
+            else:
+                crawler.dfs(args.seed_url)
+        except KeyboardInterrupt:
+            if checkpointer is not None:
+                print(f"Interrupted; resume with: "
+                      f"{sys.argv[0]} resume {args.checkpoint}",
+                      file=sys.stderr)
+            raise
+    elif args.action == 'bfs':
         submission.crawler_bfs(args.seed_url)
     elif args.action == 'dfs':
         submission.crawler_dfs(args.seed_url)
+    elif args.action == 'migrate-cache':
+        migrated = utils.migrate_cache(remove=not args.keep)
+        print(f"Migrated {migrated} cache entries")
     elif args.action == 'clean-cache':
         utils.clean_cache_dir()
 
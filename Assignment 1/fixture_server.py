@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, List, Optional
+
+
+def page_links(page: int, num_pages: int, links_per_page: int) -> List[str]:
+    """Return the hrefs found on `page` of the synthetic site.
+
+    Every page links back to the index and to `links_per_page` other pages
+    spread across the site, using a mix of the href styles the crawler has to
+    normalize (root-relative, trailing slashes, fragments and queries)."""
+    hrefs = ['/']
+    for i in range(1, links_per_page + 1):
+        target = (page * links_per_page + i * 7919) % num_pages
+        style = i % 4
+        if style == 0:
+            hrefs.append(f'/page/{target}')
+        elif style == 1:
+            hrefs.append(f'/page/{target}/')
+        elif style == 2:
+            hrefs.append(f'/page/{target}#section-{i}')
+        else:
+            hrefs.append(f'/page/{target}?ref={page}')
+    return hrefs
+
+
+def page_revision(page: int, revision: int, change_rate: float) -> int:
+    """Return the last revision of the site, up to `revision`, in which
+    `page` changed; each revision changes a random `change_rate` of the
+    pages."""
+    for r in range(revision, 0, -1):
+        if random.Random(f'{page}:{r}').random() < change_rate:
+            return r
+    return 0
+
+
+def render_page(
+        page: int,
+        num_pages: int,
+        links_per_page: int,
+        revision: int = 0,
+) -> str:
+    """Render `page` of the synthetic site as an HTML document, as of the
+    revision of the site that last changed it."""
+    items = "\n".join(
+        f'<li><a href="{href}">Link {i}</a></li>'
+        for i, href in enumerate(page_links(page, num_pages, links_per_page))
+    )
+    return (f"<!DOCTYPE html>\n<html><head><title>Page {page}</title></head>\n"
+            f"<body><h1>Page {page}</h1>\n<p>Revision {revision}</p>\n"
+            f"<ul>\n{items}\n</ul></body></html>\n")
+
+
+def make_server(
+        host: str = '127.0.0.1',
+        port: int = 0,
+        num_pages: int = 1000,
+        links_per_page: int = 10,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        crawl_delay: Optional[float] = None,
+        seed: int = 0,
+        etags: bool = True,
+        revision: int = 0,
+        change_rate: float = 0.0,
+) -> ThreadingHTTPServer:
+    """Create (but do not start) a server for a synthetic site of `num_pages`
+    pages, each answered after sleeping `latency` seconds to simulate the
+    network.  Pages carry an `ETag` and honor `If-None-Match`, unless
+    `etags` is False.
+
+    The site is at its `revision`, each of which changed a random
+    `change_rate` of the pages (see `page_revision`), to test recrawls.
+
+    A random `failure_rate` of the page requests are answered with
+    `503 Service Unavailable`, as an overloaded server would.  With a
+    `crawl_delay`, the site has a robots.txt asking for it.
+    Pass `port=0` to pick any free port."""
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Send headers and body in one segment, so keep-alive clients are not
+        # held up by Nagle's algorithm and delayed ACKs
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            path = self.path.split('?', 1)[0].rstrip('/')
+            if path == '/robots.txt':
+                self.send_robots()
+                return
+            if path == '':
+                page = 0
+            elif path.startswith('/page/') and path[6:].isdigit():
+                page = int(path[6:])
+            else:
+                page = -1
+
+            if latency > 0:
+                time.sleep(latency)
+            with rng_lock:
+                failed = failure_rate > 0 and rng.random() < failure_rate
+
+            if failed:
+                body = b'Service unavailable'
+                self.send_response(503)
+                self.send_header('Content-Type', 'text/plain')
+            elif 0 <= page < num_pages:
+                body = render_page(
+                    page, num_pages, links_per_page,
+                    page_revision(page, revision, change_rate)).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if etags and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if etags:
+                    self.send_header('ETag', etag)
+            else:
+                body = b'Not found'
+                self.send_response(404)
+                self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_robots(self) -> None:
+            if crawl_delay is None:
+                body = b'Not found'
+                self.send_response(404)
+            else:
+                body = f'User-agent: *\nCrawl-delay: {crawl_delay:g}\n'.encode()
+                self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+@contextlib.contextmanager
+def serve_in_thread(**kwargs) -> Iterator[str]:
+    """Run a stand-in server (see `make_server`) on a background thread and
+    yield its base URL, e.g. `http://127.0.0.1:54321`."""
+    server = make_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f'http://{host}:{port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def record_visits(crawl: Callable[[str], None], seed_url: str) -> List[str]:
+    """Run one of the `submission` crawlers, recording the URLs it visits,
+    e.g. to check that another crawler visits the stand-in site in the same
+    order."""
+    import submission
+    import utils
+
+    visited = list()
+    visit_url = submission.visit_url
+
+    def recording_visit_url(url: str) -> List[str]:
+        visited.append(utils._normalize_url(url))
+        return visit_url(url)
+
+    submission.visit_url = recording_visit_url
+    try:
+        crawl(seed_url)
+    finally:
+        submission.visit_url = visit_url
+    return visited
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve a synthetic website locally, so that the crawler "
+                    "can be exercised without the network.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('--host', default='127.0.0.1', help="Host to bind")
+    parser.add_argument('--port', type=int, default=8000, help="Port to bind")
+    parser.add_argument(
+        '--pages', type=int, default=1000, help="Number of pages on the site")
+    parser.add_argument(
+        '--links', type=int, default=10, help="Number of links on each page")
+    parser.add_argument(
+        '--latency', type=float, default=0.05,
+        help="Seconds to wait before answering each request")
+    parser.add_argument(
+        '--failure-rate', type=float, default=0.0,
+        help="Fraction of the requests answered with 503")
+    parser.add_argument(
+        '--crawl-delay', type=float,
+        help="Crawl-delay to ask for in robots.txt, in whole seconds "
+             "(default: no robots.txt)")
+    parser.add_argument(
+        '--no-etags', action='store_true',
+        help="Send pages without an ETag, so they cannot be revalidated")
+    parser.add_argument(
+        '--revision', type=int, default=0,
+        help="Serve this revision of the site, to test recrawls")
+    parser.add_argument(
+        '--change-rate', type=float, default=0.1,
+        help="Fraction of the pages changed by each revision")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.pages, args.links,
+                         args.latency, args.failure_rate, args.crawl_delay,
+                         etags=not args.no_etags, revision=args.revision,
+                         change_rate=args.change_rate)
+    print(f"Serving {args.pages} pages on "
+          f"http://{args.host}:{server.server_address[1]}")
+    print(f"Crawl it with: crawler.py bfs --scheme http "
+          f"http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
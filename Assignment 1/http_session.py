@@ -0,0 +1,112 @@
+import threading
+from dataclasses import dataclass
+from typing import Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Seconds to wait for a connection to be established / for the server to send
+# data; a single number applies to both (see `requests` "Timeouts")
+Timeout = Union[float, Tuple[float, float]]
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Connection pool counters of a `PooledSession`."""
+    requests: int
+    connections_opened: int
+
+    @property
+    def connections_reused(self) -> int:
+        """Number of requests sent over an already open connection."""
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def handshakes_avoided(self) -> int:
+        """Number of TCP/TLS handshakes saved compared to opening a new
+        connection for every request (as a bare `requests.get` does)."""
+        return self.connections_reused
+
+    def __str__(self) -> str:
+        return (f"{self.requests} requests over {self.connections_opened} "
+                f"connections ({self.connections_reused} reused, "
+                f"{self.handshakes_avoided} handshakes avoided)")
+
+
+class _CountingAdapter(HTTPAdapter):
+    """An `HTTPAdapter` that remembers the counters of the connection pools
+    it discards, so that `PooledSession.stats` covers every host visited."""
+
+    def __init__(self, *args, **kwargs):
+        self._lock = threading.Lock()
+        self.retired_requests = 0
+        self.retired_connections = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def retire(pool) -> None:
+            with self._lock:
+                self.retired_requests += pool.num_requests
+                self.retired_connections += pool.num_connections
+            if dispose is not None:
+                dispose(pool)
+
+        pools.dispose_func = retire
+
+    def stats(self) -> PoolStats:
+        pools = self.poolmanager.pools
+        with self._lock:
+            num_requests = self.retired_requests
+            num_connections = self.retired_connections
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                num_requests += pool.num_requests
+                num_connections += pool.num_connections
+        return PoolStats(num_requests, num_connections)
+
+
+class PooledSession:
+    """
+    A `requests.Session` whose keep-alive connections are pooled per host,
+    so that consecutive requests to the same site reuse a handful of sockets
+    instead of paying a TCP/TLS handshake each.
+
+    - `max_connections_per_host`: Upper bound on the connections open to a
+      single host; requests beyond it wait for a connection to be returned.
+    - `max_hosts`: Number of hosts whose pools are kept around.
+    - `timeout`: Default timeout of every request (see `Timeout`).
+    """
+
+    def __init__(
+            self,
+            max_connections_per_host: int = 10,
+            max_hosts: int = 10,
+            timeout: Timeout = (10.0, 30.0),
+    ):
+        if max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be positive, "
+                             f"got {max_connections_per_host}")
+        self.timeout = timeout
+        self._adapter = _CountingAdapter(
+            pool_connections=max_hosts,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+        )
+        self._session = requests.Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session.get(url, **kwargs)
+
+    def stats(self) -> PoolStats:
+        return self._adapter.stats()
+
+    def close(self) -> None:
+        self._session.close()
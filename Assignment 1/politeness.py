@@ -0,0 +1,276 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from http_session import PooledSession
+
+# Response statuses worth retrying: the server is overloaded or throttling us,
+# or a gateway in front of it failed
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class DisallowedByRobots(requests.exceptions.RequestException):
+    """Raised instead of requesting a URL that the site's robots.txt
+    disallows."""
+
+
+@dataclass(frozen=True)
+class PolitenessStats:
+    """Counters of a `PoliteScheduler`."""
+    requests: int
+    retries: int
+    failures: int
+    disallowed: int
+    robots_fetched: int
+    seconds_waited: float
+
+    def __str__(self) -> str:
+        return (f"{self.requests} requests, {self.retries} retries, "
+                f"{self.failures} failed pages, {self.disallowed} disallowed "
+                f"by robots.txt ({self.robots_fetched} fetched), "
+                f"{self.seconds_waited:.1f}s waited for rate limits")
+
+
+class HostRateLimiter:
+    """
+    Spaces the requests to each host by at least an interval.  Every caller
+    reserves the next free slot of the host, then sleeps outside of the lock
+    until then, so concurrent threads are served one interval apart.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Host -> monotonic time of its next free slot
+        self._next_slot: Dict[str, float] = dict()
+
+    def wait(self, host: str, interval: float) -> float:
+        """Wait for the next slot of `host`, reserve the following one
+        `interval` seconds later, and return the number of seconds slept."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    def defer(self, host: str, seconds: float) -> None:
+        """Hold every request to `host` for at least `seconds`, e.g. after
+        the host asked to slow down."""
+        with self._lock:
+            not_before = time.monotonic() + seconds
+            if self._next_slot.get(host, 0.0) < not_before:
+                self._next_slot[host] = not_before
+
+
+class RobotsCache:
+    """
+    The parsed robots.txt of each site, downloaded on first use and kept for
+    `ttl` seconds.  A site whose robots.txt is missing or cannot be
+    downloaded allows everything, without a crawl delay.
+    """
+
+    def __init__(self, user_agent: str = '*', ttl: float = 24 * 3600.0):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.fetched = 0
+        self._lock = threading.Lock()
+        # Origin -> (parser, monotonic time it was fetched)
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], float]] = \
+            dict()
+        # Origin -> lock held while its robots.txt is downloaded
+        self._fetch_locks: Dict[str, threading.Lock] = dict()
+
+    def get(self, session: PooledSession, url: str) \
+            -> Optional[RobotFileParser]:
+        """Return the robots.txt rules of the site of `url`, or None if it
+        has none."""
+        parsed = urlparse(url)
+        origin = f'{parsed.scheme}://{parsed.netloc}'
+        robots = self._lookup(origin)
+        if robots is not None:
+            return robots[0]
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(origin, threading.Lock())
+        with fetch_lock:
+            # Another thread may have fetched it while we waited
+            robots = self._lookup(origin)
+            if robots is None:
+                robots = (self._fetch(session, origin), time.monotonic())
+                with self._lock:
+                    self._robots[origin] = robots
+                    self.fetched += 1
+        return robots[0]
+
+    def _lookup(self, origin: str) \
+            -> Optional[Tuple[Optional[RobotFileParser], float]]:
+        with self._lock:
+            robots = self._robots.get(origin)
+        if robots is None or time.monotonic() - robots[1] > self.ttl:
+            return None
+        return robots
+
+    @staticmethod
+    def _fetch(session: PooledSession, origin: str) \
+            -> Optional[RobotFileParser]:
+        try:
+            with session.get(f'{origin}/robots.txt') as r:
+                if r.status_code != 200:
+                    return None
+                text = r.text
+        except requests.exceptions.RequestException:
+            return None
+        parser = RobotFileParser(f'{origin}/robots.txt')
+        parser.parse(text.splitlines())
+        return parser
+
+    def crawl_delay(self, robots: Optional[RobotFileParser]) -> float:
+        """Return the seconds to wait between requests to a site with the
+        rules `robots`, from its `Crawl-delay` or `Request-rate`."""
+        if robots is None:
+            return 0.0
+        delay = robots.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = robots.request_rate(self.user_agent)
+        if rate is not None and rate.requests > 0:
+            return rate.seconds / rate.requests
+        return 0.0
+
+
+class PoliteScheduler:
+    """
+    Sends the crawler's requests politely:
+    - Requests to a host are spaced by at least `min_delay` seconds, or by
+      the `Crawl-delay` of its robots.txt if longer (with `use_robots`;
+      robots.txt is not fetched by default).
+    - With `obey_robots` (which implies `use_robots`), URLs disallowed by
+      robots.txt are not requested.
+    - Connection errors, timeouts and `RETRYABLE_STATUSES` are retried up to
+      `max_retries` times, after an exponential backoff of `backoff`,
+      2 * `backoff`, 4 * `backoff`... seconds (at most `max_backoff`) with
+      full jitter, or after the server's `Retry-After` if longer.  The host
+      is held for as long, so that other requests to it back off too.
+    """
+
+    def __init__(
+            self,
+            min_delay: float = 0.0,
+            max_retries: int = 3,
+            backoff: float = 0.5,
+            max_backoff: float = 30.0,
+            use_robots: bool = False,
+            obey_robots: bool = False,
+            user_agent: str = '*',
+            robots_ttl: float = 24 * 3600.0,
+            seed: Optional[int] = None,
+    ):
+        if min_delay < 0:
+            raise ValueError(f"min_delay must not be negative, got {min_delay}")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative, "
+                             f"got {max_retries}")
+        self.min_delay = min_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.use_robots = use_robots or obey_robots
+        self.obey_robots = obey_robots
+        self.robots = RobotsCache(user_agent, robots_ttl)
+        self.limiter = HostRateLimiter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._disallowed = 0
+        self._seconds_waited = 0.0
+
+    def get(self, session: PooledSession, url: str, **kwargs) \
+            -> requests.Response:
+        """Request `url` with `session.get(url, **kwargs)`, waiting for the
+        host's rate limit and retrying transient failures.
+
+        Raise `DisallowedByRobots` if robots.txt disallows `url`, or the
+        last error if every attempt failed.  A response with a retryable
+        status is returned as is once the retries are exhausted."""
+        host = urlparse(url).netloc
+        interval = self.min_delay
+        if self.use_robots:
+            robots = self.robots.get(session, url)
+            if (self.obey_robots and robots is not None and
+                    not robots.can_fetch(self.robots.user_agent, url)):
+                self._count(disallowed=1)
+                raise DisallowedByRobots(f"Disallowed by robots.txt: {url}")
+            interval = max(interval, self.robots.crawl_delay(robots))
+
+        attempt = 0
+        while True:
+            waited = self.limiter.wait(host, interval)
+            self._count(sent=1, seconds_waited=waited)
+            retry_after = None
+            try:
+                response = session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+            else:
+                if (response.status_code not in RETRYABLE_STATUSES or
+                        attempt >= self.max_retries):
+                    if response.status_code in RETRYABLE_STATUSES:
+                        self._count(failures=1)
+                    return response
+                retry_after = _retry_after(response)
+                response.close()
+
+            delay = self.backoff_delay(attempt)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_backoff))
+            self.limiter.defer(host, delay)
+            self._count(retries=1)
+            attempt += 1
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return a random delay before retry number `attempt` (from 0)."""
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        with self._lock:
+            return self._random.uniform(0, ceiling)
+
+    def stats(self) -> PolitenessStats:
+        with self._lock:
+            return PolitenessStats(self._requests, self._retries,
+                                   self._failures, self._disallowed,
+                                   self.robots.fetched, self._seconds_waited)
+
+    def _count(
+            self,
+            sent: int = 0,
+            retries: int = 0,
+            failures: int = 0,
+            disallowed: int = 0,
+            seconds_waited: float = 0.0,
+    ) -> None:
+        with self._lock:
+            self._requests += sent
+            self._retries += retries
+            self._failures += failures
+            self._disallowed += disallowed
+            self._seconds_waited += seconds_waited
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    # Only the delay-seconds form of `Retry-After` is supported
+    value = response.headers.get('retry-after', '').strip()
+    if value.isdigit():
+        return float(value)
+    return None
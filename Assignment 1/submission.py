@@ -1,3 +1,4 @@
+from collections import deque
 from typing import List
 from utils import visit_url
 
@@ -84,27 +85,33 @@ def word_path(
         for word in file:
             totalWords.add(word.strip().lower())
 
-    #set up frontier and visited
-    frontier = ([(start_word, [start_word])])
-    visited = set()
-    visited.add(start_word)
+    #set up frontier (a deque pops from the front in constant time) and
+    #parents (the word each word was reached from, doubles as visited)
+    frontier = deque([start_word])
+    parents = {start_word: None}
     
     #bfs search starts now
     wordLength = len(start_word)
     while frontier:
-        currentWord, path = frontier.pop(0)
+        currentWord = frontier.popleft()
 
         #iterate over every character and change it
         for index in range(wordLength):
             for char in 'abcdefghijklmnopqrstuvwxyz':
                 nextWord = currentWord[:index] + char + currentWord[index+1:]
                 
-                if nextWord in totalWords and nextWord not in visited:
+                if nextWord in totalWords and nextWord not in parents:
+                    parents[nextWord] = currentWord
                     if nextWord == target_word:
-                        return path + [nextWord]
+                        #follow the parents back to the start word
+                        path = []
+                        while nextWord is not None:
+                            path.append(nextWord)
+                            nextWord = parents[nextWord]
+                        path.reverse()
+                        return path
                     
-                    visited.add(nextWord)
-                    frontier.append((nextWord, path + [nextWord]))
+                    frontier.append(nextWord)
     
     # No path found
     return []
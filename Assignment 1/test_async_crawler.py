@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import pytest
+import sys
+
+import submission
+import utils
+from async_crawler import AsyncCrawler
+from fixture_server import record_visits, serve_in_thread
+
+
+@pytest.fixture
+def seed_url():
+    """Serve a small synthetic site, crawled without the cache."""
+    utils.configure_crawl(default_scheme='http', use_cache=False,
+                          verbose=False)
+    try:
+        with serve_in_thread(num_pages=60, links_per_page=4,
+                             latency=0.005) as url:
+            yield url
+    finally:
+        utils.configure_crawl(default_scheme='https', use_cache=True,
+                              verbose=True)
+
+
+@pytest.mark.timeout(30)
+class TestAsyncCrawler:
+    @pytest.mark.it("Same visit order as the sequential crawlers")
+    def test_order(self, seed_url):
+        for mode in ('bfs', 'dfs'):
+            expected = record_visits(getattr(submission, f'crawler_{mode}'),
+                                     seed_url)
+            crawler = AsyncCrawler(concurrency=8)
+            assert getattr(crawler, mode)(seed_url) == expected
+
+    @pytest.mark.it("DFS requests every page once")
+    def test_dfs_requests(self, seed_url):
+        try:
+            for parse_processes in (None, 2):
+                metrics = utils.configure_metrics()
+                crawler = AsyncCrawler(concurrency=8,
+                                       parse_processes=parse_processes)
+                visited = crawler.dfs(seed_url)
+                assert len(visited) == len(set(visited)) > 1
+                assert sum(metrics.fetches.values()) == len(visited)
+        finally:
+            utils.disable_metrics()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import gzip
+import pytest
+import sys
+
+from checkpoint import CrawlState, load_checkpoint, save_checkpoint
+from visited_set import make_visited_set
+
+
+@pytest.mark.timeout(5)
+class TestCheckpoint:
+    @pytest.mark.it("Crawl state saved and loaded with every visited set")
+    def test_round_trip(self, tmp_path):
+        for kind in ('exact', 'hashed', 'bloom'):
+            state = CrawlState.start('bfs', 'https://a.com', 10,
+                                     make_visited_set(kind))
+            for url in ('https://a.com/1', 'https://a.com/2'):
+                state.visited.add(url)
+                state.next_frontier.append(url)
+            state.frontier.pop()
+            state.pages = 1
+            save_checkpoint(state, tmp_path / 'crawl.ckpt')
+            loaded = load_checkpoint(tmp_path / 'crawl.ckpt')
+            assert (loaded.mode, loaded.seed_url, loaded.max_pages,
+                    loaded.frontier, loaded.next_frontier, loaded.pages) == \
+                ('bfs', 'https://a.com', 10, [],
+                 ['https://a.com/1', 'https://a.com/2'], 1)
+            assert type(loaded.visited) is type(state.visited)
+            assert all(url in loaded.visited for url in
+                       ('https://a.com', 'https://a.com/1', 'https://a.com/2'))
+            assert 'https://a.com/3' not in loaded.visited
+
+    @pytest.mark.it("Unknown versions rejected")
+    def test_version(self, tmp_path):
+        path = tmp_path / 'crawl.ckpt'
+        with gzip.open(path, 'wb') as file:
+            file.write(b'{"version": 99}\n')
+        with pytest.raises(ValueError):
+            load_checkpoint(path)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import pytest
+import sys
+
+import utils
+from crawl_cache import (CacheEntry, DirectoryCache, SQLiteCache,
+                         migrate_directory_cache)
+
+ENTRY = CacheEntry(['https://example.com/a', 'https://example.com/b'],
+                   fetched_at=1.0, etag='"x"')
+KEY = 'a' * 64
+
+
+@pytest.mark.timeout(5)
+class TestSQLiteCache:
+    @pytest.mark.it("Entries written and read back")
+    def test_round_trip(self, tmp_path):
+        cache = SQLiteCache(tmp_path / 'links.sqlite3')
+        cache.put(KEY, ENTRY)
+        assert cache.get(KEY) == ENTRY
+        assert cache.get_many([KEY, 'b' * 64]) == {KEY: ENTRY}
+        assert list(cache.keys()) == [KEY]
+        cache.close()
+
+    @pytest.mark.it("Misses and skipped writes on a corrupt database")
+    def test_corrupt(self, tmp_path):
+        path = tmp_path / 'links.sqlite3'
+        path.write_bytes(b'not a database' * 100)
+        cache = SQLiteCache(path)
+        cache.put(KEY, ENTRY)
+        assert cache.get(KEY) is None
+        assert cache.get_many([KEY]) == {}
+        cache.close()
+
+    @pytest.mark.it("Misses and skipped writes once the database is gone")
+    def test_removed(self, tmp_path):
+        cache = SQLiteCache(tmp_path / 'missing' / 'links.sqlite3')
+        cache.put_many([(KEY, ENTRY)])
+        assert cache.get(KEY) is None
+        cache = SQLiteCache(tmp_path / 'links.sqlite3')
+        cache.close()
+        cache.put(KEY, ENTRY)
+        assert cache.get(KEY) is None
+
+    @pytest.mark.it("Entries that failed to migrate are kept")
+    def test_migrate_failure(self, tmp_path):
+        source = DirectoryCache(tmp_path)
+        source.put(KEY, ENTRY)
+        path = tmp_path / 'links.sqlite3'
+        path.write_bytes(b'not a database' * 100)
+        assert migrate_directory_cache(source, SQLiteCache(path)) == 0
+        assert source.get(KEY) == ENTRY
+
+
+@pytest.mark.timeout(5)
+class TestLinkCache:
+    @pytest.mark.it("Cache usable again after cleaning it")
+    def test_clean(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('HOME', str(tmp_path))
+        utils.clean_cache_dir()
+        utils.configure_cache()
+        try:
+            utils._write_cache('https://example.com', ENTRY)
+            utils.clean_cache_dir()
+            assert utils._check_cache('https://example.com') is None
+            utils._write_cache('https://example.com', ENTRY)
+            utils.configure_cache()
+            assert utils._check_cache('https://example.com') == ENTRY
+        finally:
+            utils.clean_cache_dir()
+            utils.configure_cache()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
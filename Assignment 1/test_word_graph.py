@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import itertools
+import pytest
+import sys
+
+import submission
+from word_graph import WordGraph
+from word_index import MappedWordGraph, build_index
+
+# Two components of 4-letter words with several ladders between some pairs,
+# a word no other word leads to, and words of another length
+WORDS = ['cold', 'cord', 'card', 'ward', 'warm', 'word', 'worm', 'wore',
+         'core', 'care', 'bare', 'bore', 'cole', 'bole', 'bold', 'wold',
+         'zinc', 'zing', 'king', 'kind', 'ki-d', 'dog', 'dot', 'cot']
+QUERIES = [('cold', 'warm'), ('cold', 'bare'), ('warm', 'bold'),
+           ('bore', 'word'), ('cold', 'zinc'), ('zinc', 'kind'),
+           ('kind', 'zinc'), ('ki-d', 'kind'), ('kind', 'ki-d'),
+           ('cold', 'cold'), ('cold', 'none'), ('dog', 'cot'),
+           ('Cold', 'warm'), ('cold', 'dot')]
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text('\n'.join(WORDS) + '\n')
+    return str(path)
+
+
+def assert_ladder(graph, ladder, start_word, target_word):
+    assert ladder[0] == start_word and ladder[-1] == target_word
+    assert len(set(ladder)) == len(ladder)
+    for word, next_word in zip(ladder, ladder[1:]):
+        assert next_word in graph.neighbors(word)
+
+
+@pytest.mark.timeout(5)
+class TestWordGraph:
+    @pytest.mark.it("Same ladders as submission.word_path")
+    def test_shortest_path(self, dictionary):
+        graph = WordGraph.from_file(dictionary)
+        labeled = WordGraph.from_file(dictionary, label_components=True)
+        for start_word, target_word in QUERIES:
+            expected = submission.word_path(dictionary, start_word,
+                                            target_word)
+            assert graph.shortest_path(start_word, target_word) == expected
+            assert labeled.shortest_path(start_word, target_word) == expected
+            assert graph.bfs_tree(start_word).path_to(target_word) == \
+                expected
+            if start_word != target_word:
+                assert graph.bidirectional_path(
+                    start_word, target_word) == expected
+
+    @pytest.mark.it("A* ladders as short as submission.word_path's")
+    def test_astar(self, dictionary):
+        graph = WordGraph.from_file(dictionary)
+        for start_word, target_word in QUERIES:
+            expected = submission.word_path(dictionary, start_word,
+                                            target_word)
+            ladder = graph.astar_path(start_word, target_word)
+            assert len(ladder) == len(expected)
+            if ladder:
+                assert_ladder(graph, ladder, start_word, target_word)
+
+    @pytest.mark.it("Queries between components answered without searching")
+    def test_components(self, dictionary):
+        graph = WordGraph.from_file(dictionary, label_components=True)
+        assert graph.component('cold') == graph.component('warm')
+        assert graph.component('cold') != graph.component('zinc')
+        assert graph.component('none') is None
+        # 'ki-d' leads to 'kind' but not back: same component, no ladder
+        assert graph.may_reach('kind', 'ki-d')
+        assert graph.shortest_path('kind', 'ki-d') == []
+        for target_word in ('zinc', 'none'):
+            assert graph.shortest_path('cold', target_word) == []
+            assert graph.num_expanded == 0
+        assert not graph.may_reach('Cold', 'zinc')
+        assert graph.may_reach('Cold', 'warm')
+
+    @pytest.mark.it("Same graph and ladders from an index")
+    def test_index(self, dictionary, tmp_path):
+        index_path = tmp_path / 'words.idx'
+        assert build_index(dictionary, index_path) == len(WORDS)
+        graph = WordGraph.from_file(dictionary, label_components=True)
+        with MappedWordGraph(str(index_path)) as index:
+            assert len(index) == len(graph)
+            for word in WORDS + ['none', 'Cold']:
+                assert (word in index) == (word in graph)
+                assert list(index.neighbors(word)) == \
+                    list(graph.neighbors(word))
+                assert sorted(index.predecessors(word)) == \
+                    sorted(graph.predecessors(word))
+            for word, other_word in itertools.combinations(WORDS, 2):
+                assert (index.component(word) == index.component(
+                    other_word)) == (graph.component(word) ==
+                                     graph.component(other_word))
+            for start_word, target_word in QUERIES:
+                assert index.shortest_path(start_word, target_word) == \
+                    graph.shortest_path(start_word, target_word)
+
+    @pytest.mark.it("Index of another version rejected")
+    def test_index_version(self, dictionary, tmp_path):
+        index_path = tmp_path / 'words.idx'
+        build_index(dictionary, index_path)
+        data = bytearray(index_path.read_bytes())
+        data[8] = 99
+        index_path.write_bytes(bytes(data))
+        with pytest.raises(ValueError):
+            MappedWordGraph(str(index_path))
+
+
+@pytest.mark.timeout(5)
+class TestLadders:
+    @pytest.mark.it("Every shortest ladder enumerated and counted")
+    def test_ladder_dag(self):
+        # From 'aaaa' to 'bbbb', the letters can change in any order
+        graph = WordGraph(''.join(letters)
+                          for letters in itertools.product('ab', repeat=4))
+        dag = graph.ladder_dag('aaaa', 'bbbb')
+        ladders = list(dag)
+        assert dag.length == 4
+        assert dag.count() == len(ladders) == len(set(map(tuple, ladders))) \
+            == 24
+        for ladder in ladders:
+            assert_ladder(graph, ladder, 'aaaa', 'bbbb')
+        assert ladders[0] == graph.shortest_path('aaaa', 'bbbb')
+
+    @pytest.mark.it("Shortest ladders of a dictionary enumerated")
+    def test_ladder_dag_dictionary(self, dictionary):
+        graph = WordGraph.from_file(dictionary)
+        dag = graph.ladder_dag('cold', 'bare')
+        ladders = list(dag)
+        assert dag.count() == len(ladders) > 1
+        expected = graph.shortest_path('cold', 'bare')
+        assert expected in ladders
+        for ladder in ladders:
+            assert len(ladder) == len(expected)
+            assert_ladder(graph, ladder, 'cold', 'bare')
+        assert graph.ladder_dag('cold', 'zinc') is None
+
+    @pytest.mark.it("k shortest ladders in order of length")
+    def test_k_shortest(self, dictionary):
+        graph = WordGraph.from_file(dictionary)
+        ladders = list(itertools.islice(
+            graph.k_shortest_ladders('cold', 'warm'), 20))
+        assert ladders[0] == graph.shortest_path('cold', 'warm')
+        assert len(ladders) > graph.ladder_dag('cold', 'warm').count()
+        assert [len(ladder) for ladder in ladders] == \
+            sorted(len(ladder) for ladder in ladders)
+        assert len(set(map(tuple, ladders))) == len(ladders)
+        for ladder in ladders:
+            assert_ladder(graph, ladder, 'cold', 'warm')
+        assert list(graph.k_shortest_ladders('cold', 'zinc')) == []
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
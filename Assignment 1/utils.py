@@ -1,16 +1,66 @@
 import hashlib
 import shutil
 import sys
+import threading
+import time
 from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urlparse, urlunparse
 
 import lxml.html
 import requests
 from lxml import etree
 
+from crawl_cache import (CacheBackend, CacheEntry, DirectoryCache, LRUCache,
+                         LRUStats, RecrawlStats, SQLiteCache, content_hash,
+                         content_hasher, migrate_directory_cache)
+from crawl_metrics import CrawlMetrics, TimedChunks
+from http_session import PooledSession, PoolStats
+from politeness import PolitenessStats, PoliteScheduler
+
 _VERBOSE = True
+# Scheme given to every normalized URL (see `configure_crawl`)
+_DEFAULT_SCHEME = 'https'
+# Set to False to always go to the network (e.g. when measuring throughput)
+_USE_CACHE = True
+
+# Pages are streamed in chunks of this many bytes, and truncated after
+# `_MAX_PAGE_BYTES` bytes
+_STREAM_CHUNK_SIZE = 64 << 10
+_MAX_PAGE_BYTES = 8 << 20
+# Number of distinct hrefs whose parse is memoized (see `_LinkNormalizer`)
+_URL_CACHE_SIZE = 1 << 16
+
+# Shared HTTP session, created on first use (see `configure_session`)
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+# Rate limits, robots.txt and retries of every request made with `_session`,
+# created on first use (see `configure_politeness`)
+_scheduler: Optional[PoliteScheduler] = None
+
+# Instrumentation of the crawl, if enabled (see `configure_metrics`)
+_metrics: Optional[CrawlMetrics] = None
+
+# Link cache storage, opened on first use (see `configure_cache`)
+_SQLITE_CACHE_FILENAME = 'links.sqlite3'
+_CACHE_BACKENDS = {
+    'sqlite': lambda: SQLiteCache(_get_cache_dir() / _SQLITE_CACHE_FILENAME),
+    'directory': lambda: DirectoryCache(_get_cache_dir()),
+}
+_cache_backend_name = 'sqlite'
+_cache_backend: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+# Seconds after which cached pages are revalidated (None: never)
+_cache_ttl: Optional[float] = None
+# Most recently used cache entries, in front of `_cache_backend`
+_memory_cache = LRUCache()
+# Outcome of the downloads -> count (see `recrawl_stats`)
+_recrawl_counts = dict.fromkeys(('not_modified', 'unchanged', 'changed',
+                                 'new'), 0)
+_recrawl_lock = threading.Lock()
 
 
 def visit_url(url: str) -> List[str]:
@@ -18,76 +68,535 @@ def visit_url(url: str) -> List[str]:
     if _VERBOSE:
         print(f"Visiting URL: {url}", file=sys.stderr)
 
-    links = list()
+    links = fetch_links(url)
+    if _metrics is not None:
+        _metrics.record_visit(url)
+    return links
 
-    cache = _check_cache(url)
-    if cache is not None:
-        if len(cache) > 0:
-            links = cache.split('\n')
-    else:
-        try:
-            r = requests.get(url)
-            if (200 <= r.status_code < 300 and
+
+def fetch_links(url: str) -> List[str]:
+    """Return the same-origin links found on the (normalized) `url`.
+
+    Unlike `visit_url`, this does not log the visit, so it can be called from
+    worker threads while the caller reports visits in a deterministic order.
+    """
+    entry = _check_cache(url)
+    if entry is not None and not entry.is_stale(_cache_ttl):
+        if _metrics is not None:
+            _metrics.record_cache_hit(url)
+        return entry.links
+    return download_links(url, entry)
+
+
+def download_links(url: str, cached: Optional[CacheEntry] = None) \
+        -> List[str]:
+    """Download the (normalized) `url`, and cache and return the same-origin
+    links found on it.
+
+    `cached` is the stale cache entry of `url`, if any: its validators make
+    the request conditional, so that an unchanged page is answered with
+    `304 Not Modified` and its links are reused instead of downloaded again.
+    Servers without validators send the page again: if it hashes to the
+    `content_hash` of `cached`, its links are reused without parsing it.
+    The stale links are also returned if the download fails.
+    """
+    links = list() if cached is None else cached.links
+    start = time.perf_counter()
+    fetched = None
+    status = None
+    chunks = None
+    parsed = False
+
+    try:
+        with _get(url, cached) as r:
+            fetched = time.perf_counter()
+            status = r.status_code
+            if r.status_code == 304 and cached is not None:
+                _count_recrawl('not_modified')
+                _write_cache(url, cached.refreshed())
+            elif (200 <= r.status_code < 300 and
                     r.headers.get('content-type', '').startswith('text/html')):
-                content = r.text
-
-                tree = lxml.html.document_fromstring(content)
-                raw_links = tree.xpath('//a[@href]/@href')
-                normalized_links = map(
-                    lambda u: _normalize_url(u, url),
-                    raw_links
-                )
-                same_origin_links = filter(
-                    lambda u: _is_same_origin(u, url),
-                    normalized_links
-                )
-                # Exclude current URL from links
-                out_links = filter(lambda u: u != url, same_origin_links)
-                unique_links = list(OrderedDict.fromkeys(out_links))
-                links = unique_links
-
-                _write_cache(url, '\n'.join(links))
-        except (requests.exceptions.RequestException, lxml.etree.ParserError):
-            pass
+                chunks = TimedChunks(r.iter_content(_STREAM_CHUNK_SIZE))
+                etag = r.headers.get('etag')
+                last_modified = r.headers.get('last-modified')
+                if cached is not None and cached.content_hash is not None:
+                    # Read the whole page to hash it before parsing it
+                    body = _read_body(chunks)
+                    digest = content_hash(body)
+                    if digest == cached.content_hash:
+                        _count_recrawl('unchanged')
+                        _write_cache(url, cached.revalidated(etag,
+                                                             last_modified))
+                    else:
+                        links = list(iter_links([body], url, r.encoding))
+                        parsed = True
+                else:
+                    # Hash the page as it streams into the parser
+                    hasher = content_hasher()
+                    links = list(iter_links(_hashed_chunks(chunks, hasher),
+                                            url, r.encoding))
+                    digest = hasher.hexdigest()
+                    parsed = True
+
+                if parsed:
+                    _count_recrawl('new' if cached is None else 'changed')
+                    _write_cache(url, CacheEntry(
+                        links,
+                        etag=etag,
+                        last_modified=last_modified,
+                        content_hash=digest,
+                    ))
+    except (requests.exceptions.RequestException, lxml.etree.ParserError,
+            lxml.etree.XMLSyntaxError):
+        pass
 
+    if _metrics is not None:
+        end = time.perf_counter()
+        if fetched is None:
+            fetched = end
+        # The page may be parsed as it streams in: the time not spent
+        # waiting for chunks is parsing
+        _metrics.record_fetch(
+            url, status, 'miss' if cached is None else 'stale',
+            fetch_seconds=fetched - start,
+            download_seconds=0.0 if chunks is None else chunks.seconds,
+            parse_seconds=(end - fetched - chunks.seconds if parsed
+                           else None),
+            num_bytes=0 if chunks is None else chunks.bytes)
     return links
 
 
+@dataclass(frozen=True)
+class Page:
+    """The raw HTML of a page, as downloaded by `download_page`."""
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+def download_page(url: str, cached: Optional[CacheEntry] = None) \
+        -> Optional[Page]:
+    """Download the (normalized) `url` without parsing it, for pipelines
+    that parse pages elsewhere (see `parse_page` and `store_links`).
+
+    Return None if there is nothing to parse: the download failed, the page
+    is not HTML, or the stale cache entry `cached` was revalidated or the
+    page is unchanged (see `download_links`), in which case `cached.links`
+    are still current.  The body is truncated after `_MAX_PAGE_BYTES`
+    bytes.
+    """
+    page = None
+    start = time.perf_counter()
+    fetched = None
+    status = None
+    num_bytes = 0
+    try:
+        with _get(url, cached) as r:
+            fetched = time.perf_counter()
+            status = r.status_code
+            if r.status_code == 304 and cached is not None:
+                _count_recrawl('not_modified')
+                _write_cache(url, cached.refreshed())
+            elif (200 <= r.status_code < 300 and
+                    r.headers.get('content-type', '').startswith('text/html')):
+                body = _read_body(r.iter_content(_STREAM_CHUNK_SIZE))
+                num_bytes = len(body)
+                digest = content_hash(body)
+                if cached is not None and digest == cached.content_hash:
+                    _count_recrawl('unchanged')
+                    _write_cache(url, cached.revalidated(
+                        r.headers.get('etag'), r.headers.get('last-modified')))
+                else:
+                    _count_recrawl('new' if cached is None else 'changed')
+                    page = Page(url, body, r.encoding, r.headers.get('etag'),
+                                r.headers.get('last-modified'), digest)
+    except requests.exceptions.RequestException:
+        pass
+
+    if _metrics is not None:
+        end = time.perf_counter()
+        if fetched is None:
+            fetched = end
+        _metrics.record_fetch(
+            url, status, 'miss' if cached is None else 'stale',
+            fetch_seconds=fetched - start, download_seconds=end - fetched,
+            num_bytes=num_bytes)
+    return page
+
+
+def parse_page(page: Page) -> List[str]:
+    """Return the same-origin links found on a downloaded `page`.
+
+    Only depends on its argument, so it can run in a worker process."""
+    try:
+        return list(iter_links([page.body], page.url, page.encoding))
+    except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError):
+        return list()
+
+
+def store_links(page: Page, links: List[str]) -> None:
+    """Cache the `links` parsed from `page`."""
+    _write_cache(page.url, CacheEntry(links, etag=page.etag,
+                                      last_modified=page.last_modified,
+                                      content_hash=page.content_hash))
+
+
+def init_parse_worker(default_scheme: str) -> None:
+    """Initialize a worker process running `parse_page` with the settings
+    of the parent process."""
+    global _DEFAULT_SCHEME
+    _DEFAULT_SCHEME = default_scheme
+
+
+def extract_links(content: str, url: str) -> List[str]:
+    """Return the same-origin links of the page at `url` with the HTML
+    `content`, by building its DOM and querying it with XPath.
+
+    `iter_links` returns the same links without building a DOM."""
+    tree = lxml.html.document_fromstring(content)
+    raw_links = tree.xpath('//a[@href]/@href')
+    normalized_links = map(
+        lambda u: _normalize_url(u, url),
+        raw_links
+    )
+    same_origin_links = filter(
+        lambda u: _is_same_origin(u, url),
+        normalized_links
+    )
+    # Exclude current URL from links
+    out_links = filter(lambda u: u != url, same_origin_links)
+    unique_links = list(OrderedDict.fromkeys(out_links))
+    return unique_links
+
+
+def iter_links(
+        chunks: Iterable[bytes],
+        url: str,
+        encoding: Optional[str] = None,
+        max_bytes: Optional[int] = _MAX_PAGE_BYTES,
+) -> Iterator[str]:
+    """Yield the same-origin links of the page at `url` as they appear in
+    its HTML, which is fed to an incremental parser chunk by chunk.
+
+    No DOM is built and the page is never held in memory as a whole.  Only
+    the first `max_bytes` bytes of the page are parsed (None: no limit).
+    `encoding` overrides the encoding declared by the page, as `r.encoding`
+    does for `r.text`."""
+    collector = _LinkCollector()
+    parser = etree.HTMLParser(target=collector, encoding=encoding)
+    normalizer = _LinkNormalizer(url)
+    seen = {url}
+    received = 0
+
+    for chunk in chunks:
+        if max_bytes is not None and received + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - received]
+        if len(chunk) == 0:
+            continue
+        parser.feed(chunk)
+        received += len(chunk)
+        yield from _new_links(collector, normalizer, seen)
+        if max_bytes is not None and received >= max_bytes:
+            break
+
+    if received > 0:
+        parser.close()
+        yield from _new_links(collector, normalizer, seen)
+
+
+class _LinkCollector:
+    """Parser target that collects the `href` of every `a` element."""
+
+    def __init__(self) -> None:
+        self.hrefs: List[str] = list()
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == 'a':
+            href = attrib.get('href')
+            if href is not None:
+                self.hrefs.append(href)
+
+    def close(self) -> None:
+        pass
+
+
+def _new_links(
+        collector: _LinkCollector,
+        normalizer: '_LinkNormalizer',
+        seen: Set[str],
+) -> Iterator[str]:
+    hrefs = collector.hrefs
+    collector.hrefs = list()
+    for href in hrefs:
+        link = normalizer.normalize(href)
+        # Exclude current URL (in `seen` from the start) and duplicates
+        if link not in seen and normalizer.is_same_origin(link):
+            seen.add(link)
+            yield link
+
+
+def read_cache_many(urls: Iterable[str]) -> Dict[str, CacheEntry]:
+    """Return the cache entry of each of the (normalized) `urls` that is in
+    the cache, looking up the ones not in memory in one batch.  Entries may
+    be stale (see `is_fresh`)."""
+    if not _cache_available():
+        return dict()
+
+    found = dict()
+    missing = dict()
+    for url in urls:
+        key = _get_cache_key(url)
+        entry = _memory_cache.get(key)
+        if entry is not None:
+            found[url] = entry
+        else:
+            missing[key] = url
+
+    for key, entry in _get_cache_backend().get_many(missing).items():
+        _memory_cache.put(key, entry)
+        found[missing[key]] = entry
+    return found
+
+
+def is_fresh(entry: CacheEntry) -> bool:
+    """Return whether `entry` can be used without revalidating it."""
+    return not entry.is_stale(_cache_ttl)
+
+
+def configure_crawl(
+        default_scheme: Optional[str] = None,
+        use_cache: Optional[bool] = None,
+        verbose: Optional[bool] = None,
+) -> None:
+    """
+    Configure how `visit_url` crawls; the settings left to None are
+    unchanged.
+    - `default_scheme`: Scheme given to every normalized URL, e.g. `'http'`
+      to crawl the local stand-in server of `fixture_server.py`.
+    - `use_cache`: Whether to use the link cache, or always go to the
+      network (e.g. when measuring throughput).
+    - `verbose`: Whether to print every visited URL.
+    """
+    global _DEFAULT_SCHEME, _USE_CACHE, _VERBOSE
+    if default_scheme is not None:
+        _DEFAULT_SCHEME = default_scheme
+    if use_cache is not None:
+        _USE_CACHE = use_cache
+    if verbose is not None:
+        _VERBOSE = verbose
+
+
+def configure_session(**kwargs) -> None:
+    """Replace the HTTP session used by `visit_url` with a new
+    `PooledSession(**kwargs)`, e.g. to change its connection limits."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = PooledSession(**kwargs)
+
+
+def get_session() -> PooledSession:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession()
+    return _session
+
+
+def session_stats() -> PoolStats:
+    """Return the connection pool counters of the HTTP session."""
+    return get_session().stats()
+
+
+def configure_politeness(**kwargs) -> None:
+    """Replace the scheduler of the requests made by `visit_url` with a new
+    `PoliteScheduler(**kwargs)`, e.g. to change its rate limits."""
+    global _scheduler
+    with _session_lock:
+        _scheduler = PoliteScheduler(**kwargs)
+
+
+def get_scheduler() -> PoliteScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _session_lock:
+            if _scheduler is None:
+                _scheduler = PoliteScheduler()
+    return _scheduler
+
+
+def politeness_stats() -> PolitenessStats:
+    """Return the counters of the request scheduler."""
+    return get_scheduler().stats()
+
+
+def recrawl_stats() -> RecrawlStats:
+    """Return what the downloads found compared with the cache: pages not
+    modified, unchanged, changed, and not cached before."""
+    with _recrawl_lock:
+        return RecrawlStats(**_recrawl_counts)
+
+
+def _count_recrawl(outcome: str) -> None:
+    with _recrawl_lock:
+        _recrawl_counts[outcome] += 1
+
+
+def _read_body(chunks: Iterable[bytes]) -> bytes:
+    # Read a page, truncated after `_MAX_PAGE_BYTES` bytes
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if len(body) >= _MAX_PAGE_BYTES:
+            break
+    return bytes(body[:_MAX_PAGE_BYTES])
+
+
+def _hashed_chunks(chunks: Iterable[bytes], hasher: hashlib.blake2b) \
+        -> Iterator[bytes]:
+    # Feed `hasher` the chunks of a page as they pass through, up to the
+    # same `_MAX_PAGE_BYTES` bytes as `_read_body` reads
+    received = 0
+    for chunk in chunks:
+        chunk = chunk[:_MAX_PAGE_BYTES - received]
+        hasher.update(chunk)
+        received += len(chunk)
+        yield chunk
+        if received >= _MAX_PAGE_BYTES:
+            break
+
+
+def _get(url: str, cached: Optional[CacheEntry]) -> requests.Response:
+    # Stream the (normalized) `url`, conditionally if there is a stale
+    # cache entry
+    return get_scheduler().get(get_session(), url,
+                               headers=_conditional_headers(cached),
+                               stream=True)
+
+
+def configure_metrics(**kwargs) -> CrawlMetrics:
+    """Start recording the crawl in a new `CrawlMetrics(**kwargs)`, and
+    return it."""
+    global _metrics
+    _metrics = CrawlMetrics(**kwargs)
+    return _metrics
+
+
+def crawl_metrics() -> Optional[CrawlMetrics]:
+    """Return the metrics being recorded, or None if they are disabled."""
+    return _metrics
+
+
+def disable_metrics() -> None:
+    global _metrics
+    _metrics = None
+
+
+def configure_cache(
+        backend: str = 'sqlite',
+        ttl: Optional[float] = None,
+        memory_entries: int = 10000,
+        memory_bytes: int = 64 << 20,
+) -> None:
+    """
+    Configure the link cache.
+    - `backend`: Storage of the cache, `'sqlite'` (a single database file in
+      the cache directory) or `'directory'` (one file per URL).
+    - `ttl`: Seconds after which a cached page is revalidated with the
+      server, or None to never expire cached pages.
+    - `memory_entries`, `memory_bytes`: Bounds of the in-memory LRU cache
+      in front of the storage.
+    """
+    global _cache_backend_name, _cache_ttl, _memory_cache
+    if backend not in _CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    _close_cache_backend()
+    _cache_backend_name = backend
+    _cache_ttl = ttl
+    _memory_cache = LRUCache(memory_entries, memory_bytes)
+
+
+def cache_stats() -> LRUStats:
+    """Return the counters of the in-memory LRU cache."""
+    return _memory_cache.stats()
+
+
+def migrate_cache(remove: bool = True) -> int:
+    """Move the entries of the one-file-per-URL cache directory into the
+    SQLite cache, and return the number of entries moved."""
+    if not _cache_available():
+        return 0
+    source = DirectoryCache(_get_cache_dir())
+    destination = SQLiteCache(_get_cache_dir() / _SQLITE_CACHE_FILENAME)
+    try:
+        return migrate_directory_cache(source, destination, remove=remove)
+    finally:
+        destination.close()
+
+
 def clean_cache_dir() -> None:
+    _close_cache_backend()
+    _memory_cache.clear()
     cache_dir = _get_cache_dir()
     if cache_dir.is_dir():
         shutil.rmtree(cache_dir)
+    # Create the directory again on the next lookup
+    if hasattr(_cache_available, 'available'):
+        del _cache_available.available
 
 
-def _check_cache(url: str) -> Optional[str]:
+def _check_cache(url: str) -> Optional[CacheEntry]:
     if not _cache_available():
         return None
 
-    cache_path = _get_cache_dir() / _get_cache_key(url)
-    if cache_path.is_file():
-        try:
-            cache_file = open(cache_path, 'r')
-            try:
-                return cache_file.read()
-            finally:
-                cache_file.close()
-        except OSError:
-            return None
+    key = _get_cache_key(url)
+    entry = _memory_cache.get(key)
+    if entry is None:
+        entry = _get_cache_backend().get(key)
+        if entry is not None:
+            _memory_cache.put(key, entry)
+    return entry
 
 
-def _write_cache(url: str, content: str) -> None:
+def _write_cache(url: str, entry: CacheEntry) -> None:
     if not _cache_available():
         return
 
-    cache_path = _get_cache_dir() / _get_cache_key(url)
-    try:
-        cache_file = open(cache_path, 'w')
-        try:
-            cache_file.write(content)
-        finally:
-            cache_file.close()
-    except OSError:
-        pass
+    key = _get_cache_key(url)
+    _memory_cache.put(key, entry)
+    _get_cache_backend().put(key, entry)
+
+
+def _conditional_headers(cached: Optional[CacheEntry]) -> Dict[str, str]:
+    headers = dict()
+    if cached is not None:
+        if cached.etag is not None:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified is not None:
+            headers['If-Modified-Since'] = cached.last_modified
+    return headers
+
+
+def _get_cache_backend() -> CacheBackend:
+    global _cache_backend
+    if _cache_backend is None:
+        with _cache_lock:
+            if _cache_backend is None:
+                _cache_backend = _CACHE_BACKENDS[_cache_backend_name]()
+    return _cache_backend
+
+
+def _close_cache_backend() -> None:
+    global _cache_backend
+    with _cache_lock:
+        if _cache_backend is not None:
+            _cache_backend.close()
+            _cache_backend = None
 
 
 def _get_cache_key(url: str) -> str:
@@ -95,6 +604,8 @@ def _get_cache_key(url: str) -> str:
 
 
 def _cache_available() -> bool:
+    if not _USE_CACHE:
+        return False
     if not hasattr(_cache_available, 'available'):
         try:
             _get_cache_dir().mkdir(parents=True, exist_ok=True)
@@ -130,7 +641,8 @@ def _is_same_origin(url: str, origin_url: str) -> bool:
 
 
 def _normalize_url(url: str, context_url: str = '') -> str:
-    parsed = urlparse(url)._replace(scheme='https', fragment='', query='')
+    parsed = urlparse(url)._replace(
+        scheme=_DEFAULT_SCHEME, fragment='', query='')
     trailing_slash_stripped = False
     if parsed.path.endswith('/'):
         parsed = parsed._replace(path=parsed.path.rstrip('/'))
@@ -157,3 +669,55 @@ def _normalize_url(url: str, context_url: str = '') -> str:
     parsed = parsed._replace(path=new_path)
 
     return str(urlunparse(parsed))
+
+
+class _LinkNormalizer:
+    """
+    Normalizes the links found on the page at `page_url`, with the same
+    results as `_normalize_url(link, page_url)` and
+    `_is_same_origin(link, page_url)`.
+
+    The page URL is parsed once, and the parse of every href (and of every
+    normalized link) is memoized across pages by `_parse_href`, so repeated
+    links such as navigation menus are never parsed twice.
+    """
+
+    def __init__(self, page_url: str):
+        parsed = urlparse(page_url)
+        self.netloc = parsed.netloc
+        self.path = parsed.path
+        self.parent = parsed.path.rsplit('/', 1)[0]
+
+    def normalize(self, href: str) -> str:
+        relative, netloc, path, params, trailing_slash_stripped = \
+            _parse_href(href)
+        if relative:
+            netloc = self.netloc
+
+        if path == '':
+            path = self.path
+        elif not path.startswith('/'):
+            # See `_normalize_url`
+            if trailing_slash_stripped:
+                path = f'{self.path}/{path}'
+            else:
+                path = f'{self.parent}/{path}'
+
+        return urlunparse((_DEFAULT_SCHEME, netloc, path, params, '', ''))
+
+    def is_same_origin(self, link: str) -> bool:
+        relative, netloc = _parse_href(link)[:2]
+        return relative or netloc == self.netloc
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def _parse_href(href: str) -> Tuple[bool, str, str, str, bool]:
+    """Return whether `href` is relative, and its netloc, path (without
+    trailing slashes), params and whether trailing slashes were stripped."""
+    parsed = urlparse(href)
+    relative = parsed.scheme == '' and parsed.netloc == ''
+    path = parsed.path
+    trailing_slash_stripped = path.endswith('/')
+    if trailing_slash_stripped:
+        path = path.rstrip('/')
+    return relative, parsed.netloc, path, parsed.params, trailing_slash_stripped
@@ -0,0 +1,231 @@
+import hashlib
+import math
+from array import array
+from typing import Iterable, Set, Union
+
+
+def url_hash(url: str) -> int:
+    """Return a stable, non-zero 64-bit hash of `url` (unlike `hash()`, it
+    does not change between runs, so it can be saved in checkpoints)."""
+    digest = hashlib.blake2b(url.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class CompactUrlSet:
+    """
+    A set of URLs that does not store the URLs themselves, for crawls whose
+    visited set would not fit in memory as a `set[str]`.  Only supports
+    adding URLs and testing membership; the set can be saved as bytes.
+    """
+
+    # Name of the implementation, as selected from the command line
+    kind = ''
+
+    def add(self, url: str) -> None:
+        raise NotImplementedError("Override me")
+
+    def __contains__(self, url: str) -> bool:
+        raise NotImplementedError("Override me")
+
+    def __len__(self) -> int:
+        raise NotImplementedError("Override me")
+
+    def params(self) -> dict:
+        """Return the keyword arguments to pass to `from_bytes`, besides the
+        data itself."""
+        raise NotImplementedError("Override me")
+
+    def to_bytes(self) -> bytes:
+        raise NotImplementedError("Override me")
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **params) -> 'CompactUrlSet':
+        raise NotImplementedError("Override me")
+
+
+class HashedUrlSet(CompactUrlSet):
+    """
+    Stores the 64-bit `url_hash` of each URL in an open-addressing hash
+    table backed by an `array('Q')`.  The table doubles once it is more than
+    half full, so it is 25% to 50% full: 2 to 4 slots of 8 bytes, or 16 to
+    32 bytes per URL, versus the string and set slot of a `set[str]`.  Two
+    URLs with the same hash are taken for one another, which is negligibly
+    rare below billions of URLs.
+    """
+
+    kind = 'hashed'
+
+    def __init__(self, urls: Iterable[str] = (), capacity: int = 1024):
+        size = 8
+        while size < 2 * capacity:
+            size *= 2
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+        for url in urls:
+            self.add(url)
+
+    def add(self, url: str) -> None:
+        self._add_hash(url_hash(url))
+
+    def __contains__(self, url: str) -> bool:
+        h = url_hash(url)
+        table, mask = self._table, self._mask
+        i = h & mask
+        while True:
+            slot = table[i]
+            if slot == h:
+                return True
+            if slot == 0:
+                return False
+            i = (i + 1) & mask
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _add_hash(self, h: int) -> None:
+        table, mask = self._table, self._mask
+        i = h & mask
+        while True:
+            slot = table[i]
+            if slot == h:
+                return
+            if slot == 0:
+                table[i] = h
+                self._len += 1
+                # Keep the table at most half full
+                if 2 * self._len > len(table):
+                    self._grow()
+                return
+            i = (i + 1) & mask
+
+    def _grow(self) -> None:
+        old_table = self._table
+        self._table = array('Q', bytes(16 * len(old_table)))
+        self._mask = len(self._table) - 1
+        self._len = 0
+        for h in old_table:
+            if h != 0:
+                self._add_hash(h)
+
+    def params(self) -> dict:
+        return dict()
+
+    def to_bytes(self) -> bytes:
+        return self._table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **params) -> 'HashedUrlSet':
+        url_set = cls(capacity=1)
+        url_set._table = array('Q')
+        url_set._table.frombytes(data)
+        url_set._mask = len(url_set._table) - 1
+        url_set._len = len(url_set._table) - url_set._table.count(0)
+        return url_set
+
+
+class BloomFilter(CompactUrlSet):
+    """
+    A Bloom filter sized for `capacity` URLs with a false positive rate of
+    `fp_rate`: about 1.44 * log2(1 / fp_rate) bits per URL (~14 bits at
+    0.1%).  A false positive makes the crawler take an unvisited URL for a
+    visited one and skip it; past `capacity` URLs, the rate goes up.
+    """
+
+    kind = 'bloom'
+
+    def __init__(
+            self,
+            capacity: int = 1_000_000,
+            fp_rate: float = 0.001,
+            urls: Iterable[str] = (),
+    ):
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"fp_rate must be in (0, 1), got {fp_rate}")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(
+            -capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(
+            self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._len = 0
+        for url in urls:
+            self.add(url)
+
+    def _positions(self, url: str) -> Iterable[int]:
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(url.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, url: str) -> None:
+        bits = self._bits
+        added = False
+        for position in self._positions(url):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self._len += 1
+
+    def __contains__(self, url: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(url))
+
+    def __len__(self) -> int:
+        """Number of URLs added, minus those taken for false positives."""
+        return self._len
+
+    def params(self) -> dict:
+        return {'capacity': self.capacity, 'fp_rate': self.fp_rate,
+                'len': self._len}
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, **params) -> 'BloomFilter':
+        bloom_filter = cls(params['capacity'], params['fp_rate'])
+        if len(data) != len(bloom_filter._bits):
+            raise ValueError("Bloom filter size does not match its parameters")
+        bloom_filter._bits = bytearray(data)
+        bloom_filter._len = params['len']
+        return bloom_filter
+
+
+# A crawl's visited set: a plain set of URLs, or one of the compact sets
+VisitedSet = Union[Set[str], CompactUrlSet]
+
+_COMPACT_URL_SETS = {cls.kind: cls for cls in (HashedUrlSet, BloomFilter)}
+VISITED_SET_KINDS = ('exact',) + tuple(_COMPACT_URL_SETS)
+
+
+def make_visited_set(
+        kind: str = 'exact',
+        capacity: int = 1_000_000,
+        fp_rate: float = 0.001,
+) -> VisitedSet:
+    """Return an empty visited set of the given `kind` (see
+    `VISITED_SET_KINDS`); `capacity` and `fp_rate` size Bloom filters."""
+    if kind == 'exact':
+        return set()
+    elif kind == HashedUrlSet.kind:
+        return HashedUrlSet()
+    elif kind == BloomFilter.kind:
+        return BloomFilter(capacity, fp_rate)
+    raise ValueError(f"Unknown visited set: {kind}")
+
+
+def visited_set_from_bytes(kind: str, data: bytes, params: dict) \
+        -> CompactUrlSet:
+    """Restore a compact set saved with `CompactUrlSet.to_bytes`."""
+    if kind not in _COMPACT_URL_SETS:
+        raise ValueError(f"Unknown visited set: {kind}")
+    return _COMPACT_URL_SETS[kind].from_bytes(data, **params)
@@ -0,0 +1,163 @@
+import itertools
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from word_graph import BfsTree, LadderGraph
+from word_index import load_graph
+
+# Printed for lines that are not a start and a target word
+INVALID_QUERY = "Invalid query"
+NO_SOLUTION = "No solution"
+
+
+@dataclass(frozen=True)
+class SolverStats:
+    """Counters of a `LadderSolver`."""
+    queries: int
+    searches: int
+    trees_built: int
+    tree_hits: int
+
+    def __str__(self) -> str:
+        return (f"{self.queries} queries: {self.searches} searches, "
+                f"{self.tree_hits} answered from {self.trees_built} cached "
+                f"BFS trees")
+
+
+class LadderSolver:
+    """
+    Answers ladder queries on one graph, for many queries in a row.
+
+    Start words queried at least `hot_threshold` times are hot: a full BFS
+    tree is built from them, and their later queries are answered from it
+    without searching.  The `cache_size` most recently used trees are kept.
+    """
+
+    def __init__(
+            self,
+            graph: LadderGraph,
+            algorithm: str = 'bfs',
+            cache_size: int = 128,
+            hot_threshold: int = 2,
+    ):
+        if algorithm not in ('bfs', 'bidirectional', 'astar'):
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        self.graph = graph
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self.hot_threshold = hot_threshold
+        self._trees: OrderedDict[str, BfsTree] = OrderedDict()
+        # Start word -> number of queries from it, while it is not hot
+        self._counts: Dict[str, int] = dict()
+        self.queries = 0
+        self.searches = 0
+        self.trees_built = 0
+        self.tree_hits = 0
+
+    def solve(self, start_word: str, target_word: str) -> List[str]:
+        """Return the same ladder as `word_path.py START TARGET` (a ladder
+        as short with the `astar` algorithm, unless answered from a BFS
+        tree)."""
+        self.queries += 1
+        tree = self._trees.get(start_word)
+        if tree is not None:
+            self._trees.move_to_end(start_word)
+            self.tree_hits += 1
+            return tree.path_to(target_word)
+
+        count = self._counts.get(start_word, 0) + 1
+        if count >= self.hot_threshold and self.cache_size > 0:
+            self._counts.pop(start_word, None)
+            tree = self.graph.bfs_tree(start_word)
+            self.trees_built += 1
+            self._trees[start_word] = tree
+            if len(self._trees) > self.cache_size:
+                self._trees.popitem(last=False)
+            return tree.path_to(target_word)
+
+        self._counts[start_word] = count
+        self.searches += 1
+        if self.algorithm == 'bidirectional':
+            return self.graph.bidirectional_path(start_word, target_word)
+        if self.algorithm == 'astar':
+            return self.graph.astar_path(start_word, target_word)
+        return self.graph.shortest_path(start_word, target_word)
+
+    def answer(self, line: str) -> str:
+        """Answer a query line `START TARGET` with the ladder on one line."""
+        query = line.split()
+        if len(query) != 2:
+            return INVALID_QUERY
+        words = self.solve(*query)
+        return ' '.join(words) if words else NO_SOLUTION
+
+    def stats(self) -> SolverStats:
+        return SolverStats(self.queries, self.searches, self.trees_built,
+                           self.tree_hits)
+
+
+def answer_lines(solver: LadderSolver, lines: Iterable[str]) -> Iterator[str]:
+    """Yield the answer to each query line as soon as it is read."""
+    for line in lines:
+        yield solver.answer(line)
+
+
+# Solver of a worker process, see `_init_worker`
+_solver: Optional[LadderSolver] = None
+
+
+def _init_worker(dictionary: str, solver_options: dict) -> None:
+    global _solver
+    _solver = LadderSolver(load_graph(dictionary, label_components=True),
+                           **solver_options)
+
+
+def _answer_chunk(lines: List[str]) -> Tuple[List[str], int, SolverStats]:
+    answers = [_solver.answer(line) for line in lines]
+    return answers, os.getpid(), _solver.stats()
+
+
+def answer_lines_parallel(
+        dictionary: str,
+        lines: Iterable[str],
+        processes: int,
+        chunk_size: int = 64,
+        stats: Optional[Dict[int, SolverStats]] = None,
+        **solver_options,
+) -> Iterator[str]:
+    """
+    Yield the answer to each query line, in order, answering chunks of
+    `chunk_size` lines on `processes` worker processes that each load the
+    graph of `dictionary` once and keep their own `LadderSolver`.  With an
+    index (see `load_graph`), the workers share the pages of the graph.
+
+    Lines are read as the workers need them, so the input can be an endless
+    stream.  If given, `stats` is updated with the counters of each worker
+    process, by process id.
+    """
+    if processes < 1:
+        raise ValueError(f"processes must be positive, got {processes}")
+    lines = iter(lines)
+    with ProcessPoolExecutor(max_workers=processes,
+                             initializer=_init_worker,
+                             initargs=(dictionary, solver_options)) as executor:
+        pending: Deque[Future] = deque()
+
+        def submit_chunks(count: int) -> None:
+            for _ in range(count):
+                chunk = list(itertools.islice(lines, chunk_size))
+                if len(chunk) == 0:
+                    return
+                pending.append(executor.submit(_answer_chunk, chunk))
+
+        # Keep a couple of chunks queued per worker
+        submit_chunks(2 * processes)
+        while pending:
+            answers, pid, worker_stats = pending.popleft().result()
+            if stats is not None:
+                stats[pid] = worker_stats
+            submit_chunks(1)
+            yield from answers
@@ -0,0 +1,569 @@
+import heapq
+import itertools
+import string
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Letters that `submission.word_path` substitutes into words: a neighbor of a
+# word differs from it in one position, where the neighbor has one of these
+LETTERS = string.ascii_lowercase
+_LETTERS = frozenset(LETTERS)
+
+# Stands for the substituted letter in bucket keys; cannot occur in a word
+_WILDCARD = '\0'
+
+
+def load_words(dict_file_path: str) -> Set[str]:
+    """Read a dictionary file with one word per line, lowercased as
+    `submission.word_path` does."""
+    with open(dict_file_path, 'r', encoding='utf-8') as file:
+        return {word.strip().lower() for word in file}
+
+
+class LadderGraph:
+    """
+    The word ladder graph of a dictionary: two words are neighbors if one
+    letter of `LETTERS` substituted into the first gives the second.
+
+    Searches set `num_expanded` to the number of words whose neighbors (or
+    predecessors) they generated.
+
+    Graphs whose words are labeled with their connected component (ignoring
+    the direction of the edges) answer queries between components without
+    searching.  The labels do not bound queries within a component: those
+    still search until they find the ladder, or explore everything the start
+    reaches if one-way edges leave the target out of reach.
+    """
+
+    num_expanded = 0
+
+    def __contains__(self, word: str) -> bool:
+        raise NotImplementedError("Override me")
+
+    def __len__(self) -> int:
+        raise NotImplementedError("Override me")
+
+    def neighbors(self, word: str) -> Iterator[str]:
+        """Yield the neighbors of `word` (which need not be in the
+        dictionary) in the order `submission.word_path` finds them: by
+        position of the substituted letter, then alphabetically."""
+        raise NotImplementedError("Override me")
+
+    def predecessors(self, word: str) -> Iterator[str]:
+        """Yield the dictionary words that `word` is a neighbor of."""
+        raise NotImplementedError("Override me")
+
+    def component(self, word: str) -> Optional[int]:
+        """Return the label of the connected component of the dictionary
+        word `word`, or None if the components are not labeled."""
+        return None
+
+    def may_reach(self, start_word: str, target_word: str) -> bool:
+        """Return False if there is certainly no ladder from `start_word`
+        to `target_word`: the target is not in the dictionary, or is in
+        another component than the start (or its neighbors, if the start
+        is not in the dictionary).  True does not mean there is a ladder:
+        the components ignore the direction of the edges, and say nothing
+        about how far the search has to go."""
+        if target_word not in self:
+            return False
+        target_component = self.component(target_word)
+        if target_component is None:
+            return True
+        if start_word in self:
+            return self.component(start_word) == target_component
+        return any(self.component(neighbor) == target_component
+                   for neighbor in self.neighbors(start_word))
+
+    def shortest_path(self, start_word: str, target_word: str) -> List[str]:
+        """Return the first shortest ladder from `start_word` to
+        `target_word` (excluding `start_word` itself if they are equal), or
+        an empty list if there is none; same result as
+        `submission.word_path`."""
+        self.num_expanded = 0
+        if not self.may_reach(start_word, target_word):
+            return []
+        frontier = deque([start_word])
+        # Word -> word it was reached from; doubles as the visited set
+        parents: Dict[str, Optional[str]] = {start_word: None}
+        while frontier:
+            current_word = frontier.popleft()
+            self.num_expanded += 1
+            for next_word in self.neighbors(current_word):
+                if next_word not in parents:
+                    parents[next_word] = current_word
+                    if next_word == target_word:
+                        return _trace_path(parents, target_word)
+                    frontier.append(next_word)
+        return []
+
+    def bfs_tree(self, start_word: str) -> 'BfsTree':
+        """Search breadth-first from `start_word` until every reachable word
+        is found, to answer any number of queries from `start_word`."""
+        self.num_expanded = 0
+        frontier = deque([start_word])
+        parents: Dict[str, Optional[str]] = {start_word: None}
+        while frontier:
+            current_word = frontier.popleft()
+            self.num_expanded += 1
+            for next_word in self.neighbors(current_word):
+                if next_word not in parents:
+                    parents[next_word] = current_word
+                    frontier.append(next_word)
+        return BfsTree(start_word, parents)
+
+    def bidirectional_path(self, start_word: str, target_word: str) \
+            -> List[str]:
+        """
+        Return the same ladder as `shortest_path`, searching breadth-first
+        from both ends (see `ladder_dag`).
+
+        The ladder a forward breadth-first search would find first is then
+        picked among the shortest ladders: each word's parent is the
+        first-discovered word of the previous layer leading to it, and that
+        word is on a shortest ladder too.
+        """
+        dag = self.ladder_dag(start_word, target_word)
+        if dag is None:
+            return []
+
+        # Replay the forward search within the layers
+        parents: Dict[str, Optional[str]] = {start_word: None}
+        ordered_layer = [start_word]
+        for _ in range(dag.length):
+            next_layer = list()
+            for word in ordered_layer:
+                for child in dag.children[word]:
+                    if child not in parents:
+                        parents[child] = word
+                        next_layer.append(child)
+            ordered_layer = next_layer
+        return _trace_path(parents, target_word)
+
+    def astar_path(self, start_word: str, target_word: str) -> List[str]:
+        """
+        Return a shortest ladder from `start_word` to `target_word`, or an
+        empty list if there is none, by A* search: words are expanded in
+        order of their distance from `start_word` plus their Hamming
+        distance to `target_word`.
+
+        Every step changes one letter, so the Hamming distance never
+        overestimates the number of steps left (and changes by at most one
+        per step): the ladder is as short as `shortest_path`'s, though it
+        may be another one of the same length.  Among words of equal
+        estimate, the deepest is expanded first, so that the search dives
+        toward the target instead of widening.
+        """
+        self.num_expanded = 0
+        if (target_word == start_word or len(target_word) != len(start_word)
+                or not self.may_reach(start_word, target_word)):
+            return []
+        counter = itertools.count()
+        # (estimated ladder length, -distance, tie breaker, word)
+        frontier = [(_hamming(start_word, target_word), 0, next(counter),
+                     start_word)]
+        distances = {start_word: 0}
+        parents: Dict[str, Optional[str]] = {start_word: None}
+        while frontier:
+            _, negative_distance, _, current_word = heapq.heappop(frontier)
+            distance = -negative_distance
+            if distance > distances[current_word]:
+                # Stale entry, the word was reached by a shorter ladder since
+                continue
+            self.num_expanded += 1
+            for next_word in self.neighbors(current_word):
+                if distance + 1 < distances.get(next_word, distance + 2):
+                    distances[next_word] = distance + 1
+                    parents[next_word] = current_word
+                    if next_word == target_word:
+                        # Its estimate, distance + 1, is at most that of
+                        # `current_word`, the smallest in the frontier
+                        return _trace_path(parents, target_word)
+                    heapq.heappush(frontier, (
+                        distance + 1 + _hamming(next_word, target_word),
+                        -distance - 1, next(counter), next_word))
+        return []
+
+    def ladder_dag(self, start_word: str, target_word: str) \
+            -> Optional['LadderDag']:
+        """
+        Return the DAG of every shortest ladder from `start_word` to
+        `target_word`, or None if there is none.
+
+        Searches breadth-first from both ends, always expanding the smaller
+        frontier by a whole level, until the two searches meet.  Both then
+        know the distance of every word on a shortest ladder, so the layers
+        of the DAG are traced back and forth from the words where they met.
+        """
+        self.num_expanded = 0
+        if (target_word == start_word or len(target_word) != len(start_word)
+                or not self.may_reach(start_word, target_word)):
+            return None
+
+        start_neighbors = set(self.neighbors(start_word))
+        self.num_expanded += 1
+
+        def predecessors(word: str) -> Iterator[str]:
+            # `start_word` need not be in the dictionary
+            yield from self.predecessors(word)
+            if start_word not in self and word in start_neighbors:
+                yield start_word
+
+        forward = {start_word: 0}
+        backward = {target_word: 0}
+        forward_layer = [start_word]
+        backward_layer = [target_word]
+        meeting: List[str] = list()
+        while len(meeting) == 0:
+            if len(forward_layer) == 0 or len(backward_layer) == 0:
+                return None
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self._expand_layer(
+                    forward_layer, forward, backward, self.neighbors)
+            else:
+                backward_layer, meeting = self._expand_layer(
+                    backward_layer, backward, forward, predecessors)
+
+        # Every shortest ladder goes through exactly one meeting word
+        length = forward[meeting[0]] + backward[meeting[0]]
+        layers: List[Set[str]] = [set() for _ in range(length + 1)]
+        layers[forward[meeting[0]]] = set(meeting)
+        for depth in range(forward[meeting[0]], 0, -1):
+            layers[depth - 1] = {
+                predecessor for word in layers[depth]
+                for predecessor in predecessors(word)
+                if forward.get(predecessor) == depth - 1}
+            self.num_expanded += len(layers[depth])
+        for depth in range(forward[meeting[0]], length):
+            layers[depth + 1] = {
+                neighbor for word in layers[depth]
+                for neighbor in self.neighbors(word)
+                if backward.get(neighbor) == length - depth - 1}
+            self.num_expanded += len(layers[depth])
+
+        # Link each layer to the next, in the order of `neighbors`
+        children: Dict[str, List[str]] = {target_word: []}
+        for depth in range(length):
+            for word in layers[depth]:
+                self.num_expanded += 1
+                children[word] = [neighbor for neighbor in self.neighbors(word)
+                                  if neighbor in layers[depth + 1]]
+        return LadderDag(start_word, target_word, layers, children)
+
+    def k_shortest_ladders(self, start_word: str, target_word: str) \
+            -> Iterator[List[str]]:
+        """
+        Yield the ladders from `start_word` to `target_word` that do not
+        visit a word twice, shortest first (Yen's algorithm); take the first
+        k with `itertools.islice`.  The first one is `shortest_path`'s.
+
+        Each ladder after the first costs one breadth-first search per word
+        of the previous ladder, so this suits small k; use `ladder_dag` to
+        enumerate the shortest ladders only.
+        """
+        first = self.shortest_path(start_word, target_word)
+        if len(first) == 0:
+            return
+        found = [first]
+        seen = {tuple(first)}
+        # (length, tie breaker, ladder) candidates for the next ladder
+        candidates: List[Tuple[int, int, List[str]]] = list()
+        counter = itertools.count()
+        yield first
+
+        while True:
+            previous = found[-1]
+            for i in range(len(previous) - 1):
+                # Deviate from `previous` after its first i + 1 words
+                root = previous[:i + 1]
+                removed_edges = {
+                    ladder[i + 1] for ladder in found
+                    if len(ladder) > i + 1 and ladder[:i + 1] == root}
+                spur = self._restricted_path(
+                    previous[i], target_word, set(root[:-1]), removed_edges)
+                if spur is not None:
+                    ladder = root[:-1] + spur
+                    if tuple(ladder) not in seen:
+                        seen.add(tuple(ladder))
+                        heapq.heappush(candidates,
+                                       (len(ladder), next(counter), ladder))
+            if len(candidates) == 0:
+                return
+            ladder = heapq.heappop(candidates)[2]
+            found.append(ladder)
+            yield ladder
+
+    def _restricted_path(
+            self,
+            start_word: str,
+            target_word: str,
+            removed_words: Set[str],
+            removed_neighbors: Set[str],
+    ) -> Optional[List[str]]:
+        # Shortest ladder avoiding `removed_words`, whose first step is not
+        # to one of `removed_neighbors`
+        parents: Dict[str, Optional[str]] = {start_word: None}
+        for word in removed_words:
+            parents.setdefault(word, None)
+        frontier = deque([start_word])
+        while frontier:
+            current_word = frontier.popleft()
+            for next_word in self.neighbors(current_word):
+                if next_word in parents or (current_word == start_word and
+                                            next_word in removed_neighbors):
+                    continue
+                parents[next_word] = current_word
+                if next_word == target_word:
+                    path = [next_word]
+                    while path[-1] != start_word:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
+                frontier.append(next_word)
+        return None
+
+    def _expand_layer(
+            self,
+            layer: List[str],
+            distances: Dict[str, int],
+            other_distances: Dict[str, int],
+            successors,
+    ) -> Tuple[List[str], List[str]]:
+        # Return the next layer of a search, and the words of it that the
+        # other search has reached
+        depth = distances[layer[0]] + 1
+        next_layer = list()
+        meeting = list()
+        for word in layer:
+            self.num_expanded += 1
+            for successor in successors(word):
+                if successor not in distances:
+                    distances[successor] = depth
+                    next_layer.append(successor)
+                    if successor in other_distances:
+                        meeting.append(successor)
+        return next_layer, meeting
+
+
+class LadderDag:
+    """
+    Every shortest ladder from `start_word` to `target_word`: `layers[d]` is
+    the set of words `d` steps into some shortest ladder, and `children`
+    maps each of them to the words of the next layer it leads to, in the
+    order of `LadderGraph.neighbors`.
+
+    Iterating yields the ladders lazily, depth-first in the order of
+    `children`; there can be exponentially many of them (see `count`).
+    """
+
+    def __init__(
+            self,
+            start_word: str,
+            target_word: str,
+            layers: List[Set[str]],
+            children: Dict[str, List[str]],
+    ):
+        self.start_word = start_word
+        self.target_word = target_word
+        self.layers = layers
+        self.children = children
+
+    @property
+    def length(self) -> int:
+        """Number of steps of the shortest ladders."""
+        return len(self.layers) - 1
+
+    def __iter__(self) -> Iterator[List[str]]:
+        ladder = [self.start_word]
+        # Iterators over the children of each word of `ladder`
+        stack = [iter(self.children[self.start_word])]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                ladder.pop()
+            elif child == self.target_word:
+                yield ladder + [child]
+            else:
+                ladder.append(child)
+                stack.append(iter(self.children[child]))
+
+    def count(self) -> int:
+        """Return the number of shortest ladders, without enumerating
+        them."""
+        paths = {self.target_word: 1}
+        for layer in reversed(self.layers[:-1]):
+            for word in layer:
+                paths[word] = sum(paths[child]
+                                  for child in self.children[word])
+        return paths[self.start_word]
+
+
+class BfsTree:
+    """
+    The word each word reachable from `start_word` was first reached from,
+    in a breadth-first search: the same parents as `shortest_path` finds,
+    so `path_to` returns the same ladders.
+    """
+
+    def __init__(self, start_word: str, parents: Dict[str, Optional[str]]):
+        self.start_word = start_word
+        self._parents = parents
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def path_to(self, target_word: str) -> List[str]:
+        """Return the ladder from `start_word` to `target_word`, or an empty
+        list if there is none."""
+        if target_word == self.start_word or target_word not in self._parents:
+            return []
+        return _trace_path(self._parents, target_word)
+
+
+class WordGraph(LadderGraph):
+    """
+    A `LadderGraph` of the words in memory.
+
+    Rather than generating 26 candidate strings per letter of a word and
+    probing the dictionary for each, words are indexed by their wildcard
+    patterns: `cold` is in the buckets `*old`, `c*ld`, `co*d` and `col*`,
+    so the neighbors of a word are found with one lookup per letter.
+    Buckets are built on first use for each word length.
+
+    With `label_components`, the components of the words of a length are
+    labeled on first use too, by union-find over the buckets; this costs
+    about as much as one search exploring a whole component.
+    """
+
+    def __init__(self, words: Iterable[str], label_components: bool = False):
+        self.words: Set[str] = set(words)
+        self.label_components = label_components
+        self._words_by_length: Dict[int, List[str]] = dict()
+        for word in self.words:
+            self._words_by_length.setdefault(len(word), []).append(word)
+        # Word length -> pattern -> words with the pattern, in the order of
+        # their letter at the wildcard
+        self._buckets: Dict[int, Dict[str, List[str]]] = dict()
+        # Same, for the words whose character at the wildcard is not one of
+        # `LETTERS`: they have neighbors there, but are nobody's neighbor
+        self._other_buckets: Dict[int, Dict[str, List[str]]] = dict()
+        # Word length -> word -> label of its component
+        self._components: Dict[int, Dict[str, int]] = dict()
+        self._num_components = 0
+
+    @classmethod
+    def from_file(cls, dict_file_path: str, label_components: bool = False) \
+            -> 'WordGraph':
+        return cls(load_words(dict_file_path), label_components)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def neighbors(self, word: str) -> Iterator[str]:
+        buckets = self._length_buckets(len(word))
+        for i in range(len(word)):
+            bucket = buckets.get(_pattern(word, i))
+            if bucket is not None:
+                for neighbor in bucket:
+                    if neighbor != word:
+                        yield neighbor
+
+    def predecessors(self, word: str) -> Iterator[str]:
+        buckets = self._length_buckets(len(word))
+        other_buckets = self._other_buckets[len(word)]
+        for i, letter in enumerate(word):
+            if letter not in _LETTERS:
+                continue
+            pattern = _pattern(word, i)
+            for bucket in (buckets.get(pattern, ()),
+                           other_buckets.get(pattern, ())):
+                for predecessor in bucket:
+                    if predecessor != word:
+                        yield predecessor
+
+    def component(self, word: str) -> Optional[int]:
+        if not self.label_components:
+            return None
+        components = self._components.get(len(word))
+        if components is None:
+            components = self._label_components(len(word))
+        return components.get(word)
+
+    def _label_components(self, length: int) -> Dict[str, int]:
+        words = self._words_by_length.get(length, [])
+        ids = {word: i for i, word in enumerate(words)}
+        parents = list(range(len(words)))
+        sizes = [1] * len(words)
+
+        def find(i: int) -> int:
+            while parents[i] != i:
+                # Path halving
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        buckets = self._length_buckets(length)
+        other_buckets = self._other_buckets[length]
+        for pattern, bucket in buckets.items():
+            # Every word of the bucket is a neighbor of all the others, and
+            # of the words with the pattern and another character there
+            group = bucket + other_buckets.get(pattern, [])
+            root = find(ids[group[0]])
+            for word in group[1:]:
+                other_root = find(ids[word])
+                if other_root != root:
+                    if sizes[root] < sizes[other_root]:
+                        root, other_root = other_root, root
+                    parents[other_root] = root
+                    sizes[root] += sizes[other_root]
+
+        labels = dict()
+        components = dict()
+        for word, i in ids.items():
+            root = find(i)
+            if root not in labels:
+                labels[root] = self._num_components
+                self._num_components += 1
+            components[word] = labels[root]
+        self._components[length] = components
+        return components
+
+    def _length_buckets(self, length: int) -> Dict[str, List[str]]:
+        buckets = self._buckets.get(length)
+        if buckets is None:
+            buckets = dict()
+            other_buckets = dict()
+            for word in self._words_by_length.get(length, ()):
+                for i, letter in enumerate(word):
+                    if letter in _LETTERS:
+                        buckets.setdefault(_pattern(word, i), []).append(word)
+                    else:
+                        other_buckets.setdefault(
+                            _pattern(word, i), []).append(word)
+            # The words of a bucket only differ at the wildcard, so this
+            # sorts them by their letter there
+            for bucket in buckets.values():
+                bucket.sort()
+            self._buckets[length] = buckets
+            self._other_buckets[length] = other_buckets
+        return buckets
+
+
+def _trace_path(parents: Dict[str, Optional[str]], word: str) -> List[str]:
+    # Follow the parent pointers from `word` back to the start
+    path = [word]
+    while parents[path[-1]] is not None:
+        path.append(parents[path[-1]])
+    return path[::-1]
+
+
+def _hamming(word: str, other_word: str) -> int:
+    # Number of positions where two words of the same length differ
+    return sum(1 for a, b in zip(word, other_word) if a != b)
+
+
+def _pattern(word: str, i: int) -> str:
+    return word[:i] + _WILDCARD + word[i + 1:]
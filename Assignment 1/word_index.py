@@ -0,0 +1,225 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from word_graph import LETTERS, LadderGraph, WordGraph
+
+# First bytes of an index file
+MAGIC = b'WORDIDX\0'
+# Bumped whenever the layout of index files changes
+_INDEX_VERSION = 1
+# Version, byte order (0: little-endian, 1: big-endian), number of words,
+# of word lengths, of neighbor and of predecessor entries, bytes of text
+_HEADER = struct.Struct('=7I')
+_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def is_index(path: str) -> bool:
+    """Return whether `path` is an index written by `build_index`."""
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_graph(dictionary: str, label_components: bool = False) \
+        -> LadderGraph:
+    """Open `dictionary`: an index written by `build_index`, memory-mapped,
+    or else a dictionary file, whose components are labeled on demand with
+    `label_components` (indexes store their labels)."""
+    if is_index(dictionary):
+        return MappedWordGraph(dictionary)
+    return WordGraph.from_file(dictionary, label_components)
+
+
+def build_index(dict_file_path: str, index_path: str) -> int:
+    """
+    Write the word ladder graph of a dictionary to `index_path`, for
+    `MappedWordGraph`, and return the number of words.
+
+    The index is a header followed by arrays of 32-bit integers, that are
+    used in place once the file is memory-mapped:
+    - The words are numbered in order of length, then alphabetically, and
+      a table gives the first number and count of each length.
+    - The UTF-8 text of word `i` is `text[offsets[i]:offsets[i + 1]]`.
+    - The neighbors of word `i` are words
+      `neighbors[neighbor_ptr[i]:neighbor_ptr[i + 1]]`, in the order of
+      `LadderGraph.neighbors` (compressed sparse rows); its predecessors
+      are stored likewise.
+    - `components[i]` is the label of the connected component of word `i`.
+    """
+    graph = WordGraph.from_file(dict_file_path, label_components=True)
+    words = sorted(graph.words, key=lambda word: (len(word), word))
+    ids = {word: i for i, word in enumerate(words)}
+
+    lengths = array('I')
+    for i, word in enumerate(words):
+        if i == 0 or len(word) != len(words[i - 1]):
+            lengths.extend((len(word), i, 0))
+        lengths[-1] += 1
+
+    offsets = array('I', [0])
+    text = bytearray()
+    neighbor_ptr = array('I', [0])
+    neighbors = array('I')
+    predecessor_ptr = array('I', [0])
+    predecessors = array('I')
+    components = array('I')
+    for word in words:
+        text += word.encode()
+        offsets.append(len(text))
+        neighbors.extend(ids[neighbor] for neighbor in graph.neighbors(word))
+        neighbor_ptr.append(len(neighbors))
+        predecessors.extend(ids[predecessor]
+                            for predecessor in graph.predecessors(word))
+        predecessor_ptr.append(len(predecessors))
+        components.append(graph.component(word))
+
+    header = _HEADER.pack(_INDEX_VERSION, _BYTE_ORDER, len(words),
+                          len(lengths) // 3, len(neighbors), len(predecessors),
+                          len(text))
+    index_path = Path(index_path)
+    fd, temp_path = tempfile.mkstemp(dir=index_path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(MAGIC)
+            file.write(header)
+            for table in (lengths, offsets, neighbor_ptr, neighbors,
+                          predecessor_ptr, predecessors, components):
+                table.tofile(file)
+            file.write(text)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(words)
+
+
+class MappedWordGraph(LadderGraph):
+    """
+    The `LadderGraph` of an index written by `build_index`, memory-mapped:
+    opening it reads nothing but the header, and the pages of the arrays
+    are loaded by the OS as the searches touch them.
+
+    Words are looked up by binary search among the words of their length.
+    Indexes label the components of the words, so queries between
+    components are answered without searching.
+    """
+
+    def __init__(self, index_path: str):
+        with open(index_path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a word index: {index_path}")
+        position = len(MAGIC)
+        (version, byte_order, num_words, num_lengths, num_neighbors,
+         num_predecessors, text_bytes) = _HEADER.unpack_from(view, position)
+        if version != _INDEX_VERSION:
+            raise ValueError(f"Unsupported index version in {index_path}: "
+                             f"{version}")
+        if byte_order != _BYTE_ORDER:
+            raise ValueError(f"{index_path} was built on a machine with "
+                             f"another byte order")
+        position += _HEADER.size
+
+        def table(count: int) -> memoryview:
+            nonlocal position
+            start, position = position, position + 4 * count
+            return view[start:position].cast('I')
+
+        lengths = table(3 * num_lengths)
+        self._offsets = table(num_words + 1)
+        self._neighbor_ptr = table(num_words + 1)
+        self._neighbors = table(num_neighbors)
+        self._predecessor_ptr = table(num_words + 1)
+        self._predecessors = table(num_predecessors)
+        self._components = table(num_words)
+        self._text = view[position:position + text_bytes]
+        self._num_words = num_words
+        # Word length -> (first word number, number of words)
+        self._lengths: Dict[int, Tuple[int, int]] = {
+            lengths[i]: (lengths[i + 1], lengths[i + 2])
+            for i in range(0, len(lengths), 3)}
+        self._words: Dict[int, str] = dict()
+
+    def close(self) -> None:
+        for name in ('_offsets', '_neighbor_ptr', '_neighbors',
+                     '_predecessor_ptr', '_predecessors', '_components',
+                     '_text'):
+            getattr(self, name).release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'MappedWordGraph':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, word: str) -> bool:
+        return self._find(word) is not None
+
+    def __len__(self) -> int:
+        return self._num_words
+
+    def neighbors(self, word: str) -> Iterator[str]:
+        i = self._find(word)
+        if i is None:
+            # Not in the dictionary (e.g. a capitalized start word): probe
+            # every candidate, as `submission.word_path` does
+            for position in range(len(word)):
+                for letter in LETTERS:
+                    candidate = word[:position] + letter + word[position + 1:]
+                    if candidate != word and candidate in self:
+                        yield candidate
+            return
+        for j in self._neighbors[self._neighbor_ptr[i]:
+                                 self._neighbor_ptr[i + 1]]:
+            yield self._word(j)
+
+    def predecessors(self, word: str) -> Iterator[str]:
+        i = self._find(word)
+        if i is None:
+            return
+        for j in self._predecessors[self._predecessor_ptr[i]:
+                                    self._predecessor_ptr[i + 1]]:
+            yield self._word(j)
+
+    def component(self, word: str) -> Optional[int]:
+        i = self._find(word)
+        return self._components[i] if i is not None else None
+
+    def _word(self, i: int) -> str:
+        word = self._words.get(i)
+        if word is None:
+            word = bytes(
+                self._text[self._offsets[i]:self._offsets[i + 1]]).decode()
+            self._words[i] = word
+        return word
+
+    def _find(self, word: str) -> Optional[int]:
+        # Binary search among the words of the same length
+        low, count = self._lengths.get(len(word), (0, 0))
+        high = low + count
+        key = word.encode()
+        offsets, text = self._offsets, self._text
+        while low < high:
+            middle = (low + high) // 2
+            candidate = text[offsets[middle]:offsets[middle + 1]]
+            if candidate == key:
+                return middle
+            if bytes(candidate) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
@@ -1,19 +1,145 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
+from typing import List
+
+
+def build_index(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog=f"{sys.argv[0]} build-index",
+        description="Prebuild the word graph of DICTIONARY into an index "
+                    "file, that can be passed instead of DICTIONARY to "
+                    "answer queries without reading the dictionary.",
+    )
+    parser.add_argument(
+        'dict_file_path',
+        metavar="DICTIONARY",
+        help="The dictionary file",
+    )
+    parser.add_argument(
+        '--output',
+        metavar="PATH",
+        help="The index file (default: DICTIONARY.idx)",
+    )
+    args = parser.parse_args(argv)
+
+    import word_index
+    output = args.output or f"{args.dict_file_path}.idx"
+    num_words = word_index.build_index(args.dict_file_path, output)
+    print(f"Indexed {num_words} words into {output}")
+
+
+def batch(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog=f"{sys.argv[0]} batch",
+        description="Answer many queries with one loaded DICTIONARY: read "
+                    "one START TARGET pair per line of QUERIES, and print "
+                    "each ladder on one line (or \"No solution\"), in order.",
+    )
+    parser.add_argument(
+        'dict_file_path',
+        metavar="DICTIONARY",
+        help="The dictionary file, or an index built by build-index",
+    )
+    parser.add_argument(
+        'queries',
+        metavar="QUERIES",
+        nargs='?',
+        default='-',
+        help="The file of queries (default: standard input)",
+    )
+    parser.add_argument(
+        '--algorithm',
+        choices=('bfs', 'bidirectional', 'astar'),
+        default='bfs',
+        help="Search from START only, from both ends (same result), or "
+             "A* toward TARGET (a ladder as short, expanding fewer words; "
+             "default: %(default)s)",
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=128,
+        metavar="N",
+        help="Keep the BFS trees of the N most recently used hot start "
+             "words (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--hot-threshold',
+        type=int,
+        default=2,
+        metavar="N",
+        help="Build the BFS tree of a start word once it is queried N "
+             "times (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        metavar="N",
+        help="Answer chunks of queries on N worker processes "
+             "(default: answer each query as soon as it is read)",
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help="Print query statistics when done",
+    )
+    args = parser.parse_args(argv)
+
+    import word_batch
+    solver_options = dict(algorithm=args.algorithm,
+                          cache_size=args.cache_size,
+                          hot_threshold=args.hot_threshold)
+    queries = (sys.stdin if args.queries == '-'
+               else open(args.queries, 'r', encoding='utf-8'))
+    try:
+        if args.processes is not None:
+            worker_stats = dict()
+            for answer in word_batch.answer_lines_parallel(
+                    args.dict_file_path, queries, args.processes,
+                    stats=worker_stats, **solver_options):
+                print(answer)
+            stats = list(worker_stats.values())
+        else:
+            from word_index import load_graph
+            # Labeling the components pays off over many queries
+            solver = word_batch.LadderSolver(
+                load_graph(args.dict_file_path, label_components=True),
+                **solver_options)
+            for answer in word_batch.answer_lines(solver, queries):
+                print(answer, flush=True)
+            stats = [solver.stats()]
+    finally:
+        if queries is not sys.stdin:
+            queries.close()
+
+    if args.stats:
+        for solver_stats in stats:
+            print(solver_stats, file=sys.stderr)
 
 
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == 'build-index':
+        build_index(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="""
         Print a shortest sequence of words in DICTIONARY from START to TARGET.
         If no sequence is found, print the string \"No solution\".
+        Run `%(prog)s build-index DICTIONARY` to prebuild an index for
+        faster queries, and `%(prog)s batch DICTIONARY` to answer many
+        queries at once.
         """,
     )
     parser.add_argument(
         'dict_file_path',
         metavar="DICTIONARY",
-        help="The dictionary file",
+        help="The dictionary file, or an index built by build-index",
     )
     parser.add_argument(
         'start_word',
@@ -25,16 +151,41 @@ def main() -> None:
         metavar="TARGET",
         help="The target word",
     )
+    parser.add_argument(
+        '--algorithm',
+        choices=('bfs', 'bidirectional', 'astar'),
+        default='bfs',
+        help="Search from START only, from both ends (same result), or "
+             "A* toward TARGET (a ladder as short, expanding fewer words; "
+             "default: %(default)s)",
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help="Print the number of words expanded by the search",
+    )
     args = parser.parse_args()
 
-    import submission
-    words = submission.word_path(
-        args.dict_file_path, args.start_word, args.target_word)
+    # The searches of `WordGraph` find the same ladders as
+    # `submission.word_path`, which rereads the dictionary on every call;
+    # that reference implementation is no longer used here, only by
+    # test_word_graph.py and bench_word_path.py to check (and time) the
+    # graph searches against
+    from word_index import load_graph
+    graph = load_graph(args.dict_file_path)
+    if args.algorithm == 'bidirectional':
+        words = graph.bidirectional_path(args.start_word, args.target_word)
+    elif args.algorithm == 'astar':
+        words = graph.astar_path(args.start_word, args.target_word)
+    else:
+        words = graph.shortest_path(args.start_word, args.target_word)
     if words:
         for word in words:
             print(word)
     else:
         print("No solution")
+    if args.stats:
+        print(f"{graph.num_expanded} words expanded", file=sys.stderr)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+# Landmarks of the RIT map routed between by the benchmarks
+RIT_ROUTES = [
+    ('Golisano_Hall', 'Global_Village_Plaza'),
+    ('Golisano_Hall', 'NTID'),
+    ('Riverknoll_Apartments', 'The_Province'),
+]
+
+
+def load_rit_map(args: argparse.Namespace):
+    from map_utils import create_map_with_landmarks
+
+    return create_map_with_landmarks(args.map, args.landmarks)
+
+
+def rit_queries(city_map) -> list[tuple[str, str, str]]:
+    """Return (description, start location, end tag) of the RIT routes."""
+    from city_map import get_first_location_with_tag, make_tag
+
+    queries = list()
+    for start, end in RIT_ROUTES:
+        start_location = get_first_location_with_tag(
+            make_tag('landmark', start), city_map)
+        end_tag = make_tag('landmark', end)
+        if start_location is not None:
+            queries.append((f"RIT {start} -> {end}", start_location, end_tag))
+    return queries
+
+
+def grid_query(size: int) -> tuple[str, str, str]:
+    """Return (description, start location, end tag) of the route between
+    the corners of a `size` x `size` grid."""
+    from city_map import make_tag
+    from test_utils import make_grid_label
+
+    return (f"{size}x{size} grid", make_grid_label(0, 0),
+            make_tag('label', make_grid_label(size - 1, size - 1)))
+
+
+def bench_compact(args: argparse.Namespace) -> None:
+    """Compare the memory of a `CityMap` with its `CompactCityMap`, and UCS
+    on both."""
+    import gc
+    import tracemalloc
+
+    from city_map import CompactCityMap
+    from map_utils import get_route_cost
+    from search import UniformCostSearch
+    from submission import ShortestPathProblem
+    from test_utils import create_grid_map
+
+    def load(name: str, make_map):
+        # Everything the maps keep was allocated while tracing, so that
+        # the compact map is charged for the labels it keeps too
+        gc.collect()
+        tracemalloc.start()
+        city_map = make_map()
+        map_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        compact_map = CompactCityMap.from_city_map(city_map)
+        convert_time = time.perf_counter() - start
+        del city_map
+        gc.collect()
+        compact_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name}: {len(compact_map)} locations, "
+              f"{len(compact_map.neighbors)} connections, CityMap "
+              f"{map_bytes / 1024:.0f} KiB, CompactCityMap "
+              f"{compact_bytes / 1024:.0f} KiB "
+              f"({map_bytes / compact_bytes:.1f}x less memory), "
+              f"built in {convert_time * 1000:.0f}ms")
+        return compact_map
+
+    for size in args.grid_sizes:
+        load(f"{size}x{size} grid", lambda: create_grid_map(size, size))
+    compact_rit_map = load("RIT map", lambda: load_rit_map(args))
+
+    # Searches on maps built again, as the first ones were freed
+    maps = [(query, create_grid_map(size, size))
+            for size, query in zip(args.grid_sizes,
+                                   map(grid_query, args.grid_sizes))]
+    rit_map = load_rit_map(args)
+    maps += [(query, rit_map) for query in rit_queries(compact_rit_map)]
+    for (name, start_location, end_tag), city_map in maps:
+        results = list()
+        for search_map in (city_map, CompactCityMap.from_city_map(city_map)):
+            search = UniformCostSearch()
+            problem = ShortestPathProblem(start_location, end_tag, search_map)
+            start = time.perf_counter()
+            search.solve(problem)
+            elapsed = time.perf_counter() - start
+            route = [start_location] + search.actions
+            results.append((route, get_route_cost(route, search_map),
+                            search.num_states_explored, elapsed))
+        (expected, expected_cost, explored, map_time), \
+            (actual, actual_cost, _, compact_time) = results
+        assert actual == expected and actual_cost == expected_cost, \
+            f"{name}: {actual_cost} != {expected_cost}"
+        print(f"{name}: cost {actual_cost:.1f}, {explored} states explored, "
+              f"UCS on CityMap {map_time * 1000:.1f}ms, on CompactCityMap "
+              f"{compact_time * 1000:.1f}ms")
+
+
+def solve_timed(search, problem) -> tuple[tuple, float]:
+    """Return the results of `search` on `problem`, and the seconds it
+    took."""
+    start = time.perf_counter()
+    search.solve(problem)
+    elapsed = time.perf_counter() - start
+    return (search.actions, search.path_cost, search.num_states_explored,
+            search.past_costs), elapsed
+
+
+def bench_kernel(args: argparse.Namespace) -> None:
+    """Compare the generic A* search on `State` objects with its integer
+    kernel on a `CompactCityMap`, with UCS and, on the RIT map, with a
+    straight-line heuristic."""
+    from city_map import CompactCityMap, compute_distance
+    from search import AStarSearch, Heuristic, State, UniformCostSearch
+    from submission import ShortestPathProblem
+    from test_utils import create_grid_map
+
+    class StraightLineHeuristic(Heuristic):
+        def __init__(self, end_location: str, city_map) -> None:
+            self.end = city_map.geolocations[end_location]
+            self.city_map = city_map
+
+        def evaluate(self, state: State) -> float:
+            return compute_distance(
+                self.city_map.geolocations[state.location], self.end)
+
+    class GenericProblem(ShortestPathProblem):
+        def location_graph(self):
+            return None
+
+    maps = [(grid_query(size), create_grid_map(size, size), False)
+            for size in args.grid_sizes]
+    rit_map = load_rit_map(args)
+    maps += [(query, rit_map, True) for query in rit_queries(rit_map)]
+    for (name, start_location, end_tag), city_map, astar in maps:
+        compact_map = CompactCityMap.from_city_map(city_map)
+        searches = [('UCS', UniformCostSearch)]
+        if astar:
+            end_location = compact_map.labels[
+                compact_map.locations_with_tag(end_tag)[0]]
+            searches.append(('A*', lambda: AStarSearch(
+                StraightLineHeuristic(end_location, compact_map))))
+        for search_name, make_search in searches:
+            expected, generic_time = solve_timed(
+                make_search(),
+                GenericProblem(start_location, end_tag, compact_map))
+            actual, kernel_time = solve_timed(
+                make_search(),
+                ShortestPathProblem(start_location, end_tag, compact_map))
+            assert actual == expected, f"{name}: {search_name} differs"
+            print(f"{name}: {search_name} cost {actual[1]:.1f}, "
+                  f"{actual[2]} states explored, generic "
+                  f"{generic_time * 1000:.1f}ms, kernel "
+                  f"{kernel_time * 1000:.1f}ms "
+                  f"({generic_time / kernel_time:.1f}x)")
+
+
+def dense_grid_map(size: int, max_cost: int, seed: int):
+    """Return a `size` x `size` grid map whose locations are also connected
+    diagonally, with random integer costs from 1 to `max_cost`."""
+    import random
+
+    from test_utils import create_grid_map, make_grid_label
+
+    rng = random.Random(seed)
+    city_map = create_grid_map(size, size)
+    for x in range(1, size):
+        for y in range(1, size):
+            city_map.add_connection(make_grid_label(x - 1, y - 1),
+                                    make_grid_label(x, y))
+            city_map.add_connection(make_grid_label(x - 1, y),
+                                    make_grid_label(x, y - 1))
+    for source, targets in city_map.distances.items():
+        for target in targets:
+            if source < target:
+                cost = rng.randint(1, max_cost)
+                targets[target] = city_map.distances[target][source] = cost
+    return city_map
+
+
+def bench_queues(args: argparse.Namespace) -> None:
+    """Compare the lazy-deletion `PriorityQueue` with `IndexedPriorityQueue`
+    and `BucketQueue` as UCS frontiers."""
+    from search import BucketQueue, IndexedPriorityQueue, PriorityQueue, \
+        UniformCostSearch
+    from submission import ShortestPathProblem
+
+    maps = [((f"{size}x{size} dense grid",) + grid_query(size)[1:],
+             dense_grid_map(size, args.max_cost, 0), 1.0)
+            for size in args.grid_sizes]
+    rit_map = load_rit_map(args)
+    maps += [(query, rit_map, args.bucket_width)
+             for query in rit_queries(rit_map)]
+    for (name, start_location, end_tag), city_map, bucket_width in maps:
+        problem = ShortestPathProblem(start_location, end_tag, city_map)
+        expected = None
+        for queue_name, make_frontier in [
+                ('PriorityQueue', PriorityQueue),
+                ('IndexedPriorityQueue', IndexedPriorityQueue),
+                (f'BucketQueue({bucket_width:g})',
+                 lambda: BucketQueue(bucket_width))]:
+            search = UniformCostSearch(make_frontier=make_frontier)
+            actual, elapsed = solve_timed(search, problem)
+            if expected is None:
+                expected = actual
+                print(f"{name}: cost {actual[1]:.1f}, "
+                      f"{actual[2]} states explored")
+            assert actual == expected, f"{name}: {queue_name} differs"
+            print(f"  {queue_name}: {elapsed * 1000:.1f}ms, "
+                  f"{search.frontier.stats()}")
+
+
+def bench_bidirectional(args: argparse.Namespace) -> None:
+    """Compare the states explored by UCS and A* searching from the start,
+    and searching from both ends with `BidirectionalSearch`."""
+    from city_map import CompactCityMap, compute_distance, make_tag
+    from map_utils import get_route_cost
+    from search import AStarSearch, BidirectionalSearch, Heuristic, State, \
+        UniformCostSearch
+    from submission import ShortestPathProblem
+    from test_utils import create_grid_map, make_grid_label
+
+    class StraightLineHeuristic(Heuristic):
+        def __init__(self, location: str, city_map) -> None:
+            self.geolocation = city_map.geolocations[location]
+            self.city_map = city_map
+
+        def evaluate(self, state: State) -> float:
+            return compute_distance(
+                self.city_map.geolocations[state.location], self.geolocation)
+
+    # Routes across the middle of the grids (the straight-line distance
+    # overestimates their unit costs, so A* is only run on the RIT map)
+    maps = [((f"{size}x{size} grid", make_grid_label(size // 4, size // 2),
+              make_tag('label', make_grid_label(3 * size // 4, size // 2))),
+             CompactCityMap.from_city_map(create_grid_map(size, size)), False)
+            for size in args.grid_sizes]
+    rit_map = CompactCityMap.from_city_map(load_rit_map(args))
+    maps += [(query, rit_map, True) for query in rit_queries(rit_map)]
+    for (name, start_location, end_tag), city_map, astar in maps:
+        searches = [('UCS', UniformCostSearch()),
+                    ('bidirectional UCS', BidirectionalSearch())]
+        if astar:
+            end_location = city_map.labels[
+                city_map.locations_with_tag(end_tag)[0]]
+            to_end = StraightLineHeuristic(end_location, city_map)
+            to_start = StraightLineHeuristic(start_location, city_map)
+            searches += [('A*', AStarSearch(to_end)),
+                         ('bidirectional A*',
+                          BidirectionalSearch(to_end, to_start))]
+        problem = ShortestPathProblem(start_location, end_tag, city_map)
+        expected_cost = None
+        for search_name, search in searches:
+            (actions, _, explored, _), elapsed = solve_timed(search, problem)
+            cost = get_route_cost([start_location] + actions, city_map)
+            if expected_cost is None:
+                expected_cost = cost
+                print(f"{name}: cost {cost:.1f}")
+            assert abs(cost - expected_cost) < 1e-6, \
+                f"{name}: {search_name} cost {cost} != {expected_cost}"
+            sides = ""
+            if isinstance(search, BidirectionalSearch):
+                sides = (f" ({search.forward_explored} forward, "
+                         f"{search.backward_explored} backward)")
+            print(f"  {search_name}: {explored} states explored{sides} in "
+                  f"{elapsed * 1000:.1f}ms")
+
+
+def bench_contraction(args: argparse.Namespace) -> None:
+    """Compare random route queries answered with a `ContractionHierarchy`
+    with the UCS kernel and `BidirectionalSearch`, after building, saving
+    and loading the hierarchy."""
+    import os
+    import random
+    import tempfile
+
+    from city_map import CompactCityMap, make_tag
+    from contraction import ContractionHierarchy, ContractionHierarchySearch
+    from map_utils import get_route_cost
+    from search import BidirectionalSearch, UniformCostSearch
+    from submission import ShortestPathProblem
+    from test_utils import create_grid_map
+
+    maps = [(f"{size}x{size} grid",
+             CompactCityMap.from_city_map(create_grid_map(size, size)))
+            for size in args.grid_sizes]
+    maps.append(("RIT map", CompactCityMap.from_city_map(load_rit_map(args))))
+    rng = random.Random(0)
+    for name, city_map in maps:
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(city_map)
+        build_time = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'map.ch')
+            hierarchy.save(path)
+            file_size = os.path.getsize(path)
+            start = time.perf_counter()
+            hierarchy = ContractionHierarchy.load(path)
+            load_time = time.perf_counter() - start
+        print(f"{name}: {len(city_map)} locations contracted in "
+              f"{build_time:.1f}s, {hierarchy.num_shortcuts} shortcuts, "
+              f"{file_size / 1024:.0f} KiB file loaded in "
+              f"{load_time * 1000:.0f}ms")
+
+        totals = {'UCS': [0, 0.0], 'bidirectional UCS': [0, 0.0],
+                  'contraction hierarchy': [0, 0.0]}
+        for _ in range(args.queries):
+            start_location = rng.choice(city_map.labels)
+            end_tag = make_tag('label', rng.choice(city_map.labels))
+            problem = ShortestPathProblem(start_location, end_tag, city_map)
+            costs = list()
+            for search_name, search in [
+                    ('UCS', UniformCostSearch()),
+                    ('bidirectional UCS', BidirectionalSearch()),
+                    ('contraction hierarchy',
+                     ContractionHierarchySearch(hierarchy))]:
+                (actions, path_cost, explored, _), elapsed = solve_timed(
+                    search, problem)
+                totals[search_name][0] += explored
+                totals[search_name][1] += elapsed
+                costs.append(path_cost)
+            route = [start_location] + actions
+            assert path_cost == get_route_cost(route, city_map), \
+                f"{name}: {path_cost} != {get_route_cost(route, city_map)}"
+            assert abs(costs[0] - path_cost) < 1e-6, \
+                f"{name}: {route} costs {path_cost}, not {costs[0]}"
+        for search_name, (explored, elapsed) in totals.items():
+            print(f"  {search_name}: {explored / args.queries:.0f} states "
+                  f"explored in {elapsed / args.queries * 1000:.2f}ms "
+                  f"per query")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the route searches.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    # Options of every benchmark, given after its name
+    maps_parser = argparse.ArgumentParser(add_help=False)
+    maps_parser.add_argument(
+        '-m', '--map', default='data/rit-map.pbf', help="Map file (.pbf)")
+    maps_parser.add_argument(
+        '-l', '--landmarks', default='data/rit-landmarks.json',
+        help="Landmark file (.json)")
+    maps_parser.add_argument(
+        '--grid-sizes', type=int, nargs='+', default=[50, 200],
+        help="Sizes of the square grid maps")
+    subparsers = parser.add_subparsers(
+        required=True,
+        dest='benchmark',
+        title="benchmarks",
+    )
+    compact_parser = subparsers.add_parser(
+        'compact',
+        help="Compare CityMap with CompactCityMap",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[maps_parser],
+    )
+    compact_parser.set_defaults(func=bench_compact)
+
+    kernel_parser = subparsers.add_parser(
+        'kernel',
+        help="Compare A* on State objects with its integer kernel",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[maps_parser],
+    )
+    kernel_parser.set_defaults(func=bench_kernel)
+
+    queues_parser = subparsers.add_parser(
+        'queues',
+        help="Compare the priority queues of the UCS frontier",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[maps_parser],
+    )
+    queues_parser.add_argument(
+        '--max-cost', type=int, default=10,
+        help="Highest random cost of the connections of the dense grids")
+    queues_parser.add_argument(
+        '--bucket-width', type=float, default=5.0,
+        help="Bucket width on the RIT map, in meters")
+    queues_parser.set_defaults(func=bench_queues)
+
+    bidirectional_parser = subparsers.add_parser(
+        'bidirectional',
+        help="Compare one-directional and bidirectional searches",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[maps_parser],
+    )
+    bidirectional_parser.set_defaults(func=bench_bidirectional)
+
+    contraction_parser = subparsers.add_parser(
+        'contraction',
+        help="Compare queries on a contraction hierarchy with searches",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        parents=[maps_parser],
+    )
+    contraction_parser.add_argument(
+        '--queries', type=int, default=200,
+        help="Number of random queries on each map")
+    # Grids need many shortcuts, and long to contract
+    contraction_parser.set_defaults(func=bench_contraction,
+                                    grid_sizes=[50, 100])
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
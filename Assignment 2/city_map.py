@@ -1,4 +1,6 @@
+from array import array
 from collections import defaultdict
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
 from math import asin, cos, radians, sin, sqrt
 from typing import Optional
@@ -28,6 +30,9 @@ UNIT_DELTA = 0.00001
 #
 #   - `distances` [str -> [str -> float]]: A nested dictionary mapping pairs of
 #     locations to distances (e.g. `distances[label1][label2] = 21.3`).
+#
+# - `CompactCityMap`: A frozen copy of a `CityMap` where locations are numbered
+#   and stored in flat arrays, which offers the same (read-only) lookups.
 
 
 @dataclass(frozen=True)
@@ -87,6 +92,189 @@ class CityMap:
         self.distances[target][source] = distance
 
 
+class CompactCityMap:
+    """
+    A frozen copy of a `CityMap` in compressed sparse row form, built with
+    `CompactCityMap.from_city_map`.
+
+    Locations are numbered from 0 in the order of their labels, so that
+    comparing ids compares labels:
+    - `labels[i]` is the label of location `i`, and `ids[label]` its id.
+    - `latitudes[i]` and `longitudes[i]` are its coordinates.
+    - Its neighbors are `neighbors[offsets[i]:offsets[i + 1]]`, at distances
+      `weights[offsets[i]:offsets[i + 1]]`, in the order of
+      `CityMap.distances`.
+    - Its tags are the `label=` tag (added to every location by
+      `CityMap.add_location`) followed by
+      `tag_names[tag_ids[tag_offsets[i]:tag_offsets[i + 1]]]`.
+
+    `geolocations`, `tags` and `distances` are read-only mappings with the
+    same content as those of the `CityMap`, so that the search problems and
+    the functions of `map_utils` run on either.
+    """
+    def __init__(
+            self,
+            labels: list[str],
+            latitudes: array,
+            longitudes: array,
+            offsets: array,
+            neighbors: array,
+            weights: array,
+            tag_names: list[str],
+            tag_offsets: array,
+            tag_ids: array,
+    ) -> None:
+        self.labels = labels
+        self.ids: dict[str, int] = {label: i for i, label in enumerate(labels)}
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+        self.tag_names = tag_names
+        self.tag_offsets = tag_offsets
+        self.tag_ids = tag_ids
+        # Tag -> ids of the locations bearing it, built on first use
+        self._tag_index: Optional[dict[str, list[int]]] = None
+
+        self.geolocations: Mapping[str, Geolocation] = _GeolocationsView(self)
+        self.tags: Mapping[str, list[str]] = _TagsView(self)
+        self.distances: Mapping[str, Mapping[str, float]] = \
+            _DistancesView(self)
+
+    @classmethod
+    def from_city_map(cls, city_map: CityMap) -> 'CompactCityMap':
+        """Return a compact copy of `city_map`."""
+        labels = sorted(city_map.geolocations)
+        ids = {label: i for i, label in enumerate(labels)}
+        latitudes, longitudes = array('d'), array('d')
+        offsets, neighbors, weights = array('I', [0]), array('I'), array('d')
+        tag_names: list[str] = list()
+        tag_numbers: dict[str, int] = dict()
+        tag_offsets, tag_ids = array('I', [0]), array('I')
+        for label in labels:
+            geolocation = city_map.geolocations[label]
+            latitudes.append(geolocation.latitude)
+            longitudes.append(geolocation.longitude)
+
+            for neighbor, distance in city_map.distances.get(label, {}).items():
+                neighbors.append(ids[neighbor])
+                weights.append(distance)
+            offsets.append(len(neighbors))
+
+            tags = city_map.tags.get(label, [])
+            if len(tags) > 0 and tags[0] == make_tag("label", label):
+                tags = tags[1:]
+            for tag in tags:
+                number = tag_numbers.get(tag)
+                if number is None:
+                    number = tag_numbers[tag] = len(tag_names)
+                    tag_names.append(tag)
+                tag_ids.append(number)
+            tag_offsets.append(len(tag_ids))
+        return cls(labels, latitudes, longitudes, offsets, neighbors, weights,
+                   tag_names, tag_offsets, tag_ids)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def successors(self, node: int) -> Iterator[tuple[int, float]]:
+        """Return the (neighbor id, distance) pairs of location `node`."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.neighbors[start:end], self.weights[start:end])
+
+    def node_tags(self, node: int) -> list[str]:
+        """Return the tags of location `node`, starting with its label."""
+        tag_names = self.tag_names
+        return [make_tag("label", self.labels[node])] + [
+            tag_names[number] for number in
+            self.tag_ids[self.tag_offsets[node]:self.tag_offsets[node + 1]]]
+
+    def locations_with_tag(self, tag: str) -> list[int]:
+        """Return the ids of the locations bearing `tag`, in order."""
+        key, _, value = tag.partition("=")
+        if key == "label":
+            node = self.ids.get(value)
+            return [node] if node is not None else []
+        if self._tag_index is None:
+            index: dict[str, list[int]] = defaultdict(list)
+            tag_names, tag_ids, tag_offsets = \
+                self.tag_names, self.tag_ids, self.tag_offsets
+            for node in range(len(self.labels)):
+                for number in tag_ids[tag_offsets[node]:tag_offsets[node + 1]]:
+                    nodes = index[tag_names[number]]
+                    # A location may bear the same tag twice
+                    if len(nodes) == 0 or nodes[-1] != node:
+                        nodes.append(node)
+            self._tag_index = dict(index)
+        return self._tag_index.get(tag, [])
+
+
+class _LocationsView(Mapping):
+    """A read-only mapping keyed by the labels of a `CompactCityMap`."""
+    def __init__(self, city_map: CompactCityMap) -> None:
+        self._map = city_map
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._map.labels)
+
+    def __len__(self) -> int:
+        return len(self._map.labels)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._map.ids
+
+
+class _GeolocationsView(_LocationsView):
+    """`CompactCityMap.geolocations`: label -> Geolocation."""
+    def __getitem__(self, label: str) -> Geolocation:
+        node = self._map.ids[label]
+        return Geolocation(self._map.latitudes[node],
+                           self._map.longitudes[node])
+
+
+class _TagsView(_LocationsView):
+    """`CompactCityMap.tags`: label -> list of tags."""
+    def __getitem__(self, label: str) -> list[str]:
+        return self._map.node_tags(self._map.ids[label])
+
+
+class _DistancesView(_LocationsView):
+    """`CompactCityMap.distances`: label -> adjacent label -> distance."""
+    def __getitem__(self, label: str) -> Mapping[str, float]:
+        return _AdjacencyView(self._map, self._map.ids[label])
+
+
+class _AdjacencyView(Mapping):
+    """The adjacent locations of one location of a `CompactCityMap`."""
+    def __init__(self, city_map: CompactCityMap, node: int) -> None:
+        self._map = city_map
+        self._start = city_map.offsets[node]
+        self._end = city_map.offsets[node + 1]
+
+    def __getitem__(self, label: str) -> float:
+        node = self._map.ids.get(label)
+        neighbors = self._map.neighbors
+        for i in range(self._start, self._end):
+            if neighbors[i] == node:
+                return self._map.weights[i]
+        raise KeyError(label)
+
+    def __iter__(self) -> Iterator[str]:
+        labels = self._map.labels
+        return (labels[neighbor] for neighbor in
+                self._map.neighbors[self._start:self._end])
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def items(self) -> list[tuple[str, float]]:
+        labels = self._map.labels
+        return [(labels[neighbor], weight) for neighbor, weight in zip(
+            self._map.neighbors[self._start:self._end],
+            self._map.weights[self._start:self._end])]
+
+
 ################################################################################
 # Utility Functions
 
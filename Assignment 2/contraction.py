@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+
+import argparse
+import heapq
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional
+
+from city_map import CompactCityMap
+from search import SearchAlgorithm, SearchProblem
+
+# First bytes of a contraction hierarchy file
+MAGIC = b'CHIERAR\0'
+# Bumped whenever the layout of hierarchy files changes
+_FILE_VERSION = 1
+# Version, byte order (0: little-endian, 1: big-endian), number of nodes, of
+# upward connections, bytes of label text
+_HEADER = struct.Struct('=5I')
+_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+# Nodes settled by a witness search before it gives up, adding a shortcut
+WITNESS_SETTLED_LIMIT = 64
+
+
+class ContractionHierarchy:
+    """
+    A contraction hierarchy of a `CompactCityMap`, built once by
+    `ContractionHierarchy.build` to answer many shortest path queries.
+
+    Locations are contracted one by one, least important first: a
+    contracted location is removed from the graph, and a shortcut is added
+    between two of its neighbors if the path through it was their only
+    shortest path.  `ranks[i]` is the order in which location `i` was
+    contracted.  A shortest path then goes up the ranks from the start and
+    from the end, so a query only searches upward from both sides.
+
+    Only upward connections are kept, in compressed sparse row form: the
+    higher-ranked neighbors of location `i` are
+    `neighbors[offsets[i]:offsets[i + 1]]`, at distances `weights[...]`,
+    through `middles[...]`: the location a shortcut bypasses, or -1 for a
+    connection of the map.  Node ids and `labels` are those of the map.
+    """
+    def __init__(
+            self,
+            labels: list[str],
+            ranks: array,
+            offsets: array,
+            neighbors: array,
+            weights: array,
+            middles: array,
+    ) -> None:
+        self.labels = labels
+        self.ids: dict[str, int] = {label: i for i, label in enumerate(labels)}
+        self.ranks = ranks
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+        self.middles = middles
+
+    @property
+    def num_shortcuts(self) -> int:
+        return sum(1 for middle in self.middles if middle >= 0)
+
+    @classmethod
+    def build(cls, city_map: CompactCityMap) -> 'ContractionHierarchy':
+        """Contract the locations of `city_map`, in order of their edge
+        difference (shortcuts added minus connections removed) plus their
+        number of contracted neighbors, which spreads contractions over the
+        map.  Priorities are updated lazily and for the neighbors of each
+        contracted location."""
+        num_nodes = len(city_map)
+        # Remaining graph: node -> neighbor -> (distance, middle)
+        graph: list[dict[int, tuple[float, int]]] = [
+            {neighbor: (weight, -1)
+             for neighbor, weight in city_map.successors(node)}
+            for node in range(num_nodes)]
+        contracted_neighbors = [0] * num_nodes
+        ranks = array('I', [0]) * num_nodes
+        upward: list[list[tuple[int, float, int]]] = [
+            [] for _ in range(num_nodes)]
+
+        def priority(node: int) -> int:
+            return (len(_shortcuts(graph, node)) - len(graph[node]) +
+                    contracted_neighbors[node])
+
+        priorities = [priority(node) for node in range(num_nodes)]
+        heap = [(value, node) for node, value in enumerate(priorities)]
+        heapq.heapify(heap)
+        contracted = bytearray(num_nodes)
+        rank = 0
+        while len(heap) > 0:
+            value, node = heapq.heappop(heap)
+            if contracted[node] or value != priorities[node]:
+                # Outdated priority, skip
+                continue
+            # Contracting others may have changed it: contract it only if
+            # it is still the lowest
+            value = priorities[node] = priority(node)
+            if len(heap) > 0 and (value, node) > heap[0]:
+                heapq.heappush(heap, (value, node))
+                continue
+
+            for source, target, distance in _shortcuts(graph, node):
+                existing = graph[source].get(target)
+                if existing is None or distance < existing[0]:
+                    graph[source][target] = graph[target][source] = \
+                        (distance, node)
+            upward[node] = [(neighbor, distance, middle) for
+                            neighbor, (distance, middle) in graph[node].items()]
+            for neighbor in graph[node]:
+                del graph[neighbor][node]
+                contracted_neighbors[neighbor] += 1
+            graph[node] = dict()
+            contracted[node] = 1
+            ranks[node] = rank
+            rank += 1
+            for neighbor, _, _ in upward[node]:
+                priorities[neighbor] = priority(neighbor)
+                heapq.heappush(heap, (priorities[neighbor], neighbor))
+
+        offsets, neighbors = array('I', [0]), array('I')
+        weights, middles = array('d'), array('i')
+        for node in range(num_nodes):
+            for neighbor, distance, middle in upward[node]:
+                neighbors.append(neighbor)
+                weights.append(distance)
+                middles.append(middle)
+            offsets.append(len(neighbors))
+        return cls(list(city_map.labels), ranks, offsets, neighbors, weights,
+                   middles)
+
+    def save(self, path: str) -> None:
+        """Write the hierarchy to `path`, for `ContractionHierarchy.load`:
+        a header, the arrays, then the offsets and UTF-8 text of the
+        labels."""
+        text = bytearray()
+        label_offsets = array('I', [0])
+        for label in self.labels:
+            text += label.encode()
+            label_offsets.append(len(text))
+        header = _HEADER.pack(_FILE_VERSION, _BYTE_ORDER, len(self.labels),
+                              len(self.neighbors), len(text))
+        path = Path(path)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(MAGIC)
+                file.write(header)
+                for table in (self.ranks, self.offsets, self.neighbors,
+                              self.weights, self.middles, label_offsets):
+                    table.tofile(file)
+                file.write(text)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'ContractionHierarchy':
+        """Read a hierarchy written by `save`."""
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a contraction hierarchy: {path}")
+            (version, byte_order, num_nodes, num_connections,
+             text_bytes) = _HEADER.unpack(file.read(_HEADER.size))
+            if version != _FILE_VERSION:
+                raise ValueError(f"Unsupported hierarchy version in {path}: "
+                                 f"{version}")
+            if byte_order != _BYTE_ORDER:
+                raise ValueError(f"{path} was built on a machine with "
+                                 f"another byte order")
+
+            def table(typecode: str, count: int) -> array:
+                values = array(typecode)
+                values.fromfile(file, count)
+                return values
+
+            ranks = table('I', num_nodes)
+            offsets = table('I', num_nodes + 1)
+            neighbors = table('I', num_connections)
+            weights = table('d', num_connections)
+            middles = table('i', num_connections)
+            label_offsets = table('I', num_nodes + 1)
+            text = file.read(text_bytes)
+        labels = [text[label_offsets[i]:label_offsets[i + 1]].decode()
+                  for i in range(num_nodes)]
+        return cls(labels, ranks, offsets, neighbors, weights, middles)
+
+    def shortest_path(self, start: int, ends: Iterable[int]) \
+            -> tuple[Optional[list[tuple[int, float]]], int]:
+        """
+        Return the shortest path from node `start` to any of `ends`, as the
+        (node, distance from the previous node) steps after `start` in the
+        map, or None if there is none, with the number of nodes explored.
+
+        Both searches only follow upward connections, from the start and
+        from every end, and each stops once its nearest node is farther
+        than the best path through a node reached by both.
+        """
+        offsets, neighbors = self.offsets, self.neighbors
+        weights = self.weights
+        # Everything per side: 0 searches from the start, 1 from the ends
+        costs: tuple[dict[int, float], dict[int, float]] = ({start: 0.0}, {})
+        # Node -> (previous node, index of the connection between them)
+        parents: tuple[dict[int, tuple[int, int]],
+                       dict[int, tuple[int, int]]] = ({}, {})
+        heaps = ([(0.0, start)], list())
+        for end in ends:
+            costs[1][end] = 0.0
+            heaps[1].append((0.0, end))
+        explored = (set(), set())
+
+        best_cost, meeting = float('inf'), -1
+        while True:
+            active = [side for side in (0, 1)
+                      if len(heaps[side]) > 0 and heaps[side][0][0] < best_cost]
+            if len(active) == 0:
+                break
+            side = min(active, key=lambda side: heaps[side][0][0])
+            cost, node = heapq.heappop(heaps[side])
+            if node in explored[side]:
+                # Outdated priority, skip
+                continue
+            explored[side].add(node)
+            other_cost = costs[1 - side].get(node)
+            if other_cost is not None and cost + other_cost < best_cost:
+                best_cost, meeting = cost + other_cost, node
+
+            side_costs = costs[side]
+            for index in range(offsets[node], offsets[node + 1]):
+                neighbor = neighbors[index]
+                new_cost = cost + weights[index]
+                if new_cost < side_costs.get(neighbor, float('inf')):
+                    side_costs[neighbor] = new_cost
+                    parents[side][neighbor] = (node, index)
+                    heapq.heappush(heaps[side], (new_cost, neighbor))
+
+        num_explored = len(explored[0]) + len(explored[1])
+        if meeting < 0:
+            return None, num_explored
+
+        # Connections down from the meeting node to the start, reversed,
+        # then down to an end, each as (from, to, connection index)
+        connections = list()
+        node = meeting
+        while node != start:
+            previous, index = parents[0][node]
+            connections.append((previous, node, index))
+            node = previous
+        connections.reverse()
+        node = meeting
+        while node in parents[1]:
+            previous, index = parents[1][node]
+            connections.append((node, previous, index))
+            node = previous
+
+        steps: list[tuple[int, float]] = list()
+        for source, target, index in connections:
+            self._unpack(source, target, index, steps)
+        return steps, num_explored
+
+    def _connection(self, lower: int, higher: int) -> int:
+        """Return the index of the upward connection of `lower` to
+        `higher`."""
+        for index in range(self.offsets[lower], self.offsets[lower + 1]):
+            if self.neighbors[index] == higher:
+                return index
+        raise KeyError((lower, higher))
+
+    def _unpack(
+            self,
+            source: int,
+            target: int,
+            index: int,
+            steps: list[tuple[int, float]],
+    ) -> None:
+        """Append the steps of the map from `source` to `target`, joined by
+        connection number `index`, to `steps`."""
+        pending = [(source, target, index)]
+        while len(pending) > 0:
+            source, target, index = pending.pop()
+            middle = self.middles[index]
+            if middle < 0:
+                steps.append((target, self.weights[index]))
+                continue
+            # Both halves of a shortcut are upward connections of the
+            # location it bypasses, which was contracted first
+            pending.append((middle, target, self._connection(middle, target)))
+            pending.append((source, middle, self._connection(middle, source)))
+
+
+class ContractionHierarchySearch(SearchAlgorithm):
+    """
+    Solves search problems whose states are plain locations (see
+    `SearchProblem.location_graph`) with a `ContractionHierarchy` of their
+    map, built beforehand.
+
+    `self.actions` is the route of the map, and `self.path_cost` the sum of
+    its distances in order, as `get_route_cost` computes it.
+    `self.past_costs` has the costs from the start along the route, as the
+    searches only explore upward connections.
+    """
+    def __init__(self, hierarchy: ContractionHierarchy, verbose: int = 0):
+        super().__init__()
+        self.hierarchy = hierarchy
+        self.verbose = verbose
+
+    def solve(self, problem: SearchProblem) -> None:
+        self.actions: list[str] = list()
+        self.path_cost: float = 0.0
+        self.num_states_explored: int = 0
+        self.past_costs: dict[str, float] = dict()
+
+        graph = problem.location_graph()
+        if graph is None:
+            raise ValueError("Contraction hierarchies only solve problems "
+                             "over plain locations")
+        labels, ids = self.hierarchy.labels, self.hierarchy.ids
+        start = ids[graph.labels[graph.start]]
+        ends = [ids[graph.labels[end]] for end in graph.ends]
+
+        steps, self.num_states_explored = self.hierarchy.shortest_path(
+            start, ends)
+        if steps is None:
+            if self.verbose >= 1:
+                print("Searched the entire search space!")
+            return
+        self.past_costs[labels[start]] = 0.0
+        for node, distance in steps:
+            self.actions.append(labels[node])
+            self.path_cost += distance
+            self.past_costs[labels[node]] = self.path_cost
+        if self.verbose >= 1:
+            print(f"{self.num_states_explored = }")
+            print(f"{self.path_cost = }")
+            print(f"{self.actions = }")
+
+
+def _shortcuts(graph: list[dict[int, tuple[float, int]]], node: int) \
+        -> list[tuple[int, int, float]]:
+    """Return the (source, target, distance) shortcuts needed to contract
+    `node`: pairs of its neighbors with no path as short that avoids it,
+    within `WITNESS_SETTLED_LIMIT` settled nodes."""
+    adjacent = graph[node]
+    if len(adjacent) < 2:
+        return []
+    shortcuts = list()
+    longest = max(distance for distance, _ in adjacent.values())
+    for source, (to_source, _) in adjacent.items():
+        targets = {target: to_source + to_target
+                   for target, (to_target, _) in adjacent.items()
+                   if target > source}
+        if len(targets) == 0:
+            continue
+        costs = _witness_costs(graph, source, node, to_source + longest)
+        for target, distance in targets.items():
+            if costs.get(target, float('inf')) > distance:
+                shortcuts.append((source, target, distance))
+    return shortcuts
+
+
+def _witness_costs(
+        graph: list[dict[int, tuple[float, int]]],
+        source: int,
+        avoid: int,
+        max_cost: float,
+) -> dict[int, float]:
+    """Return the costs of paths from `source` that avoid `avoid`, found by
+    a UCS that stops past `max_cost` or `WITNESS_SETTLED_LIMIT` nodes."""
+    costs = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while len(heap) > 0 and settled < WITNESS_SETTLED_LIMIT:
+        cost, node = heapq.heappop(heap)
+        if cost > costs[node]:
+            # Outdated priority, skip
+            continue
+        if cost > max_cost:
+            break
+        settled += 1
+        for neighbor, (distance, _) in graph[node].items():
+            if neighbor == avoid:
+                continue
+            new_cost = cost + distance
+            if new_cost < costs.get(neighbor, float('inf')):
+                costs[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost, neighbor))
+    return costs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the contraction hierarchy of a map, "
+                    "for ContractionHierarchySearch.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        '-m', '--map',
+        type=str,
+        default='data/rit-map.pbf',
+        help="Map file (.pbf)",
+    )
+    parser.add_argument(
+        '-l', '--landmarks',
+        type=str,
+        default='data/rit-landmarks.json',
+        help="Landmark file (.json)",
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        default='rit-map.ch',
+        help="Hierarchy file to write",
+    )
+    args = parser.parse_args()
+
+    # Do slow imports after argument parsing to speed up '--help',
+    # invalid argument messages, etc.
+    from map_utils import create_map_with_landmarks
+
+    city_map = CompactCityMap.from_city_map(
+        create_map_with_landmarks(args.map, args.landmarks))
+    hierarchy = ContractionHierarchy.build(city_map)
+    hierarchy.save(args.output)
+    print(f"Contracted {len(city_map)} locations of {args.map} "
+          f"({hierarchy.num_shortcuts} shortcuts) to:\n\t{args.output}")
+
+
+if __name__ == "__main__":
+    main()
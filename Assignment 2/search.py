@@ -1,7 +1,7 @@
-from collections.abc import Hashable
+from collections.abc import Collection, Hashable, Sequence
 from dataclasses import dataclass
 import heapq
-from typing import Optional
+from typing import Callable, Optional
 
 ################################################################################
 # Abstract Interfaces for State, Search Problems, and Search Algorithms
@@ -32,7 +32,33 @@ class State:
     custom_data: Optional[Hashable] = None
 
 
+@dataclass(frozen=True)
+class LocationGraph:
+    """
+    A search problem whose states are plain locations (`State(location)`,
+    without `custom_data`) of a fixed graph, with its locations numbered:
+    - `labels[i]` is the location of node `i`.  Nodes must be numbered in
+      the order of their labels, as states are ordered on ties.
+    - The successors of node `i` are nodes
+      `neighbors[offsets[i]:offsets[i + 1]]`, at the costs
+      `weights[offsets[i]:offsets[i + 1]]` (e.g. a `CompactCityMap`).
+    - `start` is the start node, and `ends` the end nodes.
+    """
+    labels: Sequence[str]
+    offsets: Sequence[int]
+    neighbors: Sequence[int]
+    weights: Sequence[float]
+    start: int
+    ends: Collection[int]
+
+
 class SearchProblem:
+    def location_graph(self) -> Optional[LocationGraph]:
+        """Return the problem as a `LocationGraph`, that `AStarSearch`
+        solves with integer nodes and flat arrays instead of `State`
+        objects, or None if its states are not plain locations."""
+        return None
+
     def start_state(self) -> State:
         """Return the start state."""
         raise NotImplementedError("Override me")
@@ -102,10 +128,21 @@ class ZeroHeuristic(Heuristic):
 
 
 class AStarSearch(SearchAlgorithm):
-    def __init__(self, heuristic: Heuristic, verbose: int = 0):
+    def __init__(
+            self,
+            heuristic: Heuristic,
+            verbose: int = 0,
+            make_frontier: Optional[Callable[[], 'Frontier']] = None,
+    ):
+        """`make_frontier` creates the `Frontier` of each search, a
+        `PriorityQueue` by default (e.g. `IndexedPriorityQueue` or
+        `BucketQueue`).  The queue of the last search is kept in
+        `self.frontier`, for its `stats()`."""
         super().__init__()
         self.heuristic = heuristic
         self.verbose = verbose
+        self.make_frontier = make_frontier
+        self.frontier: Optional[Frontier] = None
 
     def solve(self, problem: SearchProblem) -> None:
         """
@@ -123,12 +160,22 @@ class AStarSearch(SearchAlgorithm):
         self.path_cost: float = 0.0
         self.num_states_explored: int = 0
         self.past_costs: dict[str, float] = dict()
+        self.frontier = None
+
+        # Problems over plain locations have a faster path, with the same
+        # results (but without tracing each state, nor a pluggable frontier)
+        graph = (problem.location_graph()
+                 if self.verbose < 2 and self.make_frontier is None else None)
+        if graph is not None:
+            self._solve_location_graph(graph)
+            return
 
         # Cache the heuristic function's return values
         h = dict()
 
         # Initialize data structures
-        frontier = PriorityQueue()  # Explored states maintained by the frontier
+        # Explored states maintained by the frontier
+        frontier = self.frontier = (self.make_frontier or PriorityQueue)()
         backpointers = dict()       # Map state -> previous state
 
         # Add the start state
@@ -183,18 +230,281 @@ class AStarSearch(SearchAlgorithm):
                     backpointers[new_state] = (action, state)
 
 
+    def _solve_location_graph(self, graph: LocationGraph) -> None:
+        """Run A* Search on `graph` as `solve` does on `State` objects: nodes
+        are popped in the same order, priorities being compared the same way
+        and ties broken by node, that is by location."""
+        labels, offsets = graph.labels, graph.offsets
+        neighbors, weights, ends = graph.neighbors, graph.weights, graph.ends
+        num_nodes = len(labels)
+
+        # Heuristic values, evaluated on first use
+        if type(self.heuristic) is ZeroHeuristic:
+            h: list[Optional[float]] = [0.0] * num_nodes
+        else:
+            h = [None] * num_nodes
+        # Lowest priority pushed for each node, and its previous node
+        priorities = [float('inf')] * num_nodes
+        parents = [-1] * num_nodes
+        explored = bytearray(num_nodes)
+
+        start = graph.start
+        if h[start] is None:
+            h[start] = self.heuristic.evaluate(State(labels[start]))
+        priorities[start] = h[start]
+        heap = [(h[start], start)]
+        past_costs = self.past_costs
+        while len(heap) > 0:
+            f_node, node = heapq.heappop(heap)
+            if explored[node]:
+                # Outdated priority, skip
+                continue
+            explored[node] = 1
+            g_node = f_node - h[node]
+            past_costs[labels[node]] = g_node
+            self.num_states_explored += 1
+
+            if node in ends:
+                while node != start:
+                    self.actions.append(labels[node])
+                    node = parents[node]
+                self.actions.reverse()
+                self.path_cost = g_node
+                if self.verbose >= 1:
+                    print(f"{self.num_states_explored = }")
+                    print(f"{self.path_cost = }")
+                    print(f"{self.actions = }")
+                return
+
+            begin, end = offsets[node], offsets[node + 1]
+            for neighbor, cost in zip(neighbors[begin:end],
+                                      weights[begin:end]):
+                if explored[neighbor]:
+                    continue
+                h_neighbor = h[neighbor]
+                if h_neighbor is None:
+                    h_neighbor = h[neighbor] = self.heuristic.evaluate(
+                        State(labels[neighbor]))
+                f_neighbor = g_node + cost + h_neighbor
+                if f_neighbor < priorities[neighbor]:
+                    priorities[neighbor] = f_neighbor
+                    parents[neighbor] = node
+                    heapq.heappush(heap, (f_neighbor, neighbor))
+
+        if self.verbose >= 1:
+            print("Searched the entire search space!")
+
+
 class UniformCostSearch(AStarSearch):
-    def __init__(self, verbose: int = 0):
-        super().__init__(heuristic=ZeroHeuristic(), verbose=verbose)
+    def __init__(
+            self,
+            verbose: int = 0,
+            make_frontier: Optional[Callable[[], 'Frontier']] = None,
+    ):
+        super().__init__(heuristic=ZeroHeuristic(), verbose=verbose,
+                         make_frontier=make_frontier)
+
+
+class BidirectionalSearch(SearchAlgorithm):
+    """
+    Searches a `LocationGraph` from the start and, backwards, from the end
+    locations at once, until the two searches meet in the middle, which
+    explores far fewer states than a search from the start alone on long
+    routes.  Connections must be symmetric, as `CityMap.add_connection`
+    makes them.
+
+    Both searches are UCS, or A* if given a consistent `heuristic` (an
+    estimate of the cost to the end, as for `AStarSearch`) and
+    `reverse_heuristic` (an estimate of the cost from the start) and there
+    is a single end location: nodes are then ordered by the average of the
+    two estimates, so that the searches agree on when to stop.
+
+    `self.past_costs` has the locations explored from the start, and
+    `self.forward_explored` and `self.backward_explored` count the states
+    explored from either side.  Problems without a `LocationGraph` are
+    solved with `AStarSearch`.
+    """
+    def __init__(
+            self,
+            heuristic: Optional[Heuristic] = None,
+            reverse_heuristic: Optional[Heuristic] = None,
+            verbose: int = 0,
+    ):
+        super().__init__()
+        self.heuristic = heuristic
+        self.reverse_heuristic = reverse_heuristic
+        self.verbose = verbose
+        self.forward_explored = 0
+        self.backward_explored = 0
+
+    def solve(self, problem: SearchProblem) -> None:
+        self.actions: list[str] = list()
+        self.path_cost: float = 0.0
+        self.num_states_explored: int = 0
+        self.past_costs: dict[str, float] = dict()
+        self.forward_explored = self.backward_explored = 0
+
+        graph = problem.location_graph()
+        if graph is None:
+            search = AStarSearch(self.heuristic or ZeroHeuristic(),
+                                 self.verbose)
+            search.solve(problem)
+            self.actions, self.path_cost = search.actions, search.path_cost
+            self.num_states_explored = search.num_states_explored
+            self.past_costs = search.past_costs
+            self.forward_explored = search.num_states_explored
+            return
+
+        labels, offsets = graph.labels, graph.offsets
+        neighbors, weights = graph.neighbors, graph.weights
+        num_nodes = len(labels)
+        start, ends = graph.start, list(graph.ends)
+
+        # Forward nodes are ordered by past cost + potential, backward ones
+        # by past cost - potential, so that the keys of a node on both
+        # sides add up to the cost of the path through it
+        potentials: list[Optional[float]] = [0.0] * num_nodes
+        if (self.heuristic is not None and
+                self.reverse_heuristic is not None and len(ends) == 1):
+            potentials = [None] * num_nodes
+
+        def potential(node: int) -> float:
+            value = potentials[node]
+            if value is None:
+                state = State(labels[node])
+                value = potentials[node] = (
+                    self.heuristic.evaluate(state) -
+                    self.reverse_heuristic.evaluate(state)) / 2
+            return value
+
+        inf = float('inf')
+        # Everything per side: 0 searches from the start, 1 from the ends
+        costs = ([inf] * num_nodes, [inf] * num_nodes)
+        parents = ([-1] * num_nodes, [-1] * num_nodes)
+        parent_costs = ([0.0] * num_nodes, [0.0] * num_nodes)
+        explored = (bytearray(num_nodes), bytearray(num_nodes))
+        costs[0][start] = 0.0
+        heaps = ([(potential(start), start)], list())
+        for end in ends:
+            costs[1][end] = 0.0
+            heaps[1].append((-potential(end), end))
+        heapq.heapify(heaps[1])
+        num_explored = [0, 0]
+
+        # Cost of the best path found so far, and a node on it
+        best_cost, meeting = (0.0, start) if start in graph.ends else (inf, -1)
+        while len(heaps[0]) > 0 and len(heaps[1]) > 0:
+            # No path through the unexplored nodes can be shorter
+            if heaps[0][0][0] + heaps[1][0][0] >= best_cost:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            _, node = heapq.heappop(heaps[side])
+            if explored[side][node]:
+                # Outdated priority, skip
+                continue
+            explored[side][node] = 1
+            num_explored[side] += 1
+            g_node = costs[side][node]
+            if side == 0:
+                self.past_costs[labels[node]] = g_node
+
+            side_costs, other_costs = costs[side], costs[1 - side]
+            sign = 1 if side == 0 else -1
+            begin, end = offsets[node], offsets[node + 1]
+            for neighbor, cost in zip(neighbors[begin:end],
+                                      weights[begin:end]):
+                if explored[side][neighbor]:
+                    continue
+                g_neighbor = g_node + cost
+                if g_neighbor < side_costs[neighbor]:
+                    side_costs[neighbor] = g_neighbor
+                    parents[side][neighbor] = node
+                    parent_costs[side][neighbor] = cost
+                    heapq.heappush(heaps[side], (
+                        g_neighbor + sign * potential(neighbor), neighbor))
+                    if g_neighbor + other_costs[neighbor] < best_cost:
+                        best_cost = g_neighbor + other_costs[neighbor]
+                        meeting = neighbor
+
+        self.forward_explored, self.backward_explored = num_explored
+        self.num_states_explored = sum(num_explored)
+        if meeting < 0:
+            if self.verbose >= 1:
+                print("Searched the entire search space!")
+            return
+
+        # Stitch the path from the start to the meeting node with the path
+        # from there to an end, then sum the costs in order from the start
+        steps = list()
+        node = meeting
+        while node != start:
+            steps.append((node, parent_costs[0][node]))
+            node = parents[0][node]
+        steps.reverse()
+        node = meeting
+        while parents[1][node] >= 0:
+            steps.append((parents[1][node], parent_costs[1][node]))
+            node = parents[1][node]
+        self.actions = [labels[node] for node, _ in steps]
+        for _, cost in steps:
+            self.path_cost += cost
+        if self.verbose >= 1:
+            print(f"{self.num_states_explored = }")
+            print(f"{self.path_cost = }")
+            print(f"{self.actions = }")
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    """Operation counts of a priority queue."""
+    pushes: int
+    decrease_keys: int
+    # Entries removed, including outdated ones that were skipped
+    pops: int
+    stale_pops: int
+    # Most entries in the queue at once
+    peak_size: int
+
+    def __str__(self) -> str:
+        return (f"{self.pushes} pushes, {self.decrease_keys} decrease-keys, "
+                f"{self.pops} pops ({self.stale_pops} stale), "
+                f"peak size {self.peak_size}")
+
+
+class Frontier:
+    """
+    The priority queue of the states to explore in `AStarSearch` (see
+    `make_frontier`): states are removed in order of priority, and a state
+    removed once is never queued again.
+    """
+    def update(self, state: State, new_priority: float) -> bool:
+        """Queue `state` with priority `new_priority`, or lower its
+        priority to `new_priority`, unless it was removed already.  Return
+        whether the queue was updated."""
+        raise NotImplementedError("Override me")
 
+    def remove_min(self) -> tuple[Optional[State], Optional[float]]:
+        """Remove and return a (state with minimum priority, priority)
+        tuple, or (None, None) if the queue is empty."""
+        raise NotImplementedError("Override me")
+
+    def stats(self) -> QueueStats:
+        """Return the operation counts of the queue."""
+        raise NotImplementedError("Override me")
 
-class PriorityQueue:
+
+class PriorityQueue(Frontier):
     """Data structure to support uniform cost search."""
 
     def __init__(self):
         self.DONE = -100000
         self.heap = []
         self.priorities = {}  # Map from state to priority
+        self.pushes = 0
+        self.decrease_keys = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.peak_size = 0
 
     def update(self, state: State, new_priority: float) -> bool:
         """
@@ -206,8 +516,14 @@ class PriorityQueue:
         """
         old_priority = self.priorities.get(state)
         if old_priority is None or new_priority < old_priority:
+            if old_priority is not None:
+                # The entry with the old priority becomes outdated
+                self.decrease_keys += 1
             self.priorities[state] = new_priority
             heapq.heappush(self.heap, (new_priority, state))
+            self.pushes += 1
+            if len(self.heap) > self.peak_size:
+                self.peak_size = len(self.heap)
             return True
         return False
 
@@ -216,11 +532,231 @@ class PriorityQueue:
         (None, None) if the priority queue is empty."""
         while len(self.heap) > 0:
             priority, state = heapq.heappop(self.heap)
+            self.pops += 1
             if self.priorities[state] == self.DONE:
                 # Outdated priority, skip
+                self.stale_pops += 1
                 continue
             self.priorities[state] = self.DONE
             return state, priority
 
         # Nothing left...
         return None, None
+
+    def stats(self) -> QueueStats:
+        return QueueStats(self.pushes, self.decrease_keys, self.pops,
+                          self.stale_pops, self.peak_size)
+
+
+class _IndexedHeap:
+    """A binary heap of (priority, state) entries with the position of each
+    state in it, so that the entry of a state can be moved or removed."""
+
+    def __init__(self):
+        self.entries: list[tuple[float, Hashable]] = []
+        self.positions: dict[Hashable, int] = {}  # Map from state to index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def priority(self, state: Hashable) -> Optional[float]:
+        position = self.positions.get(state)
+        return self.entries[position][0] if position is not None else None
+
+    def push(self, state: Hashable, priority: float) -> None:
+        self.entries.append((priority, state))
+        self._sift_up(len(self.entries) - 1)
+
+    def decrease(self, state: Hashable, priority: float) -> None:
+        position = self.positions[state]
+        self.entries[position] = (priority, state)
+        self._sift_up(position)
+
+    def pop(self) -> tuple[float, Hashable]:
+        entry = self.entries[0]
+        self._remove_at(0)
+        return entry
+
+    def remove(self, state: Hashable) -> None:
+        self._remove_at(self.positions[state])
+
+    def _remove_at(self, position: int) -> None:
+        del self.positions[self.entries[position][1]]
+        last = self.entries.pop()
+        if position < len(self.entries):
+            # Move the last entry into the hole, then to its place
+            self.entries[position] = last
+            self._sift_down(position)
+            self._sift_up(position)
+
+    def _sift_up(self, position: int) -> None:
+        entries, positions = self.entries, self.positions
+        entry = entries[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if not entry < entries[parent]:
+                break
+            entries[position] = entries[parent]
+            positions[entries[position][1]] = position
+            position = parent
+        entries[position] = entry
+        positions[entry[1]] = position
+
+    def _sift_down(self, position: int) -> None:
+        entries, positions = self.entries, self.positions
+        size = len(entries)
+        entry = entries[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and entries[child + 1] < entries[child]:
+                child += 1
+            if not entries[child] < entry:
+                break
+            entries[position] = entries[child]
+            positions[entries[position][1]] = position
+            position = child
+        entries[position] = entry
+        positions[entry[1]] = position
+
+
+class IndexedPriorityQueue(Frontier):
+    """
+    A drop-in replacement for `PriorityQueue` that lowers the priority of a
+    state in place (decrease-key) instead of pushing another entry, so that
+    it holds at most one entry per state and never skips outdated ones.
+    States are removed in the same order as from a `PriorityQueue`.
+    """
+
+    def __init__(self):
+        self.heap = _IndexedHeap()
+        self.removed: set[Hashable] = set()
+        self.pushes = 0
+        self.decrease_keys = 0
+        self.pops = 0
+        self.peak_size = 0
+
+    def update(self, state: State, new_priority: float) -> bool:
+        """Insert `state` with priority `new_priority`, or lower its
+        priority to `new_priority`, unless it was removed already.
+
+        Return whether the priority queue was updated."""
+        old_priority = self.heap.priority(state)
+        if old_priority is None:
+            if state in self.removed:
+                return False
+            self.heap.push(state, new_priority)
+            self.pushes += 1
+            if len(self.heap) > self.peak_size:
+                self.peak_size = len(self.heap)
+            return True
+        if new_priority < old_priority:
+            self.heap.decrease(state, new_priority)
+            self.decrease_keys += 1
+            return True
+        return False
+
+    def remove_min(self):
+        """Returns a (state with minimum priority, priority) tuple, or
+        (None, None) if the priority queue is empty."""
+        if len(self.heap) == 0:
+            return None, None
+        priority, state = self.heap.pop()
+        self.removed.add(state)
+        self.pops += 1
+        return state, priority
+
+    def stats(self) -> QueueStats:
+        return QueueStats(self.pushes, self.decrease_keys, self.pops, 0,
+                          self.peak_size)
+
+
+class BucketQueue(Frontier):
+    """
+    A drop-in replacement for `PriorityQueue` that files states into buckets
+    of priorities `[k * bucket_width, (k + 1) * bucket_width)`, each a small
+    indexed heap, and removes them from the lowest bucket on.
+
+    It suits non-negative integer costs (one priority per bucket with the
+    default width) or costs bounded by a few bucket widths, where buckets
+    stay small and the next non-empty one is close.  States are removed in
+    the same order as from a `PriorityQueue`.
+    """
+
+    def __init__(self, bucket_width: float = 1.0):
+        if bucket_width <= 0:
+            raise ValueError(
+                f"bucket_width must be positive, got {bucket_width}")
+        self.bucket_width = bucket_width
+        self.buckets: dict[int, _IndexedHeap] = {}
+        # Map from queued state to priority
+        self.priorities: dict[Hashable, float] = {}
+        self.removed: set[Hashable] = set()
+        # Index of the lowest bucket that may not be empty
+        self.lowest = 0
+        self.size = 0
+        self.pushes = 0
+        self.decrease_keys = 0
+        self.pops = 0
+        self.peak_size = 0
+
+    def update(self, state: State, new_priority: float) -> bool:
+        """Insert `state` with priority `new_priority`, or lower its
+        priority to `new_priority`, unless it was removed already.
+
+        Return whether the priority queue was updated."""
+        old_priority = self.priorities.get(state)
+        if old_priority is None:
+            if state in self.removed:
+                return False
+            self.pushes += 1
+            self.size += 1
+            if self.size > self.peak_size:
+                self.peak_size = self.size
+        elif new_priority < old_priority:
+            self.decrease_keys += 1
+            old_bucket = self._bucket(old_priority)
+            if self._bucket(new_priority) == old_bucket:
+                self.buckets[old_bucket].decrease(state, new_priority)
+                self.priorities[state] = new_priority
+                return True
+            self.buckets[old_bucket].remove(state)
+        else:
+            return False
+
+        self.priorities[state] = new_priority
+        bucket = self._bucket(new_priority)
+        heap = self.buckets.get(bucket)
+        if heap is None:
+            heap = self.buckets[bucket] = _IndexedHeap()
+        heap.push(state, new_priority)
+        if self.size == 1 or bucket < self.lowest:
+            self.lowest = bucket
+        return True
+
+    def remove_min(self):
+        """Returns a (state with minimum priority, priority) tuple, or
+        (None, None) if the priority queue is empty."""
+        if self.size == 0:
+            return None, None
+        while True:
+            heap = self.buckets.get(self.lowest)
+            if heap is not None:
+                if len(heap) > 0:
+                    break
+                del self.buckets[self.lowest]
+            self.lowest += 1
+        priority, state = heap.pop()
+        del self.priorities[state]
+        self.removed.add(state)
+        self.size -= 1
+        self.pops += 1
+        return state, priority
+
+    def stats(self) -> QueueStats:
+        return QueueStats(self.pushes, self.decrease_keys, self.pops, 0,
+                          self.peak_size)
+
+    def _bucket(self, priority: float) -> int:
+        return int(priority // self.bucket_width)
@@ -1,6 +1,8 @@
-from city_map import CityMap, Geolocation, compute_distance, get_first_location_with_tag
+from typing import Optional
+
+from city_map import CityMap, CompactCityMap, Geolocation, compute_distance, get_first_location_with_tag
 from map_utils import create_map_with_landmarks
-from search import Heuristic, SearchProblem, State, UniformCostSearch
+from search import Heuristic, LocationGraph, SearchProblem, State, UniformCostSearch
 
 
 # Please first read the code as well as docstrings in file `search.py`.
@@ -62,6 +64,17 @@ class ShortestPathProblem(SearchProblem):
 
         return successors  
 
+    def location_graph(self) -> Optional[LocationGraph]:
+        # Only a CompactCityMap numbers its locations
+        if (not isinstance(self.city_map, CompactCityMap) or
+                self.start_location not in self.city_map.ids):
+            return None
+        city_map = self.city_map
+        return LocationGraph(
+            city_map.labels, city_map.offsets, city_map.neighbors,
+            city_map.weights, city_map.ids[self.start_location],
+            frozenset(city_map.locations_with_tag(self.end_tag)))
+
 
 ################################################################################
 # Part 1b: Plan a route through RIT
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import pytest
+import sys
+
+from city_map import CompactCityMap, get_first_location_with_tag, make_tag
+from map_utils import create_map_with_landmarks
+from submission import ShortestPathProblem
+from test_utils import assert_cost_equals, create_grid_map, make_grid_label
+
+rit_map = create_map_with_landmarks(
+    'data/rit-map.pbf', 'data/rit-landmarks.json')
+
+
+def assert_same_map(compact_map: CompactCityMap, city_map) -> None:
+    assert len(compact_map) == len(city_map.geolocations)
+    assert dict(compact_map.geolocations) == dict(city_map.geolocations)
+    for label in city_map.geolocations:
+        assert compact_map.tags[label] == city_map.tags[label]
+        assert dict(compact_map.distances[label]) == \
+            city_map.distances[label]
+        assert compact_map.distances[label].items() == \
+            list(city_map.distances[label].items())
+
+
+@pytest.mark.timeout(5)
+class TestCompactCityMap:
+    @pytest.mark.it("Same locations, tags and distances as a grid map")
+    def test_grid(self):
+        city_map = create_grid_map(4, 3, {(1, 2): ['amenity=food']})
+        compact_map = CompactCityMap.from_city_map(city_map)
+        assert_same_map(compact_map, city_map)
+        assert compact_map.labels == sorted(city_map.geolocations)
+
+    @pytest.mark.it("Same locations, tags and distances as the RIT map")
+    def test_rit(self):
+        assert_same_map(CompactCityMap.from_city_map(rit_map), rit_map)
+
+    @pytest.mark.it("Integer ids of the locations and their neighbors")
+    def test_ids(self):
+        compact_map = CompactCityMap.from_city_map(create_grid_map(3, 3))
+        node = compact_map.ids[make_grid_label(1, 1)]
+        assert compact_map.labels[node] == make_grid_label(1, 1)
+        neighbors = sorted(compact_map.labels[neighbor] for neighbor, _ in
+                           compact_map.successors(node))
+        assert neighbors == ['0,1', '1,0', '1,2', '2,1']
+        assert all(distance == 1 for _, distance in
+                   compact_map.successors(node))
+
+    @pytest.mark.it("Locations with a tag")
+    def test_locations_with_tag(self):
+        city_map = create_grid_map(3, 3, {(2, 0): ['amenity=food']})
+        compact_map = CompactCityMap.from_city_map(city_map)
+        assert [compact_map.labels[node] for node in
+                compact_map.locations_with_tag(make_tag('x', '1'))] == \
+            ['1,0', '1,1', '1,2']
+        assert compact_map.locations_with_tag('label=2,2') == \
+            [compact_map.ids['2,2']]
+        assert compact_map.locations_with_tag('amenity=none') == []
+        assert get_first_location_with_tag('amenity=food', compact_map) == \
+            '2,0'
+
+    @pytest.mark.it("Golisano Hall -> Global Village Plaza")
+    def test_rit_shortest_path(self):
+        compact_map = CompactCityMap.from_city_map(rit_map)
+        start_location = get_first_location_with_tag(
+            make_tag('landmark', 'Golisano_Hall'), compact_map)
+        end_tag = make_tag('landmark', 'Global_Village_Plaza')
+        problem = ShortestPathProblem(start_location, end_tag, compact_map)
+        assert_cost_equals(285.6319911643564,
+                           problem, start_location, end_tag, compact_map)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
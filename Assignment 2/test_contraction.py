@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import pytest
+import random
+import sys
+
+from city_map import CityMap, CompactCityMap, Geolocation, \
+    get_first_location_with_tag, make_tag
+from contraction import ContractionHierarchy, ContractionHierarchySearch
+from map_utils import create_map_with_landmarks, get_route_cost
+from search import UniformCostSearch
+from submission import ShortestPathProblem
+from test_utils import assert_cost_equals, create_grid_map, make_grid_label
+
+rit_map = CompactCityMap.from_city_map(create_map_with_landmarks(
+    'data/rit-map.pbf', 'data/rit-landmarks.json'))
+rit_hierarchy = ContractionHierarchy.build(rit_map)
+
+
+def assert_same_as_ucs(hierarchy, city_map, start_location, end_tag):
+    problem = ShortestPathProblem(start_location, end_tag, city_map)
+    ucs = UniformCostSearch()
+    ucs.solve(problem)
+    search = ContractionHierarchySearch(hierarchy)
+    search.solve(problem)
+    route = [start_location] + search.actions
+    assert search.path_cost == get_route_cost(route, city_map)
+    assert search.path_cost == pytest.approx(ucs.path_cost)
+    if len(ucs.actions) > 0:
+        assert end_tag in city_map.tags[route[-1]]
+
+
+@pytest.mark.timeout(10)
+class TestContractionHierarchy:
+    @pytest.mark.it("Shortest paths between random grid locations")
+    def test_grid(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(12, 15))
+        hierarchy = ContractionHierarchy.build(city_map)
+        rng = random.Random(0)
+        for _ in range(50):
+            assert_same_as_ucs(
+                hierarchy, city_map, rng.choice(city_map.labels),
+                make_tag('label', rng.choice(city_map.labels)))
+
+    @pytest.mark.it("Shortest path with multiple end locations")
+    def test_multiple_ends(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(30, 30))
+        hierarchy = ContractionHierarchy.build(city_map)
+        start_location = make_grid_label(20, 10)
+        end_tag = make_tag('x', str(5))
+        problem = ShortestPathProblem(start_location, end_tag, city_map)
+        assert_cost_equals(15, problem, start_location, end_tag, city_map,
+                           search=ContractionHierarchySearch(hierarchy))
+
+    @pytest.mark.it("No path to an unreachable location")
+    def test_unreachable(self):
+        city_map = CityMap()
+        for label in 'abcd':
+            city_map.add_location(label, Geolocation(0, ord(label)), [])
+        city_map.add_connection('a', 'b', 1)
+        city_map.add_connection('c', 'd', 2)
+        city_map = CompactCityMap.from_city_map(city_map)
+        search = ContractionHierarchySearch(
+            ContractionHierarchy.build(city_map))
+        search.solve(ShortestPathProblem('a', 'label=d', city_map))
+        assert (search.actions, search.path_cost) == ([], 0.0)
+        search.solve(ShortestPathProblem('c', 'label=d', city_map))
+        assert (search.actions, search.path_cost) == (['d'], 2.0)
+        assert search.past_costs == {'c': 0.0, 'd': 2.0}
+
+    @pytest.mark.it("Saved and loaded hierarchy")
+    def test_save_load(self, tmp_path):
+        path = str(tmp_path / 'rit-map.ch')
+        rit_hierarchy.save(path)
+        hierarchy = ContractionHierarchy.load(path)
+        for name in ('labels', 'ranks', 'offsets', 'neighbors', 'weights',
+                     'middles'):
+            assert getattr(hierarchy, name) == getattr(rit_hierarchy, name)
+        (tmp_path / 'not-a-hierarchy').write_bytes(b'osm')
+        with pytest.raises(ValueError):
+            ContractionHierarchy.load(str(tmp_path / 'not-a-hierarchy'))
+
+    @pytest.mark.it("Golisano Hall -> Global Village Plaza")
+    def test_rit_gccis2gv(self):
+        start_location = get_first_location_with_tag(
+            make_tag('landmark', 'Golisano_Hall'), rit_map)
+        end_tag = make_tag('landmark', 'Global_Village_Plaza')
+        problem = ShortestPathProblem(start_location, end_tag, rit_map)
+        assert_cost_equals(285.6319911643564, problem, start_location,
+                           end_tag, rit_map,
+                           search=ContractionHierarchySearch(rit_hierarchy))
+
+    @pytest.mark.it("Shortest paths between random RIT locations")
+    def test_rit_random(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            assert_same_as_ucs(
+                rit_hierarchy, rit_map, rng.choice(rit_map.labels),
+                make_tag('label', rng.choice(rit_map.labels)))
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())
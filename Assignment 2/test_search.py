@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import pytest
+import random
+import sys
+
+from city_map import CityMap, CompactCityMap, Geolocation, \
+    compute_distance, make_tag
+from map_utils import create_map_with_landmarks
+from search import AStarSearch, BidirectionalSearch, BucketQueue, Frontier, \
+    Heuristic, IndexedPriorityQueue, PriorityQueue, State, UniformCostSearch
+from submission import ShortestPathProblem
+from test_utils import assert_cost_equals, create_grid_map, make_grid_label
+
+rit_map = create_map_with_landmarks(
+    'data/rit-map.pbf', 'data/rit-landmarks.json')
+compact_rit_map = CompactCityMap.from_city_map(rit_map)
+
+
+class GenericProblem(ShortestPathProblem):
+    """A `ShortestPathProblem` searched on `State` objects."""
+    def location_graph(self):
+        return None
+
+
+class KernelOnlyProblem(ShortestPathProblem):
+    """A `ShortestPathProblem` that fails if searched on `State` objects."""
+    def successors_and_costs(self, state):
+        raise AssertionError("Not searched with the integer kernel")
+
+
+class StraightLineHeuristic(Heuristic):
+    def __init__(self, end_location: str, city_map) -> None:
+        self.end = city_map.geolocations[end_location]
+        self.city_map = city_map
+
+    def evaluate(self, state: State) -> float:
+        return compute_distance(
+            self.city_map.geolocations[state.location], self.end)
+
+
+def solve(search, problem) -> tuple:
+    search.solve(problem)
+    return (search.actions, search.path_cost, search.num_states_explored,
+            search.past_costs)
+
+
+def assert_same_results(make_search, start_location, end_tag, city_map):
+    expected = solve(make_search(),
+                     GenericProblem(start_location, end_tag, city_map))
+    actual = solve(make_search(),
+                   KernelOnlyProblem(start_location, end_tag, city_map))
+    assert actual == expected
+
+
+@pytest.mark.timeout(5)
+class TestKernel:
+    @pytest.mark.it("UCS kernel with 1 end location")
+    def test_grid(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(20, 30))
+        assert_same_results(UniformCostSearch, make_grid_label(3, 4),
+                            make_tag('label', make_grid_label(17, 25)),
+                            city_map)
+
+    @pytest.mark.it("UCS kernel with multiple end locations")
+    def test_multiple_ends(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(30, 30))
+        assert_same_results(UniformCostSearch, make_grid_label(20, 10),
+                            make_tag('x', str(5)), city_map)
+
+    @pytest.mark.it("UCS kernel without any end location")
+    def test_unreachable(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(5, 5))
+        search = UniformCostSearch()
+        actions, path_cost, explored, past_costs = solve(
+            search, KernelOnlyProblem('0,0', 'amenity=none', city_map))
+        assert (actions, path_cost, explored) == ([], 0.0, 25)
+        assert past_costs['4,4'] == 8
+
+    @pytest.mark.it("UCS kernel Golisano Hall -> NTID")
+    def test_rit(self):
+        start_location = compact_rit_map.labels[
+            compact_rit_map.locations_with_tag('landmark=Golisano_Hall')[0]]
+        assert_same_results(UniformCostSearch, start_location,
+                            make_tag('landmark', 'NTID'), compact_rit_map)
+
+    @pytest.mark.it("A* kernel straight-line heuristic Golisano Hall -> NTID")
+    def test_rit_a_star(self):
+        start_location = compact_rit_map.labels[
+            compact_rit_map.locations_with_tag('landmark=Golisano_Hall')[0]]
+        end_tag = make_tag('landmark', 'NTID')
+        end_location = compact_rit_map.labels[
+            compact_rit_map.locations_with_tag(end_tag)[0]]
+        heuristic = StraightLineHeuristic(end_location, compact_rit_map)
+        assert_same_results(lambda: AStarSearch(heuristic), start_location,
+                            end_tag, compact_rit_map)
+
+
+def create_weighted_grid_map(width: int, height: int, seed: int = 0):
+    """Return a grid map with random integer costs from 1 to 9."""
+    rng = random.Random(seed)
+    city_map = create_grid_map(width, height)
+    for source, targets in city_map.distances.items():
+        for target in targets:
+            if source < target:
+                cost = rng.randint(1, 9)
+                targets[target] = city_map.distances[target][source] = cost
+    return city_map
+
+
+@pytest.mark.timeout(5)
+class TestQueues:
+    @pytest.mark.it("Same order of states from every priority queue")
+    def test_same_order(self):
+        for queue_class in (IndexedPriorityQueue, BucketQueue):
+            queue = queue_class()
+            assert isinstance(queue, Frontier)
+            for state, priority in [('a', 3), ('b', 1), ('c', 2), ('d', 2),
+                                    ('a', 1), ('c', 5), ('e', 0.5)]:
+                queue.update(State(state), priority)
+            removed = [queue.remove_min() for _ in range(6)]
+            assert removed == [(State('e'), 0.5), (State('a'), 1),
+                               (State('b'), 1), (State('c'), 2),
+                               (State('d'), 2), (None, None)]
+            # Removed states are not queued again
+            assert not queue.update(State('a'), 0)
+            assert queue.stats().decrease_keys == 1
+
+    @pytest.mark.it("Buckets wider than the costs")
+    def test_bucket_width(self):
+        queue = BucketQueue(bucket_width=2.5)
+        for i, priority in enumerate([7.5, 2.4, 9.9, 0.1, 2.6, 2.5, 12.0]):
+            queue.update(State(str(i)), priority)
+        queue.update(State('2'), 0.2)
+        priorities = [queue.remove_min()[1] for _ in range(7)]
+        assert priorities == [0.1, 0.2, 2.4, 2.5, 2.6, 7.5, 12.0]
+        with pytest.raises(ValueError):
+            BucketQueue(bucket_width=0)
+
+    @pytest.mark.it("Same UCS results with every priority queue")
+    def test_ucs(self):
+        city_map = create_weighted_grid_map(30, 30)
+        problem = ShortestPathProblem(
+            make_grid_label(2, 3), make_tag('label', make_grid_label(27, 28)),
+            city_map)
+        expected_search = UniformCostSearch(make_frontier=PriorityQueue)
+        expected = solve(expected_search, problem)
+        lazy_stats = expected_search.frontier.stats()
+        assert lazy_stats.stale_pops > 0
+        for make_frontier in (IndexedPriorityQueue, BucketQueue,
+                              lambda: BucketQueue(4)):
+            search = UniformCostSearch(make_frontier=make_frontier)
+            assert solve(search, problem) == expected
+            stats = search.frontier.stats()
+            assert stats.stale_pops == 0
+            assert stats.pops == expected[2]
+            assert stats.decrease_keys == lazy_stats.decrease_keys
+            assert stats.peak_size < lazy_stats.peak_size
+
+
+def rit_location(tag: str) -> str:
+    return compact_rit_map.labels[compact_rit_map.locations_with_tag(tag)[0]]
+
+
+@pytest.mark.timeout(5)
+class TestBidirectional:
+    @pytest.mark.it("Bidirectional UCS with 1 end location")
+    def test_grid(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(30, 30))
+        start_location = make_grid_label(5, 15)
+        end_tag = make_tag('label', make_grid_label(25, 15))
+        problem = ShortestPathProblem(start_location, end_tag, city_map)
+        search = BidirectionalSearch()
+        assert_cost_equals(20, problem, start_location, end_tag, city_map,
+                           search=search)
+        ucs = UniformCostSearch()
+        ucs.solve(problem)
+        assert search.path_cost == 20
+        assert search.num_states_explored == \
+            search.forward_explored + search.backward_explored
+        assert search.num_states_explored < ucs.num_states_explored
+
+    @pytest.mark.it("Bidirectional UCS with multiple end locations")
+    def test_multiple_ends(self):
+        city_map = CompactCityMap.from_city_map(create_grid_map(30, 30))
+        start_location = make_grid_label(20, 10)
+        end_tag = make_tag('x', str(5))
+        problem = ShortestPathProblem(start_location, end_tag, city_map)
+        assert_cost_equals(15, problem, start_location, end_tag, city_map,
+                           search=BidirectionalSearch())
+
+    @pytest.mark.it("Bidirectional UCS from an end location or to none")
+    def test_edge_cases(self):
+        city_map = CityMap()
+        for label in 'abc':
+            city_map.add_location(label, Geolocation(0, ord(label)), [])
+        city_map.add_connection('a', 'b', 1)
+        city_map = CompactCityMap.from_city_map(city_map)
+        search = BidirectionalSearch()
+        search.solve(ShortestPathProblem('a', 'label=a', city_map))
+        assert (search.actions, search.path_cost) == ([], 0.0)
+        search.solve(ShortestPathProblem('a', 'label=c', city_map))
+        assert (search.actions, search.path_cost) == ([], 0.0)
+        # The backward search is over as soon as it explored 'c'
+        assert search.backward_explored == 1
+        assert search.past_costs == {'a': 0.0}
+
+    @pytest.mark.it("Bidirectional UCS without a location graph")
+    def test_fallback(self):
+        city_map = create_grid_map(10, 10)
+        problem = ShortestPathProblem(
+            make_grid_label(0, 0), make_tag('label', make_grid_label(9, 9)),
+            city_map)
+        search = BidirectionalSearch()
+        search.solve(problem)
+        assert search.path_cost == 18
+        assert search.forward_explored == 100
+
+    @pytest.mark.it("Bidirectional UCS and A* Golisano Hall -> NTID")
+    def test_rit(self):
+        start_location = rit_location('landmark=Golisano_Hall')
+        end_tag = make_tag('landmark', 'NTID')
+        end_location = rit_location(end_tag)
+        problem = ShortestPathProblem(start_location, end_tag, compact_rit_map)
+        ucs = UniformCostSearch()
+        ucs.solve(problem)
+        for search in (BidirectionalSearch(), BidirectionalSearch(
+                StraightLineHeuristic(end_location, compact_rit_map),
+                StraightLineHeuristic(start_location, compact_rit_map))):
+            assert_cost_equals(pytest.approx(ucs.path_cost), problem,
+                               start_location, end_tag, compact_rit_map,
+                               search=search)
+            assert search.num_states_explored < ucs.num_states_explored
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main())